@@ -19,21 +19,99 @@
  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
  """
 
+import collections
+import json
+import time
+
+from ryu import cfg
 from ryu.base import app_manager
 from ryu.controller import ofp_event
-from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
+from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
+from ryu.lib import hub
+from ryu.lib.packet import packet, ethernet, ether_types
+from ryu.lib.packet import arp, ipv4
+
+from mac_table import MacTable, MOVED
+from lpm import LpmTable, ip_to_int, int_to_ip, prefix_mask
+from arp_cache import ArpCache
+
+# A router's route: prefix/length out of port, to gateway or (None) directly to the host
+Route = collections.namedtuple('Route', ['prefix', 'length', 'port', 'gateway'])
+
+# Switches that route are named in a JSON file (see routers.json), passed in
+# through ryu-manager's config file (see router.conf):
+#   ryu-manager --config-file router.conf ans_controller.py
+# Without it every switch is a learning switch.
+cfg.CONF.register_opts([
+    cfg.StrOpt('router_config', default='',
+               help='JSON file of the switches that route IPv4, see lab1/routers.json')])
+
+
+def load_router_config(path):
+    """
+        (ROUTERS, STATIC_ROUTES) from a JSON file with the same layout; the
+        dpids and ports that JSON keeps as strings become ints again
+    """
+    with open(path) as f:
+        config = json.load(f)
+    routers = {int(dpid): {int(port): tuple(interface) for port, interface in ports.items()}
+               for dpid, ports in config.get('routers', {}).items()}
+    static_routes = {int(dpid): [tuple(route) for route in routes]
+                     for dpid, routes in config.get('static_routes', {}).items()}
+    return routers, static_routes
 
 
 class LearningSwitch(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
 
+    MAC_TABLE_SIZE = 1024               # MACs per switch, least recently seen evicted first
+    MAC_AGING = 300                     # seconds a MAC is remembered without being seen
+
+    # Once both ends of a conversation are known, each direction gets an
+    # exact-match entry and the switch forwards the rest on its own. Frames
+    # on those entries never reach the controller to refresh their MACs, so
+    # the hard timeout sends the conversation back now and then; a MAC that
+    # ages out or is evicted anyway takes its entries with it.
+    FLOW_PRIORITY = 1
+    FLOW_IDLE_TIMEOUT = 60
+    FLOW_HARD_TIMEOUT = 300
+
+    # Unknown unicast from one source is flooded at most once per
+    # FLOOD_HOLDDOWN seconds for each destination and switch; retransmissions
+    # in between are dropped
+    FLOOD_HOLDDOWN = 1.0
+    AGING_INTERVAL = 10                 # seconds between sweeps for aged MACs
+
+    # Switches that route IPv4 between subnets rather than learn MACs:
+    # dpid -> {port: (interface ip, prefix length, interface mac)}. Set from
+    # the router_config file when there is one.
+    ROUTERS = {}
+    STATIC_ROUTES = {}                  # dpid -> [('prefix/length', gateway ip)]
+
+    # Routed destinations are compiled into entries that decrement the TTL
+    # and rewrite the MACs in the switch, one per host on a connected subnet
+    # and one per prefix behind a gateway. They expire with the ARP answer
+    # they carry.
+    ROUTE_PRIORITY = 100                # + prefix length, longest match wins in the switch too
+    ARP_TIMEOUT = 300
+    ARP_QUEUE = 16                      # packets held per unresolved next hop
+    ARP_RETRY = 1.0
+
     def __init__(self, *args, **kwargs):
         super(LearningSwitch, self).__init__(*args, **kwargs)
+        if self.CONF.router_config:
+            self.ROUTERS, self.STATIC_ROUTES = load_router_config(self.CONF.router_config)
 
-        # Here you can initialize the data structures you want to keep at the controller
-        
+        self.datapaths = {}             # dpid -> datapath, for the aging sweep
+        self.mac_tables = {}            # dpid -> MacTable
+        self.flooded = {}               # dpid -> {(src, unknown dst mac): last flood time}
+        self.counters = collections.Counter()
+        self.route_tables = {dpid: self.build_route_table(dpid) for dpid in self.ROUTERS}
+        self.arp_caches = {dpid: ArpCache(self.ARP_TIMEOUT, self.ARP_QUEUE, self.ARP_RETRY)
+                           for dpid in self.ROUTERS}
+        self.aging_thread = hub.spawn(self._aging_loop)
 
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
@@ -41,6 +119,7 @@ class LearningSwitch(app_manager.RyuApp):
         datapath = ev.msg.datapath
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
+        self.datapaths[datapath.id] = datapath
 
         # Initial flow entry for matching misses
         match = parser.OFPMatch()
@@ -48,16 +127,61 @@ class LearningSwitch(app_manager.RyuApp):
                                           ofproto.OFPCML_NO_BUFFER)]
         self.add_flow(datapath, 0, match, actions)
 
+    # Connected subnets of the router's interfaces plus its static routes
+    def build_route_table(self, dpid):
+        table = LpmTable()
+        for port, (ip, length, _) in self.ROUTERS[dpid].items():
+            prefix = ip_to_int(ip) & prefix_mask(length)
+            table.insert(prefix, length, Route(prefix, length, port, None))
+        for cidr, gateway in self.STATIC_ROUTES.get(dpid, ()):
+            ip, length = cidr.split('/')
+            via = table.lookup(ip_to_int(gateway))
+            if via is None or via.gateway is not None:
+                self.logger.error('route %s: gateway %s is not on a connected subnet', cidr, gateway)
+                continue
+            prefix = ip_to_int(ip) & prefix_mask(int(length))
+            table.insert(prefix, int(length), Route(prefix, int(length), via.port, gateway))
+        return table
+
+    # A reconnecting switch starts with an empty flow table, and so do we
+    @set_ev_cls(ofp_event.EventOFPStateChange, [MAIN_DISPATCHER, DEAD_DISPATCHER])
+    def _state_change_handler(self, ev):
+        if ev.state == DEAD_DISPATCHER and ev.datapath.id is not None:
+            self.datapaths.pop(ev.datapath.id, None)
+            self.mac_tables.pop(ev.datapath.id, None)
+            self.flooded.pop(ev.datapath.id, None)
+
     # Add a flow entry to the flow-table
-    def add_flow(self, datapath, priority, match, actions):
+    def add_flow(self, datapath, priority, match, actions, idle_timeout=0, hard_timeout=0,
+                 buffer_id=None):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
 
         # Construct flow_mod message and send it
         inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
+        if buffer_id is None:
+            buffer_id = ofproto.OFP_NO_BUFFER
+        mod = parser.OFPFlowMod(datapath=datapath, priority=priority, buffer_id=buffer_id,
+                                idle_timeout=idle_timeout, hard_timeout=hard_timeout,
                                 match=match, instructions=inst)
         datapath.send_msg(mod)
+        self.counters['flow_mods'] += 1
+
+    # Remove the entries that forward to or from mac
+    def delete_flows(self, datapath, mac):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        for match in (parser.OFPMatch(eth_dst=mac), parser.OFPMatch(eth_src=mac)):
+            datapath.send_msg(parser.OFPFlowMod(
+                datapath=datapath, command=ofproto.OFPFC_DELETE,
+                out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY, match=match))
+            self.counters['flow_mods'] += 1
+
+    def mac_table(self, dpid):
+        table = self.mac_tables.get(dpid)
+        if table is None:
+            table = self.mac_tables[dpid] = MacTable(self.MAC_TABLE_SIZE, self.MAC_AGING)
+        return table
 
     # Handle the packet_in event
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
@@ -65,5 +189,180 @@ class LearningSwitch(app_manager.RyuApp):
         
         msg = ev.msg
         datapath = msg.datapath
+        dpid = datapath.id
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        in_port = msg.match['in_port']
+        self.counters['packet_ins'] += 1
+
+        pkt = packet.Packet(msg.data)
+        eth = pkt.get_protocol(ethernet.ethernet)
+        if eth is None or eth.ethertype == ether_types.ETH_TYPE_LLDP:
+            return
+        if dpid in self.ROUTERS:
+            self.handle_routed(datapath, in_port, pkt, eth, msg.data)
+            return
+        src, dst = eth.src, eth.dst
+
+        # Learn the source; entries still sending to a moved or evicted MAC go
+        table = self.mac_table(dpid)
+        status, evicted = table.learn(src, in_port)
+        if status == MOVED:
+            self.delete_flows(datapath, src)
+        if evicted is not None:
+            self.delete_flows(datapath, evicted)
+
+        out_port = table.lookup(dst)
+        if out_port == in_port:
+            self.counters['dropped_same_port'] += 1
+            return
+
+        if out_port is None:
+            if not self.flood_allowed(dpid, src, dst):
+                self.counters['floods_suppressed'] += 1
+                return
+            out_port = ofproto.OFPP_FLOOD
+            self.counters['floods'] += 1
+        else:
+            # Both directions at once: the reply would otherwise come back
+            # here just to install the same pair reversed
+            self.add_flow(datapath, self.FLOW_PRIORITY,
+                          parser.OFPMatch(in_port=out_port, eth_src=dst, eth_dst=src),
+                          [parser.OFPActionOutput(in_port)],
+                          self.FLOW_IDLE_TIMEOUT, self.FLOW_HARD_TIMEOUT)
+            self.add_flow(datapath, self.FLOW_PRIORITY,
+                          parser.OFPMatch(in_port=in_port, eth_src=src, eth_dst=dst),
+                          [parser.OFPActionOutput(out_port)],
+                          self.FLOW_IDLE_TIMEOUT, self.FLOW_HARD_TIMEOUT, msg.buffer_id)
+            if msg.buffer_id != ofproto.OFP_NO_BUFFER:
+                return          # the FlowMod released the buffered packet
+
+        data = msg.data if msg.buffer_id == ofproto.OFP_NO_BUFFER else None
+        datapath.send_msg(parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
+                                              in_port=in_port,
+                                              actions=[parser.OFPActionOutput(out_port)],
+                                              data=data))
+        self.counters['packet_outs'] += 1
+
+    # Broadcast and multicast always flood; unknown unicast once per hold-down
+    def flood_allowed(self, dpid, src, dst):
+        if int(dst.split(':')[0], 16) & 1:
+            return True
+        now = time.monotonic()
+        flooded = self.flooded.setdefault(dpid, {})
+        last = flooded.get((src, dst))
+        if last is not None and now - last < self.FLOOD_HOLDDOWN:
+            return False
+        flooded[src, dst] = now
+        return True
+
+    def handle_routed(self, datapath, in_port, pkt, eth, data):
+        dpid = datapath.id
+        interfaces = self.ROUTERS[dpid]
+        cache = self.arp_caches[dpid]
+
+        if eth.ethertype == ether_types.ETH_TYPE_ARP:
+            arp_pkt = pkt.get_protocol(arp.arp)
+            self.counters['router_arp'] += 1
+            installed = set()
+            for route, dst_ip, waiting in cache.learn(arp_pkt.src_ip, arp_pkt.src_mac):
+                self.forward_routed(datapath, route, dst_ip, arp_pkt.src_mac, waiting, installed)
+            own = interfaces.get(in_port)
+            if arp_pkt.opcode == arp.ARP_REQUEST and own is not None and arp_pkt.dst_ip == own[0]:
+                self.send_arp(datapath, in_port, arp.ARP_REPLY, arp_pkt.src_mac, arp_pkt.src_ip)
+            return
+
+        ip_pkt = pkt.get_protocol(ipv4.ipv4)
+        if ip_pkt is None:
+            return
+        self.counters['router_ipv4'] += 1
+        if any(ip_pkt.dst == ip for ip, _, _ in interfaces.values()):
+            self.counters['router_local'] += 1          # for the router itself, not answered
+            return
+        if ip_pkt.ttl <= 1:
+            self.counters['ttl_expired'] += 1
+            return
+        route = self.route_tables[dpid].lookup(ip_to_int(ip_pkt.dst))
+        if route is None:
+            self.counters['no_route'] += 1
+            return
+
+        next_hop = route.gateway or ip_pkt.dst
+        mac = cache.get(next_hop)
+        if mac is not None:
+            self.forward_routed(datapath, route, ip_pkt.dst, mac, data)
+        elif cache.hold(next_hop, (route, ip_pkt.dst, data)):
+            self.send_arp(datapath, route.port, arp.ARP_REQUEST, 'ff:ff:ff:ff:ff:ff', next_hop)
+
+    def forward_routed(self, datapath, route, dst_ip, mac, data, installed=None):
+        """
+            Install the entry for dst_ip's route, unless already done for this
+            batch (installed), and send data along it. A gateway route becomes
+            one prefix entry unless a longer route lies inside it, which the
+            prefix entry would shadow; everything else is matched per host.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        table = self.route_tables[datapath.id]
+        own_mac = self.ROUTERS[datapath.id][route.port][2]
+        actions = [parser.OFPActionDecNwTtl(),
+                   parser.OFPActionSetField(eth_src=own_mac),
+                   parser.OFPActionSetField(eth_dst=mac),
+                   parser.OFPActionOutput(route.port)]
+
+        if route.gateway is not None and not table.has_longer(route.prefix, route.length):
+            key = (int_to_ip(route.prefix), int_to_ip(prefix_mask(route.length)))
+            length = route.length
+        else:
+            key, length = dst_ip, 32
+        if installed is None or key not in installed:
+            self.add_flow(datapath, self.ROUTE_PRIORITY + length,
+                          parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=key),
+                          actions, self.FLOW_IDLE_TIMEOUT, self.ARP_TIMEOUT)
+            if installed is not None:
+                installed.add(key)
+
+        datapath.send_msg(parser.OFPPacketOut(datapath=datapath, buffer_id=ofproto.OFP_NO_BUFFER,
+                                              in_port=ofproto.OFPP_CONTROLLER,
+                                              actions=actions, data=data))
+        self.counters['packet_outs'] += 1
+
+    # ARP request or reply from the router's interface on port
+    def send_arp(self, datapath, port, opcode, dst_mac, dst_ip):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        own_ip, _, own_mac = self.ROUTERS[datapath.id][port]
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet(dst_mac, own_mac, ether_types.ETH_TYPE_ARP))
+        pkt.add_protocol(arp.arp(opcode=opcode, src_mac=own_mac, src_ip=own_ip,
+                                 dst_mac='00:00:00:00:00:00' if opcode == arp.ARP_REQUEST
+                                 else dst_mac, dst_ip=dst_ip))
+        pkt.serialize()
+        datapath.send_msg(parser.OFPPacketOut(datapath=datapath, buffer_id=ofproto.OFP_NO_BUFFER,
+                                              in_port=ofproto.OFPP_CONTROLLER,
+                                              actions=[parser.OFPActionOutput(port)],
+                                              data=pkt.data))
+        self.counters['packet_outs'] += 1
+
+    def _aging_loop(self):
+        while True:
+            hub.sleep(self.AGING_INTERVAL)
+            now = time.monotonic()
+            for dpid, table in list(self.mac_tables.items()):
+                datapath = self.datapaths.get(dpid)
+                for mac in table.expire():
+                    if datapath is not None:
+                        self.delete_flows(datapath, mac)
+            for cache in self.arp_caches.values():
+                cache.sweep()
+            for flooded in self.flooded.values():
+                for key in [key for key, last in flooded.items()
+                            if now - last >= self.FLOOD_HOLDDOWN]:
+                    del flooded[key]
 
-        # Your controller implementation should start here
\ No newline at end of file
+    def stats(self):
+        return dict(self.counters,
+                    macs={dpid: len(table) for dpid, table in self.mac_tables.items()},
+                    evictions=sum(t.evictions for t in self.mac_tables.values()),
+                    expirations=sum(t.expirations for t in self.mac_tables.values()),
+                    moves=sum(t.moves for t in self.mac_tables.values()))
@@ -0,0 +1,89 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+import collections
+import time
+
+
+class ArpCache:
+    """
+        Next-hop IP -> MAC for a router, plus the packets waiting for a MAC.
+        Answers expire after `timeout` seconds. While an address is being
+        resolved, up to `queue` packets wait for it (the oldest are dropped
+        beyond that), and the request is repeated at most every `retry`
+        seconds however many packets arrive. sweep() gives up on addresses
+        nothing has asked for in `wait` seconds.
+    """
+
+    def __init__(self, timeout=300.0, queue=16, retry=1.0, wait=5.0, clock=time.monotonic):
+        self.timeout = timeout
+        self.queue = queue
+        self.retry = retry
+        self.wait = wait
+        self.clock = clock
+        self.entries = {}           # ip -> (mac, learned at)
+        self.pending = {}           # ip -> deque of waiting packets
+        self.requested = {}         # ip -> time of the last request
+        self.dropped = 0            # packets pushed out of a full queue
+
+    def get(self, ip):
+        entry = self.entries.get(ip)
+        if entry is None:
+            return None
+        if self.clock() - entry[1] > self.timeout:
+            del self.entries[ip]
+            return None
+        return entry[0]
+
+    # Record ip's MAC; returns the packets that were waiting for it
+    def learn(self, ip, mac):
+        self.entries[ip] = (mac, self.clock())
+        self.requested.pop(ip, None)
+        return list(self.pending.pop(ip, ()))
+
+    def hold(self, ip, item):
+        """
+            Queue item until ip resolves. Returns True if a request for ip
+            should go out now: the first for it, or the last one timed out.
+        """
+        waiting = self.pending.get(ip)
+        if waiting is None:
+            waiting = self.pending[ip] = collections.deque(maxlen=self.queue)
+        if len(waiting) == self.queue:
+            self.dropped += 1
+        waiting.append(item)
+
+        now = self.clock()
+        last = self.requested.get(ip)
+        if last is not None and now - last < self.retry:
+            return False
+        self.requested[ip] = now
+        return True
+
+    # Forget expired answers and drop the packets of unresolved addresses
+    def sweep(self):
+        now = self.clock()
+        for ip in [ip for ip, (_, learned) in self.entries.items()
+                   if now - learned > self.timeout]:
+            del self.entries[ip]
+        for ip in [ip for ip, last in self.requested.items() if now - last >= self.wait]:
+            del self.requested[ip]
+            self.dropped += len(self.pending.pop(ip, ()))
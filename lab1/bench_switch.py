@@ -0,0 +1,356 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Offline bench for LearningSwitch: a chain of fake datapaths, each with a few
+# hosts, fed packet-ins wherever a frame misses the flow tables. Every host
+# pair exchanges one frame each way, then the same traffic runs again to show
+# what still reaches the controller once the MACs are learned. A silent host
+# then receives a burst of frames to show flood suppression. Last, the first
+# router of routers.json is checked on its own: ARP for its interfaces,
+# packets held until their next hop answers, the entries that installs, TTL
+# expiry and the limit on held packets.
+# Usage: python3 bench_switch.py [--switches N] [--hosts H] [--pairs P]
+#                                [--capacity MACS] [--burst N] [--router-config FILE]
+# Needs Ryu installed; no Mininet, OVS or root.
+
+import argparse
+import collections
+import inspect
+import os
+import random
+import struct
+import time
+
+from ryu.controller import ofp_event
+from ryu.lib.packet import packet, ethernet, ipv4, arp
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser, ofproto_parser
+
+from ans_controller import LearningSwitch, load_router_config
+from lpm import ip_to_int, int_to_ip
+
+OFP_HEADER = '!BBHI'
+ROUTER_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routers.json')
+
+
+class FakeDatapath:
+    """ Stands in for a Ryu Datapath: keeps FlowMods as a flow table and PacketOuts as sent """
+
+    def __init__(self, dpid, num_ports):
+        self.id = dpid
+        self.ofproto = ofproto_v1_3
+        self.ofproto_parser = ofproto_v1_3_parser
+        self.num_ports = num_ports
+        self.xid = 0
+        self.table = {}             # (priority, match key) -> (match, out ports)
+        self.packet_outs = []
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+        return self.xid
+
+    def send_msg(self, msg):
+        if msg.xid is None:
+            self.set_xid(msg)
+        if isinstance(msg, ofproto_v1_3_parser.OFPPacketOut):
+            self.packet_outs.append(msg)
+            return
+        msg.serialize()
+        buf = bytes(msg.buf)
+        version, msg_type, length, xid = struct.unpack_from(OFP_HEADER, buf)
+        if msg_type == ofproto_v1_3.OFPT_FLOW_MOD:
+            self.apply_flow_mod(ofproto_parser.msg(self, version, msg_type, length, xid, buf))
+
+    def apply_flow_mod(self, mod):
+        match = dict(mod.match.items())
+        if mod.command == self.ofproto.OFPFC_DELETE:
+            for key in [key for key, (entry, _) in self.table.items()
+                        if all(entry.get(f) == v for f, v in match.items())]:
+                del self.table[key]
+            return
+        ports = [action.port for inst in mod.instructions for action in inst.actions
+                 if isinstance(action, ofproto_v1_3_parser.OFPActionOutput)]
+        self.table[(mod.priority, tuple(sorted(match.items())))] = (match, ports)
+
+    # Out ports of the best matching entry
+    def lookup(self, fields):
+        best = None
+        for (priority, _), (match, ports) in self.table.items():
+            if (best is None or priority > best[0]) and \
+                    all(fields.get(f) == v for f, v in match.items()):
+                best = (priority, ports)
+        return best[1] if best else []
+
+
+# The app's event handlers by event class
+def app_handlers(app):
+    handlers = collections.defaultdict(list)
+    for _, method in inspect.getmembers(app, inspect.ismethod):
+        for ev_cls in getattr(method, 'callers', {}):
+            handlers[ev_cls].append(method)
+    return handlers
+
+
+def dispatch(handlers, ev):
+    for handler in handlers.get(type(ev), ()):
+        handler(ev)
+
+
+def connect(handlers, dp):
+    dispatch(handlers, ofp_event.EventOFPSwitchFeatures(
+        ofproto_v1_3_parser.OFPSwitchFeatures(dp, datapath_id=dp.id)))
+
+
+# Hand a frame to the app as a packet-in; returns the PacketOuts it sent
+def packet_in(handlers, dp, in_port, data):
+    msg = ofproto_v1_3_parser.OFPPacketIn(
+        dp, buffer_id=ofproto_v1_3.OFP_NO_BUFFER, total_len=len(data),
+        reason=ofproto_v1_3.OFPR_NO_MATCH, table_id=0,
+        match=ofproto_v1_3_parser.OFPMatch(in_port=in_port), data=data)
+    before = len(dp.packet_outs)
+    dispatch(handlers, ofp_event.EventOFPPacketIn(msg))
+    return dp.packet_outs[before:]
+
+
+def frame(*protocols):
+    pkt = packet.Packet()
+    for protocol in protocols:
+        pkt.add_protocol(protocol)
+    pkt.serialize()
+    return pkt.data
+
+
+class Chain:
+    """
+        Switches 1..n in a line, `hosts` hosts on each. On every switch ports
+        1..hosts lead to hosts, port hosts+1 to the previous switch and
+        hosts+2 to the next one.
+    """
+
+    def __init__(self, app, switches, hosts):
+        self.app = app
+        self.hosts = hosts
+        self.datapaths = {dpid: FakeDatapath(dpid, hosts + 2) for dpid in range(1, switches + 1)}
+        self.handlers = app_handlers(app)
+        self.packet_ins = 0
+
+        for dp in self.datapaths.values():
+            connect(self.handlers, dp)
+
+    def host(self, index):
+        dpid, port = index // self.hosts + 1, index % self.hosts + 1
+        return dpid, port, f'00:00:00:00:{dpid:02x}:{port:02x}', f'10.0.{dpid}.{port}'
+
+    # (dpid, in port) a frame sent out of port on dpid arrives at, None for host ports
+    def peer(self, dpid, port):
+        if port == self.hosts + 1 and dpid > 1:
+            return dpid - 1, self.hosts + 2
+        if port == self.hosts + 2 and dpid < len(self.datapaths):
+            return dpid + 1, self.hosts + 1
+        return None
+
+    def send(self, src, dst):
+        """ One frame from host src to host dst; returns the hosts it reached """
+        src_dpid, src_port, src_mac, src_ip = self.host(src)
+        _, _, dst_mac, dst_ip = self.host(dst)
+        data = frame(ethernet.ethernet(dst_mac, src_mac, 0x0800),
+                     ipv4.ipv4(src=src_ip, dst=dst_ip, proto=17))
+        fields = {'eth_src': src_mac, 'eth_dst': dst_mac}
+
+        reached = []
+        pending = [(src_dpid, src_port)]
+        while pending:
+            dpid, in_port = pending.pop()
+            dp = self.datapaths[dpid]
+            ports = dp.lookup(dict(fields, in_port=in_port))
+            if ports == [ofproto_v1_3.OFPP_CONTROLLER]:
+                ports = self.packet_in(dp, in_port, data)
+            for port in ports:
+                if port == ofproto_v1_3.OFPP_FLOOD:
+                    out = [p for p in range(1, dp.num_ports + 1) if p != in_port]
+                else:
+                    out = [port]
+                for p in out:
+                    peer = self.peer(dpid, p)
+                    if peer is not None:
+                        pending.append(peer)
+                    elif p <= self.hosts:
+                        reached.append((dpid - 1) * self.hosts + p - 1)
+        return reached
+
+    # Hand the frame to the app; returns the ports its PacketOuts sent it to
+    def packet_in(self, dp, in_port, data):
+        self.packet_ins += 1
+        return [action.port for out in packet_in(self.handlers, dp, in_port, data)
+                for action in out.actions]
+
+
+def out_ports(out):
+    return [action.port for action in out.actions
+            if isinstance(action, ofproto_v1_3_parser.OFPActionOutput)]
+
+
+def sent_arp(out):
+    return packet.Packet(out.data).get_protocol(arp.arp)
+
+
+def check_router(config):
+    """
+        Drive the routed path of the first router in config, a routers.json
+        file, through one packet-in at a time and assert what it does. Its
+        first three interfaces are used: hosts .2 on the first two subnets,
+        a gateway .123 on the third, which static routes added here point at.
+    """
+    routers, _ = load_router_config(config)
+    dpid, interfaces = sorted(routers.items())[0]
+    (p1, (ip1, _, mac1)), (p2, (ip2, _, _)), (p3, (ip3, _, _)) = sorted(interfaces.items())[:3]
+
+    def near(ip, host):
+        return int_to_ip(ip_to_int(ip) & ~0xff | host)
+    sender, target, gateway = near(ip1, 2), near(ip2, 2), near(ip3, 123)
+    static = [('172.16.0.0/12', gateway), ('172.16.5.0/24', target), ('8.0.0.0/8', gateway)]
+    app = type('LearningSwitch', (LearningSwitch,),
+               {'ROUTERS': routers, 'STATIC_ROUTES': {dpid: static}})()
+    handlers = app_handlers(app)
+    dp = FakeDatapath(dpid, max(interfaces))
+    connect(handlers, dp)
+    host_mac = '00:00:00:00:aa:01'
+
+    def ip_from_sender(dst, ttl=64):
+        return frame(ethernet.ethernet(mac1, host_mac, 0x0800),
+                     ipv4.ipv4(src=sender, dst=dst, ttl=ttl, proto=17))
+
+    def arp_reply(port, ip, mac):
+        own_ip, _, own_mac = interfaces[port]
+        return frame(ethernet.ethernet(own_mac, mac, 0x0806),
+                     arp.arp(opcode=arp.ARP_REPLY, src_mac=mac, src_ip=ip,
+                             dst_mac=own_mac, dst_ip=own_ip))
+
+    # The router answers for its own interface
+    outs = packet_in(handlers, dp, p1, frame(
+        ethernet.ethernet('ff:ff:ff:ff:ff:ff', host_mac, 0x0806),
+        arp.arp(opcode=arp.ARP_REQUEST, src_mac=host_mac, src_ip=sender, dst_ip=ip1)))
+    assert len(outs) == 1 and out_ports(outs[0]) == [p1]
+    assert sent_arp(outs[0]).opcode == arp.ARP_REPLY and sent_arp(outs[0]).src_mac == mac1
+
+    # Packets for an unresolved host wait behind a single ARP request
+    outs = [out for _ in range(3) for out in packet_in(handlers, dp, p1, ip_from_sender(target))]
+    assert len(outs) == 1 and out_ports(outs[0]) == [p2]
+    assert sent_arp(outs[0]).opcode == arp.ARP_REQUEST and sent_arp(outs[0]).dst_ip == target
+
+    # ... and leave, TTL decremented and MACs rewritten, with the reply
+    target_mac = '00:00:00:00:aa:02'
+    outs = packet_in(handlers, dp, p2, arp_reply(p2, target, target_mac))
+    assert len(outs) == 3 and all(out_ports(out) == [p2] for out in outs)
+    assert isinstance(outs[0].actions[0], ofproto_v1_3_parser.OFPActionDecNwTtl)
+    released = len(outs)
+
+    # Behind the gateway: a host entry inside the /12 that holds a longer
+    # route, one prefix entry for the /8
+    outs = packet_in(handlers, dp, p1, ip_from_sender('172.16.9.9'))
+    outs += packet_in(handlers, dp, p1, ip_from_sender('8.8.8.8'))
+    assert len(outs) == 1 and sent_arp(outs[0]).dst_ip == gateway
+    outs = packet_in(handlers, dp, p3, arp_reply(p3, gateway, '00:00:00:00:aa:03'))
+    assert len(outs) == 2 and all(out_ports(out) == [p3] for out in outs)
+    released += len(outs)
+
+    # Resolved next hops are used right away, expiring TTLs are not forwarded
+    assert len(packet_in(handlers, dp, p1, ip_from_sender(target))) == 1
+    assert not packet_in(handlers, dp, p1, ip_from_sender(target, ttl=1))
+    assert app.counters['ttl_expired'] == 1
+
+    # Only ARP_QUEUE packets wait for a host that never answers
+    silent = near(ip2, 99)
+    outs = [out for _ in range(app.ARP_QUEUE + 3)
+            for out in packet_in(handlers, dp, p1, ip_from_sender(silent))]
+    assert len(outs) == 1 and app.arp_caches[dpid].dropped == 3
+
+    routed = {key: ports for key, (_, ports) in dp.table.items() if key[0] >= app.ROUTE_PRIORITY}
+    lengths = sorted(priority - app.ROUTE_PRIORITY for priority, _ in routed)
+    assert lengths == [8, 32, 32] and all(ports == [p2] or ports == [p3]
+                                          for ports in routed.values())
+    return (f'router {dpid:#x}: ARP answered, {released} held packets released by ARP replies, '
+            f'entries /{" /".join(map(str, lengths))}, TTL 1 dropped, '
+            f'{app.arp_caches[dpid].dropped} dropped beyond a queue of {app.ARP_QUEUE}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--switches', type=int, default=4)
+    parser.add_argument('--hosts', type=int, default=8, help='hosts per switch')
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--capacity', type=int, default=LearningSwitch.MAC_TABLE_SIZE,
+                        help='MAC table size per switch')
+    parser.add_argument('--burst', type=int, default=50,
+                        help='frames sent to a host that never answers')
+    parser.add_argument('--router-config', default=ROUTER_CONFIG,
+                        help='routers.json-style file whose first router is checked')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    app_cls = type('LearningSwitch', (LearningSwitch,), {'MAC_TABLE_SIZE': args.capacity})
+    chain = Chain(app_cls(), args.switches, args.hosts)
+    app = chain.app
+    total = args.switches * args.hosts
+    rng = random.Random(args.seed)
+    pairs = [tuple(rng.sample(range(total), 2)) for _ in range(args.pairs)]
+
+    start = time.perf_counter()
+    wrong = 0
+    for a, b in pairs:
+        for src, dst in ((a, b), (b, a)):
+            wrong += dst not in chain.send(src, dst)
+    learn_ins = chain.packet_ins
+    learn_time = time.perf_counter() - start
+
+    chain.packet_ins = 0
+    for a, b in pairs:
+        for src, dst in ((a, b), (b, a)):
+            wrong += dst not in chain.send(src, dst)
+    steady_ins = chain.packet_ins
+
+    before = dict(app.counters)
+    silent = total      # an address no host answers for
+    chain.packet_ins = 0
+    for _ in range(args.burst):
+        chain.send(0, silent)
+    floods = app.counters['floods'] - before.get('floods', 0)
+    suppressed = app.counters['floods_suppressed'] - before.get('floods_suppressed', 0)
+
+    stats = app.stats()
+    entries = [len(dp.table) for dp in chain.datapaths.values()]
+    print(f'{args.switches} switches x {args.hosts} hosts, {len(pairs)} pairs, '
+          f'MAC table {args.capacity}/switch: {wrong} frames not delivered')
+    print(f'  learning: {learn_ins} packet-ins ({learn_ins / len(pairs):.2f} per host pair, '
+          f'{learn_time / max(learn_ins, 1) * 1e6:.0f} us each), '
+          f'{stats.get("flow_mods", 0)} FlowMods, {stats.get("floods", 0)} floods')
+    print(f'  steady state: {steady_ins} packet-ins for {2 * len(pairs)} frames')
+    print(f'  {args.burst} frames to a silent host: {chain.packet_ins} packet-ins, '
+          f'{floods} flooded, {suppressed} suppressed')
+    print(f'  entries max {max(entries)} total {sum(entries)}, evictions {stats["evictions"]}, '
+          f'moves {stats["moves"]}')
+    print(check_router(args.router_config))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+import collections
+import time
+
+# What learn() found
+NEW = 'new'
+MOVED = 'moved'
+REFRESHED = 'refreshed'
+
+
+class MacTable:
+    """
+        MAC -> port for one switch, holding at most `capacity` MACs. Learning
+        a MAC refreshes it; when the table is full the least recently seen
+        MAC is evicted. A MAC not seen for `aging` seconds is unknown to
+        lookup() and removed by the next expire(), which reports it so its
+        flow entries can go too. Entries are kept in the order they were last
+        seen, so both eviction and aging only ever look at the oldest end.
+    """
+
+    def __init__(self, capacity=1024, aging=300.0, clock=time.monotonic):
+        self.capacity = capacity
+        self.aging = aging
+        self.clock = clock
+        self.entries = collections.OrderedDict()   # mac -> (port, last seen), oldest first
+        self.learned = 0
+        self.moves = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def learn(self, mac, port):
+        """
+            Record mac as seen on port now. Returns (NEW, MOVED or REFRESHED,
+            the MAC evicted to make room or None).
+        """
+        entry = self.entries.get(mac)
+        self.entries[mac] = (port, self.clock())
+        if entry is not None:
+            self.entries.move_to_end(mac)
+            if entry[0] == port:
+                return REFRESHED, None
+            self.moves += 1
+            return MOVED, None
+
+        self.learned += 1
+        if len(self.entries) <= self.capacity:
+            return NEW, None
+        evicted, _ = self.entries.popitem(last=False)
+        self.evictions += 1
+        return NEW, evicted
+
+    # Port mac was last seen on, None if unknown or aged out
+    def lookup(self, mac):
+        entry = self.entries.get(mac)
+        if entry is None or self.clock() - entry[1] > self.aging:
+            return None
+        return entry[0]
+
+    # Forget every MAC older than the aging time; returns them
+    def expire(self):
+        expired = []
+        limit = self.clock() - self.aging
+        while self.entries:
+            mac, (_, seen) = next(iter(self.entries.items()))
+            if seen >= limit:
+                break
+            del self.entries[mac]
+            expired.append(mac)
+        self.expirations += len(expired)
+        return expired
@@ -0,0 +1,232 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Closed-form addressing for a k-ary fat-tree, for any even k up to MAX_K:
+#
+#   dpids  role << 16 | a << 8 | b  with role 1 edge (pod, i), 2 agg (pod, i),
+#          3 core (row, col); hex 0x010300 is edge switch 0 of pod 3
+#   ports  edge: host id h -> h-1,  agg i -> k/2+1+i
+#          agg:  edge e -> e+1,     core col j -> k/2+1+j  (agg i links core row i)
+#          core: pod p -> p+1
+#   hosts  10.pod.edge.id with id in [2, k/2+1], MAC = 1-based index in
+#          (pod, edge, id) order, as Mininet's autoSetMacs assigns it
+#
+# Node ids are topo.Fattree's: h{pod}_{edge}_{id}, e{pod}_{i}, a{pod}_{i},
+# c{col}_{row}.
+# Usage: python3 addressing.py [k]   checks every mapping round-trips
+
+import sys
+
+MAX_K = 256             # pods and host ids must fit one IPv4 octet
+
+ROLES = {1: 'edge', 2: 'agg', 3: 'core'}
+ROLE_CODES = {role: code for code, role in ROLES.items()}
+
+
+def check_k(k):
+    if k % 2 or not 2 <= k <= MAX_K:
+        raise ValueError(f'k must be even and in [2, {MAX_K}], got {k}')
+
+
+# Switches
+
+def dpid(role, a, b):
+    return ROLE_CODES[role] << 16 | a << 8 | b
+
+
+def edge_dpid(pod, i):
+    return dpid('edge', pod, i)
+
+
+def agg_dpid(pod, i):
+    return dpid('agg', pod, i)
+
+
+def core_dpid(row, col):
+    return dpid('core', row, col)
+
+
+# Every switch of the k-ary fat-tree: edge, then aggregation, then core
+def switch_dpids(k):
+    half = k // 2
+    return ([edge_dpid(p, i) for p in range(k) for i in range(half)]
+            + [agg_dpid(p, i) for p in range(k) for i in range(half)]
+            + [core_dpid(r, c) for r in range(half) for c in range(half)])
+
+
+# dpid -> (role, pod or row, index or col)
+def decode_dpid(value):
+    role = ROLES.get(value >> 16)
+    if role is None or value >> 24:
+        raise ValueError(f'not a fat-tree dpid: {value:#x}')
+    return role, (value >> 8) & 0xff, value & 0xff
+
+
+# topo.Fattree node id -> ('host', pod, edge, id) or (role, pod or row, index or col)
+def parse_node_id(node_id):
+    kind = {'h': 'host', 'e': 'edge', 'a': 'agg', 'c': 'core'}.get(node_id[:1])
+    if kind is None:
+        raise ValueError(f'not a fat-tree node id: {node_id}')
+    parts = tuple(int(part) for part in node_id[1:].split('_'))
+    if kind == 'core':
+        parts = parts[::-1]
+    return (kind,) + parts
+
+
+def node_dpid(node_id):
+    role, a, b = parse_node_id(node_id)
+    return dpid(role, a, b)
+
+
+# Hosts
+
+def host_ids(k):
+    return range(2, k // 2 + 2)
+
+
+def host_ip(pod, edge, host_id):
+    return f'10.{pod}.{edge}.{host_id}'
+
+
+# Every host address, in (pod, edge, id) order
+def host_ips(k):
+    return [host_ip(p, e, h) for p in range(k) for e in range(k // 2) for h in host_ids(k)]
+
+
+# '10.pod.edge.id' -> (pod, edge, id)
+def parse_ip(ip):
+    octets = ip.split('.')
+    if len(octets) != 4 or octets[0] != '10':
+        raise ValueError(f'not a fat-tree host address: {ip}')
+    return int(octets[1]), int(octets[2]), int(octets[3])
+
+
+def host_index(k, pod, edge, host_id):
+    half = k // 2
+    return (pod * half + edge) * half + host_id - 2
+
+
+def host_mac(k, pod, edge, host_id):
+    index = host_index(k, pod, edge, host_id) + 1
+    return ':'.join(f'{(index >> shift) & 0xff:02x}' for shift in range(40, -8, -8))
+
+
+# Edge switch dpid and port a host address sits behind
+def host_location(ip):
+    pod, edge, host_id = parse_ip(ip)
+    return edge_dpid(pod, edge), host_id - 1
+
+
+# Ports and adjacency
+
+def port_towards(k, node_id, peer_id):
+    """ Port on node_id facing peer_id, for the ids generated by topo.Fattree """
+    half = k // 2
+    node, peer = parse_node_id(node_id), parse_node_id(peer_id)
+    kinds = (node[0], peer[0])
+
+    if kinds[0] == 'host':
+        return 0
+    if kinds == ('edge', 'host'):
+        return peer[3] - 1
+    if kinds == ('edge', 'agg'):
+        return half + 1 + peer[2]
+    if kinds == ('agg', 'edge'):
+        return peer[2] + 1
+    if kinds == ('agg', 'core'):
+        return half + 1 + peer[2]
+    if kinds == ('core', 'agg'):
+        return peer[1] + 1
+    raise ValueError(f'no link between {node_id} and {peer_id}')
+
+
+def is_host_port(k, value, port):
+    """ True if port on switch value leads to a host """
+    return decode_dpid(value)[0] == 'edge' and 1 <= port <= k // 2
+
+
+def neighbor(k, value, port):
+    """ dpid behind port of switch value, None for host ports and unused ports """
+    half = k // 2
+    role, a, b = decode_dpid(value)
+    if not 1 <= port <= k:
+        return None
+    if role == 'edge':
+        return agg_dpid(a, port - half - 1) if port > half else None
+    if role == 'agg':
+        return core_dpid(b, port - half - 1) if port > half else edge_dpid(a, port - 1)
+    return agg_dpid(port - 1, a)
+
+
+def uplinks(k):
+    return range(k // 2 + 1, k + 1)
+
+
+def next_hops(k, value, dst_ip):
+    """ Equal-cost out ports on switch value towards host dst_ip, shortest paths only """
+    pod, edge, host_id = parse_ip(dst_ip)
+    role, a, b = decode_dpid(value)
+    if role == 'core':
+        return [pod + 1]
+    if a != pod:
+        return list(uplinks(k))
+    if role == 'agg':
+        return [edge + 1]
+    return [host_id - 1] if b == edge else list(uplinks(k))
+
+
+if __name__ == '__main__':
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    check_k(k)
+    half = k // 2
+
+    switches = switch_dpids(k)
+    assert len(set(switches)) == len(switches)
+    for value in switches:
+        assert dpid(*decode_dpid(value)) == value
+        for port in range(1, k + 1):
+            peer = neighbor(k, value, port)
+            assert (peer is None) == is_host_port(k, value, port)
+            if peer is not None:
+                assert value in [neighbor(k, peer, p) for p in range(1, k + 1)]
+
+    ips = host_ips(k)
+    assert len(set(ips)) == len(ips)
+    assert [host_index(k, *parse_ip(ip)) for ip in ips] == list(range(len(ips)))
+
+    # Following any next hop reaches the destination's edge switch and port
+    for ip in ips[::max(1, len(ips) // 16)]:
+        dst_dpid, dst_port = host_location(ip)
+        for value in switches:
+            hops = 0
+            while True:
+                ports = next_hops(k, value, ip)
+                port = ports[value % len(ports)]
+                peer = neighbor(k, value, port)
+                if peer is None:
+                    break
+                value = peer
+                hops += 1
+            assert (value, port) == (dst_dpid, dst_port) and hops <= 4
+
+    print(f'k={k}: {len(switches)} dpids, {len(ips)} hosts, all mappings consistent')
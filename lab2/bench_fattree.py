@@ -0,0 +1,80 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Construction time and memory of topo.Fattree (Node/Edge objects) against
+# topo.CompactFattree (integer ids, CSR adjacency), plus neighbor-test cost.
+# Usage: python3 bench_fattree.py [--pairs N] [k ...]   (default: 4 8 16 24 32 48)
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+import topo
+
+
+def build(cls, k):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    ft = cls(k)
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return ft, elapsed, retained
+
+
+def neighbor_tests(nodes, is_neighbor, pairs, seed):
+    rng = random.Random(seed)
+    sample = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(pairs)]
+    start = time.perf_counter()
+    for a, b in sample:
+        is_neighbor(a, b)
+    return (time.perf_counter() - start) / pairs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('ks', type=int, nargs='*', default=[4, 8, 16, 24, 32, 48])
+    parser.add_argument('--pairs', type=int, default=20000, help='random neighbor tests')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for k in args.ks:
+        ft, ft_time, ft_mem = build(topo.Fattree, k)
+        ft_test = neighbor_tests(list(ft.nodes), lambda a, b: a.is_neighbor(b), args.pairs, args.seed)
+        num_nodes = len(ft.nodes)
+        del ft
+
+        compact, c_time, c_mem = build(topo.CompactFattree, k)
+        c_test = neighbor_tests(range(compact.num_nodes), compact.is_neighbor, args.pairs, args.seed)
+
+        print(f'k={k:<3} nodes={num_nodes:<6} links={len(compact.adjacency) // 2:<6} '
+              f'build {ft_time * 1e3:9.1f} ms -> {c_time * 1e3:8.1f} ms   '
+              f'memory {ft_mem / 2**20:8.2f} MiB -> {c_mem / 2**20:6.2f} MiB   '
+              f'is_neighbor {ft_test * 1e6:7.2f} us -> {c_test * 1e6:5.2f} us')
+
+
+if __name__ == '__main__':
+    main()
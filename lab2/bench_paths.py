@@ -0,0 +1,72 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Packet-in path lookup cost: per-packet Dijkstra vs. the precomputed path table.
+# Usage: python3 bench_paths.py [k ...]   (default: 4 8 16)
+
+import random
+import sys
+import time
+
+import topo
+from path_table import PathTable, shortest_path
+
+
+def build_graph(k):
+    ft = topo.Fattree(k)
+    return ft.switch_graph()
+
+
+def time_lookups(lookup, pairs):
+    start = time.perf_counter()
+    for src, dst in pairs:
+        lookup(src, dst)
+    return (time.perf_counter() - start) / len(pairs)
+
+
+def run(k, num_packets=2000, seed=1):
+    graph = build_graph(k)
+    edges = [node for node in graph if node.startswith('e')]
+    rng = random.Random(seed)
+    pairs = [tuple(rng.sample(edges, 2)) for _ in range(num_packets)]
+
+    table = PathTable()
+    start = time.perf_counter()
+    table.rebuild(graph)
+    build = time.perf_counter() - start
+
+    before = time_lookups(lambda s, d: shortest_path(graph, s, d), pairs)
+    after = time_lookups(table.get_path, pairs)
+
+    for src, dst in pairs[:50]:
+        assert len(table.get_path(src, dst)) == len(shortest_path(graph, src, dst))
+
+    print(f'k={k:<3} switches={len(graph):<5} table build={build * 1e3:9.2f} ms  '
+          f'dijkstra={before * 1e6:9.2f} us/pkt  table={after * 1e6:6.3f} us/pkt  '
+          f'speedup={before / after:8.0f}x')
+
+
+if __name__ == '__main__':
+    ks = [int(arg) for arg in sys.argv[1:]] or [4, 8, 16]
+    for k in ks:
+        run(k)
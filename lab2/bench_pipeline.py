@@ -0,0 +1,137 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Load generator for SPRouter's packet-in pipeline: connects the real app to
+# fake datapaths for the k-ary fat-tree (see testbench.py) and feeds it TCP
+# packet-ins from random host pairs. IPv4 packet-ins go through the app's own
+# PacketPipeline of hub green threads into SPRouter.route_packet, with the
+# barriers answered as they come. After each packet-in, or burst of them, the
+# bench yields to the hub, as Ryu's event loop does while it waits for the next
+# message.
+#   handler - time spent in the packet-in handler per event
+#   stall   - time the workers then hold the hub before the loop runs again
+#   routed  - route_packet calls per second, handling and draining included
+# route_packet is CPU-bound and sends without yielding, so the green workers
+# never overlap; the pool moves work out of the handler into the stall but
+# does not add throughput.
+# With --burst each flow arrives as several back-to-back packet-ins, which the
+# app's InflightTable routes once.
+# Usage: python3 bench_pipeline.py [-k K] [--events N] [--workers W ...]
+#                                  [--depth D] [--burst B]
+
+import argparse
+import random
+import time
+
+from ryu.controller import ofp_event
+from ryu.lib import hub
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser
+
+import addressing
+from sp_routing import SPRouter
+from testbench import Bench, tcp_packet
+
+
+def synthetic_events(k, count, seed, burst=1):
+    rng = random.Random(seed)
+    ips = list(addressing.host_ips(k))
+    events = []
+    while len(events) < count:
+        src, dst = rng.sample(ips, 2)
+        ports = (rng.randrange(1024, 65536), rng.randrange(1, 1024))
+        events += [(src, dst, ports)] * burst
+    return events[:count]
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def packet_in_event(bench, src_ip, dst_ip, ports):
+    dpid, in_port = addressing.host_location(src_ip)
+    dp = bench.datapaths[dpid]
+    data = tcp_packet(bench.k, src_ip, dst_ip, ports)
+    msg = ofproto_v1_3_parser.OFPPacketIn(
+        dp, buffer_id=ofproto_v1_3.OFP_NO_BUFFER, total_len=len(data),
+        reason=ofproto_v1_3.OFPR_NO_MATCH, table_id=0,
+        match=ofproto_v1_3_parser.OFPMatch(in_port=in_port), data=data)
+    return ofp_event.EventOFPPacketIn(msg)
+
+
+def run(k, events, workers, depth):
+    bench = Bench(SPRouter, k, PACKET_IN_WORKERS=workers, PACKET_IN_QUEUE=depth,
+                  TRAFFIC_AWARE=False)
+    bench.connect()
+    app = bench.app
+    pipeline = app.packet_pipeline
+    packet_ins = [packet_in_event(bench, *e) for e in events]
+    handler = []
+    stall = []
+
+    start = time.perf_counter()
+    for i, ev in enumerate(packet_ins):
+        t = time.perf_counter()
+        bench.dispatch(ev)
+        handler.append(time.perf_counter() - t)
+        if events[i + 1:i + 2] == events[i:i + 1]:
+            continue    # the rest of the burst arrives back to back
+        t = time.perf_counter()
+        hub.sleep(0)
+        stall.append(time.perf_counter() - t)
+        bench.settle()
+    while pipeline.completed + pipeline.dropped < pipeline.submitted:
+        hub.sleep(0)
+        bench.settle()
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    hub.sleep(0)
+
+    stats = app.packet_in_stats()
+    print(f'workers={workers:<3} handler p50 {percentile(handler, 50) * 1e6:7.1f} us '
+          f'p99 {percentile(handler, 99) * 1e6:7.1f} us  '
+          f'stall p50 {percentile(stall, 50) * 1e6:7.1f} us p99 {percentile(stall, 99) * 1e6:7.1f} us  '
+          f'routed {stats["completed"] / elapsed:6.0f}/s  '
+          f'dropped {stats["dropped"]:4}  max depth {stats["max_depth"]:3}  '
+          f'duplicates {stats["duplicates"]:5}  errors {stats["errors"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', type=int, default=8)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='*', default=[0, 1, 4, 16])
+    parser.add_argument('--depth', type=int, default=256, help='queue slots per worker')
+    parser.add_argument('--burst', type=int, default=1, help='packet-ins per flow')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    events = synthetic_events(args.k, args.events, args.seed, args.burst)
+    print(f'k={args.k} hosts={len(addressing.host_ips(args.k))} events={len(events)} '
+          f'burst={args.burst}')
+    for workers in args.workers:
+        run(args.k, events, workers, args.depth)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Replays a fat-tree coming up switch by switch and times topology maintenance:
+#   full     - clear and reload every known link on each join (the old handler)
+#   incr     - apply every link event incrementally, no debouncing; slower
+#              than full reloads from k=8 on, as each event recomputes the
+#              trees of many sources
+#   delta    - the same, but past max_deltas unread changes fall back to one
+#              rebuild on the next lookup
+#   debounce - apply deltas, rebuild the path table once after the burst
+# Usage: python3 bench_topology.py [--full-max-k K] [k ...]   (default: 4 8 ... 24)
+
+import argparse
+import random
+import time
+
+import topo
+from topo_store import TopologyStore
+
+
+class FakeClock:
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        return self.now
+
+    def tick(self):
+        self.now += self.step
+
+
+def join_sequence(k, seed):
+    """
+        Switch join order and, per join, the link events Ryu would report:
+        one per direction for each link to an already joined switch.
+    """
+    ft = topo.Fattree(k)
+    graph = ft.switch_graph()
+    order = list(graph)
+    random.Random(seed).shuffle(order)
+
+    joined = set()
+    sequence = []
+    for node in order:
+        joined.add(node)
+        events = []
+        for neighbor, _, port in graph[node]:
+            if neighbor in joined:
+                peer_port = next(p for n, _, p in graph[neighbor] if n == node)
+                events.append((node, port, neighbor, peer_port))
+                events.append((neighbor, peer_port, node, port))
+        sequence.append((node, events))
+    return sequence
+
+
+def replay_full(sequence):
+    store = TopologyStore(window=0)
+    links = []
+    for _, events in sequence:
+        links.extend(events)
+        store.load(links)
+    return store
+
+
+def replay_delta(sequence, window, gap, **options):
+    clock = FakeClock(gap)
+    store = TopologyStore(window=window, clock=clock, **options)
+    for node, events in sequence:
+        clock.tick()
+        store.add_switch(node)
+        for src, src_port, dst, dst_port in events:
+            clock.tick()
+            store.add_link(src, src_port, dst, dst_port)
+    clock.now += window
+    store.flush(force=False)
+    return store
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    store = fn(*args, **kwargs)
+    return time.perf_counter() - start, store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('ks', type=int, nargs='*', default=[4, 8, 12, 16, 20, 24])
+    parser.add_argument('--full-max-k', type=int, default=8,
+                        help='largest k to replay with full reloads (quadratic)')
+    parser.add_argument('--window', type=float, default=0.5,
+                        help='debounce window in seconds')
+    parser.add_argument('--gap', type=float, default=0.001,
+                        help='simulated time between events in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for k in args.ks:
+        sequence = join_sequence(k, args.seed)
+        num_events = sum(len(events) for _, events in sequence)
+        row = f'k={k:<3} switches={len(sequence):<5} link events={num_events:<6}'
+
+        reference = None
+        if k <= args.full_max_k:
+            elapsed, reference = timed(replay_full, sequence)
+            row += f'  full={elapsed:8.3f} s'
+        else:
+            row += '  full=       - '
+
+        if k <= args.full_max_k:
+            elapsed, store = timed(replay_delta, sequence, 0, args.gap, max_deltas=None)
+            row += f'  incr={elapsed:8.3f} s'
+        else:
+            row += '  incr=       - '
+
+        elapsed, store = timed(replay_delta, sequence, 0, args.gap)
+        row += f'  delta={elapsed:8.3f} s'
+
+        elapsed, store = timed(replay_delta, sequence, args.window, args.gap)
+        row += f'  debounce={elapsed:8.3f} s ({store.rebuilds} rebuild)'
+        print(row)
+
+        if reference is not None:
+            for src in list(store.graph)[:10]:
+                for dst in store.graph:
+                    assert len(store.get_path(src, dst)) == len(reference.get_path(src, dst))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Offline harness for traffic-aware routing: large flows between random host
+# pairs start on hash-chosen ECMP paths, as SPRouter places them, and share
+# link capacity max-min fairly. Each poll round the simulated switches answer
+# with fake port and flow counters, split into multipart replies, the
+# TrafficMonitor turns them into link utilization and flow rates, and
+# schedule() moves flows; the new paths apply from the next round on.
+# Usage: python3 bench_traffic.py [-k K] [--flows N] [--demand SHARE] [--rounds R]
+
+import argparse
+import random
+
+import addressing
+from path_table import IPPROTO_TCP, five_tuple, fields_hash
+from topo_store import fattree_store
+from traffic_monitor import TrafficMonitor, schedule
+
+CAPACITY = 15e6         # bits/s, links shaped by fat-tree.py --shape
+PART = 4                # stats per multipart reply part
+
+
+def max_min_rates(paths, demand, capacity):
+    """ Progressive filling: flow -> rate, no link above capacity, no flow above demand """
+    rates = {flow: 0.0 for flow in paths}
+    links = {}
+    for flow, path in paths.items():
+        for link in zip(path, path[1:]):
+            links.setdefault(link, set()).add(flow)
+    spare = {link: capacity for link in links}
+    active = set(paths)
+    while active:
+        step = min([demand[flow] - rates[flow] for flow in active]
+                   + [spare[link] / len(flows & active) for link, flows in links.items()
+                      if flows & active])
+        for flow in active:
+            rates[flow] += step
+        for link, flows in links.items():
+            spare[link] -= step * len(flows & active)
+        active = {flow for flow in active if rates[flow] < demand[flow] - 1e-6
+                  and all(spare[link] > 1e-6 for link in zip(paths[flow], paths[flow][1:]))}
+    return rates
+
+
+def parts(stats):
+    chunks = [stats[i:i + PART] for i in range(0, len(stats), PART)] or [[]]
+    return [(chunk, i < len(chunks) - 1) for i, chunk in enumerate(chunks)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', type=int, default=4)
+    parser.add_argument('--flows', type=int, default=16)
+    parser.add_argument('--demand', type=float, default=0.6,
+                        help='demand of every flow as a share of link capacity')
+    parser.add_argument('--rounds', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    k = args.k
+    store = fattree_store(k)
+    rng = random.Random(args.seed)
+    hosts = addressing.host_ips(k)
+
+    paths, demand = {}, {}
+    for _ in range(args.flows):
+        src, dst = rng.sample(hosts, 2)
+        match = five_tuple(src, dst, IPPROTO_TCP, rng.randrange(1024, 65536),
+                           rng.randrange(1, 1024))
+        fields = tuple(sorted(dict(match, eth_type=0x0800).items()))
+        src_sw, dst_sw = addressing.host_location(src)[0], addressing.host_location(dst)[0]
+        paths[fields] = store.get_ecmp_path(src_sw, dst_sw, fields_hash(match))
+        demand[fields] = args.demand * CAPACITY
+
+    now = [0.0]
+    monitor = TrafficMonitor(CAPACITY, clock=lambda: now[0])
+    tx = {}                 # (dpid, port) -> bytes
+    sent = dict.fromkeys(paths, 0.0)
+    switches = sorted(store.switches())
+    edges = [dpid for dpid in switches if addressing.decode_dpid(dpid)[0] == 'edge']
+    total_demand = sum(demand.values())
+
+    print(f'k={k} flows={len(paths)} demand {args.demand:.0%} of {CAPACITY / 1e6:.0f} Mbit/s each')
+    for round_no in range(args.rounds + 1):
+        rates = max_min_rates(paths, demand, CAPACITY)
+        interval = monitor.interval
+        now[0] += interval
+        for flow, path in paths.items():
+            sent[flow] += rates[flow] * interval / 8
+            for u, v in zip(path, path[1:]):
+                key = (u, store.get_port(u, v))
+                tx[key] = tx.get(key, 0.0) + rates[flow] * interval / 8
+
+        # Fake stats round: what the switches would answer, reply by reply
+        port_dpids, flow_dpids = monitor.start_round(switches, edges)
+        for dpid in port_dpids:
+            stats = [(port, int(tx.get((dpid, port), 0))) for port in range(1, k + 1)]
+            for chunk, more in parts(stats):
+                monitor.port_stats(dpid, chunk, more)
+        for dpid in flow_dpids:
+            stats = [(dict(flow), int(sent[flow]), now[0]) for flow in paths
+                     if addressing.host_location(dict(flow)['ipv4_src'])[0] == dpid]
+            for chunk, more in parts(stats):
+                monitor.flow_stats(dpid, chunk, more)
+
+        load = {(u, v): monitor.utilization(u, store.get_port(u, v)) * CAPACITY
+                for u in switches for v in store.neighbor_ports[u]}
+        peak = max(load.values()) / CAPACITY
+        saturated = sum(1 for bps in load.values() if bps >= 0.99 * CAPACITY)
+        print(f'round {round_no}: interval {interval:.2f} s, throughput '
+              f'{sum(rates.values()) / total_demand:6.1%} of demand, peak link {peak:6.1%}, '
+              f'{saturated} saturated links, {len(monitor.elephants())} large flows', end='')
+        if round_no == args.rounds:
+            print()
+            break
+
+        flows = [(tuple(sorted(flow.fields.items())), flow.bps,
+                  addressing.host_location(flow.fields['ipv4_src'])[0],
+                  addressing.host_location(flow.fields['ipv4_dst'])[0])
+                 for flow in monitor.elephants()]
+        moves = schedule(store, load, flows, paths.get)
+        for flow, path in moves:
+            paths[flow] = path
+        print(f', moved {len(moves)}')
+
+    print(f'poll requests {monitor.requests}, reply parts {monitor.replies} '
+          f'over {monitor.rounds} rounds')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Offline link-load simulation for random permutation traffic on the fat-tree:
+# every host sends one flow to a distinct host, routed either on the single
+# shortest path or on an equal-cost path chosen by hashing the flow's 5-tuple.
+# Usage: python3 ecmp_sim.py [-k K] [--flows-per-host N] [--trials T]
+
+import argparse
+import collections
+import random
+
+import addressing
+from path_table import IPPROTO_TCP, five_tuple, fields_hash
+from topo_store import fattree_store
+
+
+def is_core(dpid):
+    return addressing.decode_dpid(dpid)[0] == 'core'
+
+
+def permutation(hosts, rng):
+    # Random derangement: nobody sends to itself
+    while True:
+        dsts = hosts[:]
+        rng.shuffle(dsts)
+        if all(src != dst for src, dst in zip(hosts, dsts)):
+            return list(zip(hosts, dsts))
+
+
+def route_flows(table, flows, ecmp):
+    load = collections.Counter()     # directed link (u, v) -> number of flows
+    for src, dst, ports in flows:
+        src_sw, dst_sw = addressing.host_location(src)[0], addressing.host_location(dst)[0]
+        if ecmp:
+            # What SPRouter hashes for a TCP flow's first packet
+            flow = fields_hash(five_tuple(src, dst, IPPROTO_TCP, *ports))
+            path = table.get_ecmp_path(src_sw, dst_sw, flow)
+        else:
+            path = table.get_path(src_sw, dst_sw)
+        for u, v in zip(path, path[1:]):
+            load[(u, v)] += 1
+    return load
+
+
+def summarize(name, load, graph):
+    core_links = [(u, v) for u in graph for v, _, _ in graph[u]
+                  if is_core(u) or is_core(v)]
+    core_loads = [load.get(link, 0) for link in core_links]
+    core_switches = collections.Counter()
+    for (u, v), flows in load.items():
+        if is_core(v):
+            core_switches[v] += flows
+
+    used = sum(1 for flows in core_loads if flows)
+    cores = sorted(node for node in graph if is_core(node))
+    print(f'{name:7} core links used {used:5}/{len(core_links):<5} '
+          f'max link load {max(load.values()):4}  '
+          f'max core-link load {max(core_loads):4}  '
+          f'cores used {sum(1 for c in cores if core_switches[c])}/{len(cores)}')
+    print('        flows per core: ' + ' '.join(str(core_switches[c]) for c in cores))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', type=int, default=4)
+    parser.add_argument('--flows-per-host', type=int, default=1)
+    parser.add_argument('--trials', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    table = fattree_store(args.k)
+    graph = table.graph
+    hosts = addressing.host_ips(args.k)
+    rng = random.Random(args.seed)
+
+    for trial in range(args.trials):
+        flows = []
+        for _ in range(args.flows_per_host):
+            for src, dst in permutation(hosts, rng):
+                flows.append((src, dst, (rng.randrange(1024, 65536), rng.randrange(1, 1024))))
+
+        print(f'--- k={args.k} trial {trial}: {len(flows)} flows')
+        summarize('single', route_flows(table, flows, ecmp=False), graph)
+        summarize('ecmp', route_flows(table, flows, ecmp=True), graph)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Backup next hops for destination entries. A backup is a loop-free alternate:
+# a neighbor whose own shortest path to the destination does not come back
+# through the switch, so the switch can hand traffic to it the moment the
+# primary port goes down. Primary and backup go into an OpenFlow fast-failover
+# group, and the switch picks the first bucket whose port is live.
+# Usage: python3 failover.py [k ...]   backup coverage per switch role
+
+import collections
+import sys
+
+import addressing
+from path_table import INFINITY
+from topo_store import fattree_store
+
+# One forwarding decision in the table mirror: out_port, the backup port
+# behind it (None without a fast-failover group), and what to reinstall with
+Forward = collections.namedtuple('Forward', ['out_port', 'backup', 'priority', 'idle_timeout'])
+
+
+def destination_switches(k, value):
+    """
+        Edge switches an ipv4_dst match value covers: the host's edge switch
+        for an address or 10.pod.edge.0/24, every edge switch of the pod for
+        10.pod.0.0/16.
+    """
+    ip, mask = value if isinstance(value, tuple) else (value, None)
+    pod, edge, _ = addressing.parse_ip(ip)
+    if mask == '255.255.0.0':
+        return [addressing.edge_dpid(pod, i) for i in range(k // 2)]
+    return [addressing.edge_dpid(pod, edge)]
+
+
+def shortest_hops(topology, node, dsts):
+    """ Neighbors of node on a shortest path to every switch in dsts """
+    hops = []
+    for neighbor, weight, _ in topology.graph.get(node, ()):
+        for dst in dsts:
+            cost = topology.get_cost(node, dst)
+            if cost == INFINITY or topology.get_cost(neighbor, dst) + weight != cost:
+                break
+        else:
+            hops.append(neighbor)
+    return sorted(hops)
+
+
+def loop_free_alternate(topology, node, primary, dsts):
+    """
+        Neighbor of node other than primary that reaches every switch in dsts
+        without passing node again: cost(n, d) < cost(n, node) + cost(node, d).
+        Equal-cost neighbors come first, starting after primary so backups
+        spread over them; None if no neighbor qualifies.
+    """
+    equal = shortest_hops(topology, node, dsts)
+    if primary in equal:
+        start = equal.index(primary) + 1
+        equal = equal[start:] + equal[:start - 1]
+    if equal:
+        return equal[0]
+
+    for neighbor, weight, _ in sorted(topology.graph.get(node, ())):
+        if neighbor == primary:
+            continue
+        if all(topology.get_cost(neighbor, dst) < weight + topology.get_cost(node, dst)
+               for dst in dsts):
+            return neighbor
+    return None
+
+
+class FailoverGroups:
+    """
+        OFPGT_FF groups installed per switch. There is one group per
+        (primary, backup) port pair, shared by every entry that uses the pair,
+        so a switch holds at most k * (k - 1) of them.
+    """
+
+    def __init__(self):
+        self.installed = {}     # dpid -> set of group ids
+
+    @staticmethod
+    def group_id(primary, backup):
+        return primary << 16 | backup
+
+    # Group id for the pair, and True if the switch does not have it yet
+    def add(self, dpid, primary, backup):
+        group_id = self.group_id(primary, backup)
+        groups = self.installed.setdefault(dpid, set())
+        if group_id in groups:
+            return group_id, False
+        groups.add(group_id)
+        return group_id, True
+
+    def clear(self, dpid):
+        self.installed.pop(dpid, None)
+
+
+def coverage_report(k):
+    """ Share of (switch, destination edge, primary next hop) with a backup, per role and direction """
+    store = fattree_store(k)
+    tier = {'edge': 0, 'agg': 1, 'core': 2}
+    edges = [dpid for dpid in store.switches() if addressing.decode_dpid(dpid)[0] == 'edge']
+    covered = collections.Counter()
+    total = collections.Counter()
+    for node in store.switches():
+        role = addressing.decode_dpid(node)[0]
+        for dst in edges:
+            if dst == node:
+                continue
+            for primary in store.next_hops(node, dst):
+                up = tier[addressing.decode_dpid(primary)[0]] > tier[role]
+                key = (role, 'up' if up else 'down')
+                total[key] += 1
+                covered[key] += loop_free_alternate(store, node, primary, [dst]) is not None
+    summary = '  '.join(f'{role} {direction} {100 * covered[role, direction] / n:5.1f}%'
+                        for (role, direction), n in sorted(total.items()))
+    print(f'k={k:<3} {summary}')
+
+
+if __name__ == '__main__':
+    for k in [int(arg) for arg in sys.argv[1:]] or [4, 8]:
+        coverage_report(k)
@@ -0,0 +1,183 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Packet-in classification by fixed offsets into the frame, without building
+# Ryu's packet object graph. Only the fields the routers read are extracted;
+# anything unusual (IP options past the buffer, odd ARP sizes, truncated
+# frames) goes through ryu.lib.packet as before. The fabric carries no VLANs:
+# tagged frames are classified as other traffic and dropped, as parse() does.
+# Usage: python3 fastpath.py [N]   parse cost per frame, both paths, N frames
+
+import collections
+import socket
+import struct
+import sys
+import time
+
+from ryu.lib.packet import packet, ethernet, ether_types
+from ryu.lib.packet import arp, ipv4, tcp, udp
+
+ETH_HEADER = 14
+ARP_SIZE = 28                           # Ethernet/IPv4 ARP
+IPV4_HEADER = 20
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+ArpFrame = collections.namedtuple('ArpFrame',
+                                  ['eth_src', 'opcode', 'src_mac', 'src_ip', 'dst_ip'])
+# src_port and dst_port are None unless the first fragment of TCP or UDP
+Ipv4Frame = collections.namedtuple('Ipv4Frame',
+                                   ['eth_src', 'src', 'dst', 'proto', 'src_port', 'dst_port'])
+
+_ETHERTYPE = struct.Struct('!H')
+_ARP = struct.Struct('!HHBBH')          # htype, ptype, hlen, plen, opcode
+_IPV4 = struct.Struct('!B5xHxB')        # version/ihl, flags/fragment offset, proto
+_PORTS = struct.Struct('!HH')
+
+
+def _mac(view):
+    return bytes(view).hex(':')
+
+
+class Classifier:
+    """
+        Frame bytes -> ArpFrame, Ipv4Frame or None for other ethertypes,
+        802.1Q/802.1ad tagged frames included.
+        Counts how many frames took the fixed-offset path and how many
+        needed the full parser.
+    """
+
+    def __init__(self):
+        self.fast = 0
+        self.slow = 0
+
+    def classify(self, data):
+        view = memoryview(data)
+        size = len(view)
+        if size >= ETH_HEADER:
+            ethertype, = _ETHERTYPE.unpack_from(view, 12)
+            if ethertype == ether_types.ETH_TYPE_IP and size >= ETH_HEADER + IPV4_HEADER:
+                frame = self._ipv4(view, size)
+                if frame is not None:
+                    self.fast += 1
+                    return frame
+            elif ethertype == ether_types.ETH_TYPE_ARP and size >= ETH_HEADER + ARP_SIZE:
+                htype, ptype, hlen, plen, opcode = _ARP.unpack_from(view, ETH_HEADER)
+                if (htype, ptype, hlen, plen) == (1, ether_types.ETH_TYPE_IP, 6, 4):
+                    self.fast += 1
+                    return ArpFrame(_mac(view[6:12]), opcode, _mac(view[22:28]),
+                                    socket.inet_ntoa(view[28:32]), socket.inet_ntoa(view[38:42]))
+            elif ethertype not in (ether_types.ETH_TYPE_IP, ether_types.ETH_TYPE_ARP):
+                self.fast += 1
+                return None
+        self.slow += 1
+        return parse(data)
+
+    @staticmethod
+    def _ipv4(view, size):
+        version_ihl, fragment, proto = _IPV4.unpack_from(view, ETH_HEADER)
+        header = (version_ihl & 0x0f) * 4
+        if version_ihl >> 4 != 4 or header < IPV4_HEADER or size < ETH_HEADER + header:
+            return None
+        src_port = dst_port = None
+        if proto in (IPPROTO_TCP, IPPROTO_UDP) and not fragment & 0x1fff:
+            if size < ETH_HEADER + header + 4:
+                return None
+            src_port, dst_port = _PORTS.unpack_from(view, ETH_HEADER + header)
+        return Ipv4Frame(_mac(view[6:12]), socket.inet_ntoa(view[26:30]),
+                         socket.inet_ntoa(view[30:34]), proto, src_port, dst_port)
+
+
+def parse(data):
+    """ The same classification through ryu.lib.packet, for any frame it can parse """
+    pkt = packet.Packet(data)
+    eth = pkt.get_protocol(ethernet.ethernet)
+    if eth is None:
+        return None
+    if eth.ethertype == ether_types.ETH_TYPE_ARP:
+        arp_pkt = pkt.get_protocol(arp.arp)
+        if arp_pkt is None:
+            return None
+        return ArpFrame(eth.src, arp_pkt.opcode, arp_pkt.src_mac, arp_pkt.src_ip, arp_pkt.dst_ip)
+    if eth.ethertype == ether_types.ETH_TYPE_IP:
+        ip_pkt = pkt.get_protocol(ipv4.ipv4)
+        if ip_pkt is None:
+            return None
+        l4 = pkt.get_protocol(tcp.tcp) or pkt.get_protocol(udp.udp)
+        return Ipv4Frame(eth.src, ip_pkt.src, ip_pkt.dst, ip_pkt.proto,
+                         l4.src_port if l4 else None, l4.dst_port if l4 else None)
+    return None
+
+
+# (name, frame, path it must take); every frame here classifies to a tuple
+def _frames():
+    arp_request = packet.Packet()
+    arp_request.add_protocol(ethernet.ethernet('ff:ff:ff:ff:ff:ff', '00:00:00:00:00:02',
+                                               ether_types.ETH_TYPE_ARP))
+    arp_request.add_protocol(arp.arp(opcode=arp.ARP_REQUEST, src_mac='00:00:00:00:00:02',
+                                     src_ip='10.0.0.2', dst_mac='00:00:00:00:00:00',
+                                     dst_ip='10.3.1.3'))
+    tcp_syn = packet.Packet()
+    tcp_syn.add_protocol(ethernet.ethernet('00:00:00:00:00:13', '00:00:00:00:00:02',
+                                           ether_types.ETH_TYPE_IP))
+    tcp_syn.add_protocol(ipv4.ipv4(src='10.0.0.2', dst='10.3.1.3', proto=IPPROTO_TCP))
+    tcp_syn.add_protocol(tcp.tcp(src_port=40000, dst_port=80, bits=tcp.TCP_SYN))
+    udp_dgram = packet.Packet()
+    udp_dgram.add_protocol(ethernet.ethernet('00:00:00:00:00:13', '00:00:00:00:00:02',
+                                             ether_types.ETH_TYPE_IP))
+    udp_dgram.add_protocol(ipv4.ipv4(src='10.0.0.2', dst='10.3.1.3', proto=IPPROTO_UDP))
+    udp_dgram.add_protocol(udp.udp(src_port=5001, dst_port=5001))
+    # Router alert option, so the ports sit past a 24 byte IP header
+    options = packet.Packet()
+    options.add_protocol(ethernet.ethernet('00:00:00:00:00:13', '00:00:00:00:00:02',
+                                           ether_types.ETH_TYPE_IP))
+    options.add_protocol(ipv4.ipv4(src='10.0.0.2', dst='10.3.1.3', proto=IPPROTO_TCP,
+                                   header_length=6, option=b'\x94\x04\x00\x00'))
+    options.add_protocol(tcp.tcp(src_port=40000, dst_port=80, bits=tcp.TCP_SYN))
+    frames = []
+    for name, pkt in (('ARP request', arp_request), ('IPv4/TCP', tcp_syn),
+                      ('IPv4/UDP', udp_dgram), ('IPv4 options', options)):
+        pkt.serialize()
+        frames.append((name, bytes(pkt.data) + b'\0' * 32, 'fast'))
+    # Cut off inside the TCP header: no ports, left to the full parser
+    frames.append(('truncated TCP', bytes(tcp_syn.data)[:ETH_HEADER + IPV4_HEADER + 2], 'slow'))
+    return frames
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    classifier = Classifier()
+    for name, data, path in _frames():
+        before = classifier.slow
+        frame = classifier.classify(data)
+        assert frame is not None and frame == parse(data), name
+        assert (classifier.slow > before) == (path == 'slow'), name
+        timings = []
+        for fn in (classifier.classify, parse):
+            start = time.perf_counter()
+            for _ in range(n):
+                fn(data)
+            timings.append((time.perf_counter() - start) / n)
+        print(f'{name:13} fixed offsets {timings[0] * 1e6:6.2f} us   '
+              f'ryu.lib.packet {timings[1] * 1e6:6.2f} us   {timings[1] / timings[0]:5.1f}x')
+    print(f'fast path {classifier.fast}, full parser {classifier.slow}')
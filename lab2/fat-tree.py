@@ -21,6 +21,7 @@
 
 #!/usr/bin/env python3
 
+import argparse
 import os
 import subprocess
 import time
@@ -35,7 +36,22 @@ from mininet.node import Node, OVSKernelSwitch, RemoteController
 from mininet.topo import Topo
 from mininet.util import waitListening, custom
 
-from topo import Fattree
+from topo import CompactFattree
+from addressing import host_ip, node_dpid, parse_node_id, port_towards
+
+
+# Link tiers; only the tiers passed as shaped_tiers get TCLink bw/delay
+# shaping, the rest are plain veth pairs without tc qdiscs. By default no
+# tier is shaped: plain Link ignores bw and delay, so the fabric never was
+TIERS = ('host', 'edge-agg', 'agg-core')
+LINK_SHAPING = {'bw': 15, 'delay': '5ms'}
+
+
+def link_tier(src_id, dst_id):
+    kinds = {src_id[0], dst_id[0]}
+    if 'h' in kinds:
+        return 'host'
+    return 'agg-core' if 'c' in kinds else 'edge-agg'
 
 
 class FattreeNet(Topo):
@@ -43,99 +59,85 @@ class FattreeNet(Topo):
     Create a fat-tree network in Mininet
     """
 
-    def __init__(self, ft_topo):
+    def __init__(self, ft_topo, shaped_tiers=()):
 
+        self.shaped_tiers = set(shaped_tiers)
         Topo.__init__(self)
         self.build_net_from_topo(ft_topo)
 
     def build_net_from_topo(self, ft_topo):
+        # One pass over the link set, adding each node the first time it shows up
+        k = ft_topo.num_ports
         node_map = {}
-
-        # Iterate and add mininet
-        for node in ft_topo.nodes:
-            # add switches
-            if node.type == 'switch':
-                dpid_int = self.generate_dpid(node.id)
-                dpid_hex = f'{dpid_int:016x}'
-                sw = self.addSwitch(f's{node.id}', dpid=dpid_hex)
-                node_map[node.id] = sw 
-
-            elif node.type == 'host':
-                pod, edge, host = self.parse_host_id(node.id)
-                ip = f'10.{pod}.{edge}.{host}/24'
-                host_name = f'h_{pod}_{edge}_{host}'
-                print('creating host ', host_name)
-                h = self.addHost(host_name, ip=ip)
-                node_map[node.id] = h
-
-
-        # Add links
-        for node in ft_topo.nodes:
-            for edge in node.edges:
-                if edge.lnode.id == node.id:
-                    src = node_map[edge.lnode.id]
-                    dst = node_map[edge.rnode.id]
-                else:
-                    src = node_map[edge.rnode.id]
-                    dst = node_map[edge.lnode.id]
-
-                self.addLink(src, dst, bw=15, delay='5ms')
-
-
-    def parse_host_id(self, raw_id):
-        print('____------>', raw_id)
-        # ex h1_0_1 -> pod 1, switch 0, host 1
-        parts = raw_id.replace('h', '').split('_')
-        pod = int(parts[0])
-        edge = int(parts[1])
-        host = int(parts[2])
-        return pod, edge, host
-
-
-    def generate_dpid(self, node_id):
-        if node_id.startswith('e'):
-            # Edge switch, format: e<pod>_<index>
-            pod, idx = map(int, node_id[1:].split('_'))
-
-            return 100 + (pod * 10) + idx
-        elif node_id.startswith('a'):
-            # Aggregation switch
-            pod, idx = map(int, node_id[1:].split('_'))
-            return 200 + (pod * 10) + idx
-
-        elif node_id.startswith('c'):
-            # Core switch, format: c<col>_<row>
-            col, row = map(int, node_id[1:].split('_'))
-            return 300 + (row * 10) + col
-        else:
-            # default fallback (not expected)
-            return 9999
-
-
-def make_mininet_instance(graph_topo):
-
-    net_topo = FattreeNet(graph_topo)
-    net = Mininet(topo=net_topo, controller=None, autoSetMacs=True)
+        for src, dst in ft_topo.links():
+            for node_id in (src, dst):
+                if node_id not in node_map:
+                    node_map[node_id] = self.add_node(node_id)
+
+            params = {'port1': port_towards(k, src, dst), 'port2': port_towards(k, dst, src)}
+            if link_tier(src, dst) in self.shaped_tiers:
+                params.update(LINK_SHAPING, cls=TCLink)
+            self.addLink(node_map[src], node_map[dst], **params)
+
+    def add_node(self, node_id):
+        if node_id[0] != 'h':
+            return self.addSwitch(f's{node_id}', dpid=f'{node_dpid(node_id):016x}')
+        _, pod, edge, host = parse_node_id(node_id)
+        return self.addHost(f'h_{pod}_{edge}_{host}', ip=f'{host_ip(pod, edge, host)}/8')
+
+
+def timed(phase, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    info(f'*** {phase}: {time.perf_counter() - start:.2f} s\n')
+    return result
+
+
+def make_mininet_instance(graph_topo, shaped_tiers=(), batch=True):
+
+    # batch=True lets Mininet.start() create all OVS bridges and ports with a
+    # few ovs-vsctl calls instead of several per switch
+    switch = custom(OVSKernelSwitch, batch=True) if batch else OVSKernelSwitch
+    net_topo = timed('topology', FattreeNet, graph_topo, shaped_tiers)
+    net = Mininet(topo=net_topo, switch=switch, controller=None,
+                  autoSetMacs=True, build=False)
     net.addController('c0', controller=RemoteController,
                       ip="127.0.0.1", port=6653)
+    timed('build', net.build)
     return net
 
 
-def run(graph_topo):
+def run(graph_topo, shaped_tiers=(), batch=True, wait=False, cli=True):
 
     # Run the Mininet CLI with a given topology
     lg.setLogLevel('info')
     mininet.clean.cleanup()
-    net = make_mininet_instance(graph_topo)
+    net = make_mininet_instance(graph_topo, shaped_tiers, batch)
 
     info('*** Starting network ***\n')
-    net.start()
-    info('*** Running CLI ***\n')
-    CLI(net)
+    timed('start', net.start)
+    if wait:
+        timed('switches connected', net.waitConnected)
+    if cli:
+        info('*** Running CLI ***\n')
+        CLI(net)
     info('*** Stopping network ***\n')
-    net.stop()
+    timed('stop', net.stop)
 
 
 if __name__ == '__main__':
-    ft_topo = Fattree(4)
-    run(ft_topo)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', type=int, default=4)
+    parser.add_argument('--shape', nargs='*', choices=TIERS, default=[],
+                        help='link tiers to shape with TCLink, 15 Mbit/s and 5 ms each '
+                             '(default: none, links are unshaped)')
+    parser.add_argument('--no-batch', action='store_true',
+                        help='start OVS switches one at a time')
+    parser.add_argument('--wait', action='store_true',
+                        help='time until every switch has connected to the controller')
+    parser.add_argument('--no-cli', action='store_true',
+                        help='bring the fabric up and down again, for timing')
+    args = parser.parse_args()
+
+    ft_topo = CompactFattree(args.k)
+    run(ft_topo, args.shape, not args.no_batch, args.wait, not args.no_cli)
@@ -0,0 +1,130 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+
+class InstallFuture:
+    """
+        Completes once every switch in a flush has answered its barrier, i.e.
+        once all FlowMods queued before the flush are in the switches' tables.
+        Switches that rejected one of them, or disconnected, end up in failed.
+    """
+
+    def __init__(self, dpids):
+        self.pending = set(dpids)
+        self.failed = set()
+        self.callbacks = []
+
+    def done(self):
+        return not self.pending
+
+    # fn(future) runs once the install completes, right away if it already has
+    def add_done_callback(self, fn):
+        if self.done():
+            fn(self)
+        else:
+            self.callbacks.append(fn)
+
+    def _resolve(self, dpid, failed=False):
+        if dpid not in self.pending:
+            return
+        self.pending.discard(dpid)
+        if failed:
+            self.failed.add(dpid)
+        if not self.pending:
+            callbacks, self.callbacks = self.callbacks, []
+            for fn in callbacks:
+                fn(self)
+
+
+class FlowBatcher:
+    """
+        Queues OpenFlow messages per datapath and sends each queue as a single
+        buffer followed by an OFPBarrierRequest, so a burst of FlowMods costs
+        one write per switch instead of one per message.
+    """
+
+    def __init__(self):
+        self.queues = {}        # dpid -> (datapath, [msg, ...])
+        self.barriers = {}      # (dpid, barrier xid) -> [InstallFuture, ...]
+        self.batches = {}       # (dpid, message xid) -> barrier xid closing its batch
+        self.batch_xids = {}    # (dpid, barrier xid) -> [message xid, ...]
+        self.messages = 0
+        self.writes = 0
+        self.errors = 0
+
+    def add(self, datapath, msg):
+        entry = self.queues.get(datapath.id)
+        if entry is None:
+            entry = self.queues[datapath.id] = (datapath, [])
+        entry[1].append(msg)
+
+    # Send everything queued and return a future for its installation
+    def flush(self):
+        future = InstallFuture(self.queues)
+        queues, self.queues = self.queues, {}
+
+        for dpid, (datapath, msgs) in queues.items():
+            barrier = datapath.ofproto_parser.OFPBarrierRequest(datapath)
+            bufs = []
+            for msg in msgs + [barrier]:
+                datapath.set_xid(msg)
+                msg.serialize()
+                bufs.append(msg.buf)
+
+            xids = [msg.xid for msg in msgs]
+            for xid in xids:
+                self.batches[(dpid, xid)] = barrier.xid
+            self.batch_xids[(dpid, barrier.xid)] = xids
+            self.barriers.setdefault((dpid, barrier.xid), []).append(future)
+            datapath.send(b''.join(bufs))
+            self.messages += len(msgs)
+            self.writes += 1
+        return future
+
+    # Feed every OFPErrorMsg through here. The switch answers a message
+    # before the barrier behind it, so the batch fails before it can complete;
+    # returns whether xid was one of ours
+    def error(self, dpid, xid):
+        barrier_xid = self.batches.get((dpid, xid))
+        if barrier_xid is None:
+            return False
+        self.errors += 1
+        for future in self.barriers.get((dpid, barrier_xid), ()):
+            future._resolve(dpid, failed=True)
+        return True
+
+    # Feed every OFPBarrierReply through here
+    def barrier_reply(self, dpid, xid):
+        self._forget_batch(dpid, xid)
+        for future in self.barriers.pop((dpid, xid), ()):
+            future._resolve(dpid)
+
+    # Fail outstanding installs on a switch that disconnected
+    def datapath_gone(self, dpid):
+        self.queues.pop(dpid, None)
+        for key in [key for key in self.barriers if key[0] == dpid]:
+            self._forget_batch(*key)
+            for future in self.barriers.pop(key):
+                future._resolve(dpid, failed=True)
+
+    def _forget_batch(self, dpid, barrier_xid):
+        for xid in self.batch_xids.pop((dpid, barrier_xid), ()):
+            self.batches.pop((dpid, xid), None)
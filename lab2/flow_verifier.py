@@ -0,0 +1,351 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Symbolic flow-table verifier. Instead of walking one packet per host pair,
+# every switch's table is turned into destination sets - one bitset over all
+# fabric hosts per entry, minus what higher-priority entries already take -
+# and delivery is solved for all destinations at once by iterating
+#   ok(s) = union over entries e of s: region(e) & (host behind e's port,
+#                                                   or ok(switch behind it))
+# until it stops changing. Iteration h adds destinations s reaches in h
+# switch hops, so stretch against topo.Fattree's shortest paths falls out too.
+# Prefix matches map to contiguous bit ranges (hosts are sorted by address),
+# so the cost grows with the number of entries, not with host pairs.
+#
+# Tables come from the controller (testbench.py --verify), from OVS dumps
+# (ovs-ofctl -O OpenFlow13 dump-flows <switch> > DIR/<switch>.txt) or, for
+# scale tests, straight from ft_tables.
+# Usage: python3 flow_verifier.py [-k K] [--ovs-dir DIR] [--arp]
+
+import argparse
+import bisect
+import collections
+import ipaddress
+import os
+import re
+import time
+
+import addressing
+import topo
+
+OFPP_MAX = 0xffffff00
+OFPP_CONTROLLER = 0xfffffffd
+
+# One flow entry: match is {field: value or (value, mask)}, out_ports the
+# ports of its output actions (empty to drop)
+TableEntry = collections.namedtuple('TableEntry', ['priority', 'match', 'out_ports'])
+
+Report = collections.namedtuple('Report', [
+    'hosts', 'pairs', 'delivered',
+    'black_holes',      # pairs dropped, sent to the controller or to the wrong host
+    'loops',            # pairs forwarded around a cycle
+    'stretch',          # Counter(extra hops over the shortest path -> pairs)
+    'skipped',          # entries matching more than the destination, ignored
+    'failures'])        # sample of (src edge dpid, dst ip, 'black hole' | 'loop')
+
+
+def _ip(value):
+    return int(ipaddress.ip_address(value)) if isinstance(value, str) else int(value)
+
+
+def _value_mask(value):
+    if isinstance(value, tuple):
+        return _ip(value[0]), _ip(value[1])
+    return _ip(value), 0xffffffff
+
+
+def _is_prefix(mask):
+    inverted = ~mask & 0xffffffff
+    return inverted & (inverted + 1) == 0
+
+
+class Verifier:
+    """
+        tables: {dpid: [TableEntry, ...]} for a k-ary fat-tree laid out as in
+        addressing.py. field/eth_type select the header class: ipv4_dst for
+        IPv4 (0x0800) or arp_tpa for ARP (0x0806).
+    """
+
+    def __init__(self, k, tables, field='ipv4_dst', eth_type=0x0800):
+        self.k = k
+        self.field = field
+        self.eth_type = eth_type
+        self.hosts = [addressing.host_ip(pod, edge, h) for pod in range(k)
+                      for edge in range(k // 2) for h in addressing.host_ids(k)]
+        self.addresses = [_ip(ip) for ip in self.hosts]
+        self.all = (1 << len(self.hosts)) - 1
+        self.bit = {location: 1 << i for i, location in
+                    enumerate(addressing.host_location(ip) for ip in self.hosts)}
+        self.match_cache = {}
+        self.skipped = 0
+        self.regions = {dpid: self._regions(entries) for dpid, entries in tables.items()}
+
+    # Bitset of hosts whose address matches value under mask
+    def _matching(self, value, mask):
+        key = (value & mask, mask)
+        bits = self.match_cache.get(key)
+        if bits is None:
+            if _is_prefix(mask):
+                lo = bisect.bisect_left(self.addresses, value & mask)
+                hi = bisect.bisect_right(self.addresses, (value & mask) | (~mask & 0xffffffff))
+                bits = ((1 << hi) - 1) ^ ((1 << lo) - 1)
+            else:
+                bits = 0
+                for i, address in enumerate(self.addresses):
+                    if address & mask == value & mask:
+                        bits |= 1 << i
+            self.match_cache[key] = bits
+        return bits
+
+    def _regions(self, entries):
+        # [(hosts this entry decides, out port or None)], highest priority first
+        remaining = self.all
+        regions = []
+        for entry in sorted(entries, key=lambda e: -e.priority):
+            if entry.match.get('eth_type', self.eth_type) != self.eth_type:
+                continue
+            if set(entry.match) - {'eth_type', self.field}:
+                self.skipped += 1
+                continue
+            if self.field in entry.match:
+                matched = self._matching(*_value_mask(entry.match[self.field]))
+            else:
+                matched = self.all
+            region = matched & remaining
+            remaining &= ~matched
+            if region:
+                ports = [p for p in entry.out_ports if p <= OFPP_MAX]
+                regions.append((region, ports[0] if ports else None))
+        return regions
+
+    def run(self, max_failures=10):
+        k = self.k
+        neighbor = {(dpid, port): addressing.neighbor(k, dpid, port)
+                    for dpid in self.regions for port in range(1, k + 1)}
+
+        # ok[s]: destinations s delivers to the right host port; dead[s]: ones
+        # it drops, misses or hands to the wrong host. reached[h][s] = ok after h hops
+        ok = {dpid: 0 for dpid in self.regions}
+        dead = {dpid: 0 for dpid in self.regions}
+        for dpid, regions in self.regions.items():
+            decided = 0
+            for region, port in regions:
+                decided |= region
+                if port is None or neighbor.get((dpid, port), 0) == 0:
+                    dead[dpid] |= region
+                elif neighbor[(dpid, port)] is None:
+                    right = self.bit.get((dpid, port), 0)
+                    ok[dpid] |= region & right
+                    dead[dpid] |= region & ~right
+            dead[dpid] |= self.all & ~decided
+        reached = [dict(ok)]
+
+        for _ in range(len(self.regions)):
+            new_ok, new_dead = dict(ok), dict(dead)
+            for dpid, regions in self.regions.items():
+                for region, port in regions:
+                    peer = neighbor.get((dpid, port))
+                    if peer:
+                        new_ok[dpid] |= region & ok.get(peer, 0)
+                        new_dead[dpid] |= region & dead.get(peer, self.all)
+            if new_ok == ok and new_dead == dead:
+                break
+            ok, dead = new_ok, new_dead
+            reached.append(dict(ok))
+
+        return self._report(ok, dead, reached, max_failures)
+
+    def _report(self, ok, dead, reached, max_failures):
+        half = self.k // 2
+        hops = self._shortest_hops()
+        stretch = collections.Counter()
+        delivered = black_holes = loops = 0
+        failures = []
+        for pod in range(self.k):
+            for edge in range(half):
+                dpid = addressing.edge_dpid(pod, edge)
+                sources = half
+                local = self._matching(_ip(addressing.host_ip(pod, edge, 0)), 0xffffff00)
+                others = self.all & ~local
+                good = ok.get(dpid, 0)
+                delivered += sources * bin(good & others).count('1')
+                delivered += (sources - 1) * bin(good & local).count('1')
+                bad = dead.get(dpid, self.all) & ~good
+                looping = self.all & ~good & ~bad
+                black_holes += sources * bin(bad & others).count('1') \
+                    + (sources - 1) * bin(bad & local).count('1')
+                loops += sources * bin(looping & others).count('1') \
+                    + (sources - 1) * bin(looping & local).count('1')
+                for kind, bits in (('black hole', bad), ('loop', looping)):
+                    while bits and len(failures) < max_failures:
+                        low = bits & -bits
+                        failures.append((dpid, self.hosts[low.bit_length() - 1], kind))
+                        bits ^= low
+
+                previous = 0
+                for h, level in enumerate(reached):
+                    new = level.get(dpid, 0) & ~previous
+                    previous |= new
+                    for distance, bits in hops[dpid].items():
+                        count = bin(new & bits).count('1')
+                        if count:
+                            weight = sources - 1 if distance == 0 else sources
+                            stretch[h - distance] += weight * count
+
+        pairs = len(self.hosts) * (len(self.hosts) - 1)
+        return Report(len(self.hosts), pairs, delivered, black_holes, loops, stretch,
+                      self.skipped, failures)
+
+    def _shortest_hops(self):
+        # Edge switch -> {switch hops on a shortest path: destination bitset}, by BFS
+        # over topo.Fattree's switch graph
+        ft = topo.CompactFattree(self.k)
+        graph = {addressing.node_dpid(node): [addressing.node_dpid(peer) for peer, _, _ in adj]
+                 for node, adj in ft.switch_graph().items()}
+        behind = collections.defaultdict(int)
+        for (dpid, _), bit in self.bit.items():
+            behind[dpid] |= bit
+
+        result = {}
+        for src in behind:
+            distance = {src: 0}
+            frontier = [src]
+            while frontier:
+                following = []
+                for node in frontier:
+                    for peer in graph[node]:
+                        if peer not in distance:
+                            distance[peer] = distance[node] + 1
+                            following.append(peer)
+                frontier = following
+            by_hops = collections.defaultdict(int)
+            for dst, bits in behind.items():
+                by_hops[distance[dst]] |= bits
+            result[src] = dict(by_hops)
+        return result
+
+
+def from_datapaths(datapaths):
+    """ Tables captured by testbench.FakeDatapath """
+    return {dpid: [TableEntry(priority, match, dp.live_ports(ports))
+                   for (priority, _), (match, ports) in dp.table.items()]
+            for dpid, dp in datapaths.items()}
+
+
+def from_ft_tables(tables):
+    field = {0x0800: 'ipv4_dst', 0x0806: 'arp_tpa'}
+    return {dpid: [TableEntry(rule.priority, {'eth_type': rule.eth_type,
+                                              field[rule.eth_type]: (rule.ip, rule.mask)},
+                              [rule.out_port]) for rule in rules]
+            for dpid, rules in tables.items()}
+
+
+_OVS_FIELDS = {'nw_dst': 'ipv4_dst', 'ip_dst': 'ipv4_dst', 'arp_tpa': 'arp_tpa',
+               'nw_src': 'ipv4_src', 'in_port': 'in_port', 'nw_proto': 'ip_proto',
+               'tp_src': 'tp_src', 'tp_dst': 'tp_dst'}
+
+
+def parse_ovs_dump(text):
+    """ ovs-ofctl dump-flows output -> [TableEntry, ...] """
+    entries = []
+    for line in text.splitlines():
+        if 'actions=' not in line:
+            continue
+        head, actions = line.rsplit('actions=', 1)
+        match = {}
+        priority = 32768
+        for token in head.replace(' ', ',').split(','):
+            if token == 'ip':
+                match['eth_type'] = 0x0800
+            elif token == 'arp':
+                match['eth_type'] = 0x0806
+            elif token.startswith('priority='):
+                priority = int(token.split('=', 1)[1])
+            elif token.startswith('dl_type=') or token.startswith('eth_type='):
+                match['eth_type'] = int(token.split('=', 1)[1], 0)
+            elif '=' in token and token.split('=', 1)[0] in _OVS_FIELDS:
+                name, value = token.split('=', 1)
+                if '/' in value and name in ('nw_dst', 'ip_dst', 'arp_tpa', 'nw_src'):
+                    network = ipaddress.ip_network(value, strict=False) if '.' not in \
+                        value.split('/')[1] else None
+                    value = (str(network.network_address), str(network.netmask)) \
+                        if network else tuple(value.split('/'))
+                match[_OVS_FIELDS[name]] = value
+        ports = []
+        for action in actions.strip().split(','):
+            if action.startswith('output:'):
+                port = action.split(':', 1)[1].strip('"')
+                ports.append(int(re.sub(r'.*-eth', '', port)))
+            elif action.startswith('CONTROLLER'):
+                ports.append(OFPP_CONTROLLER)
+        entries.append(TableEntry(priority, match, ports))
+    return entries
+
+
+def from_ovs_dir(directory):
+    """ DIR/<switch>.txt per switch, named as fat-tree.py names them (se0_0, sc1_0, ...) """
+    tables = {}
+    for name in sorted(os.listdir(directory)):
+        switch, ext = os.path.splitext(name)
+        if ext == '.txt':
+            with open(os.path.join(directory, name)) as f:
+                tables[addressing.node_dpid(switch.lstrip('s'))] = parse_ovs_dump(f.read())
+    return tables
+
+
+def print_report(name, report, elapsed):
+    print(f'{name}: {report.hosts} hosts, {report.pairs} pairs in {elapsed:.2f} s: '
+          f'delivered {report.delivered}, black holes {report.black_holes}, '
+          f'loops {report.loops}, stretch {dict(sorted(report.stretch.items()))}, '
+          f'skipped entries {report.skipped}')
+    for dpid, ip, kind in report.failures:
+        print(f'    {kind}: from edge {dpid:#x} to {ip}')
+
+
+def main():
+    import ft_tables
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', type=int, default=4)
+    parser.add_argument('--ovs-dir', help='verify OVS dumps instead of generated two-level tables')
+    parser.add_argument('--arp', action='store_true', help='also verify the ARP (arp_tpa) class')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.ovs_dir:
+        tables = from_ovs_dir(args.ovs_dir)
+    else:
+        tables = from_ft_tables(ft_tables.generate_tables(args.k))
+    loaded = time.perf_counter() - start
+    print(f'k={args.k}: {sum(len(t) for t in tables.values())} entries on {len(tables)} '
+          f'switches, loaded in {loaded:.2f} s')
+
+    classes = [('IPv4', 'ipv4_dst', 0x0800)] + ([('ARP', 'arp_tpa', 0x0806)] if args.arp else [])
+    for name, field, eth_type in classes:
+        start = time.perf_counter()
+        report = Verifier(args.k, tables, field, eth_type).run()
+        print_report(name, report, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,72 +21,59 @@
 
 #!/usr/bin/env python3
 
-from ryu.base import app_manager
-from ryu.controller import mac_to_port
 from ryu.controller import ofp_event
-from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
+from ryu.controller.handler import MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
-from ryu.ofproto import ofproto_v1_3
-from ryu.lib.mac import haddr_to_bin
-from ryu.lib.packet import packet
-from ryu.lib.packet import ipv4
-from ryu.lib.packet import arp
 
-from ryu.topology import event, switches
-from ryu.topology.api import get_switch, get_link
-from ryu.app.wsgi import ControllerBase
+import ft_tables
+from addressing import decode_dpid
+from routing_core import RoutingCore
 
-import topo
 
-
-class FTRouter(app_manager.RyuApp):
-
-    OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+class FTRouter(RoutingCore):
 
     def __init__(self, *args, **kwargs):
         super(FTRouter, self).__init__(*args, **kwargs)
-        
-        # Initialize the topology with #ports=4
-        self.topo_net = topo.Fattree(4)
-
-    # Topology discovery
-    @set_ev_cls(event.EventSwitchEnter)
-    def get_topology_data(self, ev):
-
-        # Switches and links in the network
-        switches = get_switch(self, None)
-        links = get_link(self, None)
-
-    @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
-    def switch_features_handler(self, ev):
-        datapath = ev.msg.datapath
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
 
-        # Install entry-miss flow entry
-        match = parser.OFPMatch()
-        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
-                                          ofproto.OFPCML_NO_BUFFER)]
-        self.add_flow(datapath, 0, match, actions)
+        # Two-level tables for every switch, installed when it connects
+        self.tables = ft_tables.generate_tables(self.num_ports)
 
-    # Add a flow entry to the flow-table
-    def add_flow(self, datapath, priority, match, actions):
-        ofproto = datapath.ofproto
+    def configure_switch(self, datapath):
+        self.install_two_level_table(datapath)
+
+    # Install the switch's prefix and suffix entries for IPv4 and ARP
+    def install_two_level_table(self, datapath):
         parser = datapath.ofproto_parser
 
-        # Construct flow_mod message and send it
-        inst = [parser.OFPInstructionActions(
-            ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
-                                match=match, instructions=inst)
-        datapath.send_msg(mod)
+        for rule in self.tables.get(datapath.id, []):
+            if rule.eth_type == ft_tables.ETH_TYPE_IP:
+                match = parser.OFPMatch(eth_type=rule.eth_type,
+                                        ipv4_dst=(rule.ip, rule.mask))
+            else:
+                match = parser.OFPMatch(eth_type=rule.eth_type,
+                                        arp_tpa=(rule.ip, rule.mask))
+            actions = [parser.OFPActionOutput(rule.out_port)]
+            self.add_flow(datapath, rule.priority, match, actions)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def _packet_in_handler(self, ev):
         msg = ev.msg
         datapath = msg.datapath
         dpid = datapath.id
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
 
-        # TODO: handle new packets at the controller
+        # Every IPv4 and ARP destination is covered by the proactive tables,
+        # so only traffic outside the fabric's addressing ends up here
+        self.metrics.inc('packet_ins_unmatched')
+        self.events.trace('unmatched_in', role=decode_dpid(dpid)[0], dpid=dpid,
+                          port=msg.match['in_port'])
+
+    # Everything /router/stats serves
+    def stats(self):
+        return dict(super(FTRouter, self).stats(),
+                    entries={dpid: len(rules) for dpid, rules in self.tables.items()})
+
+    # Current values for /router/metrics: (name, type, labels, value)
+    def metric_values(self):
+        return super(FTRouter, self).metric_values() + [
+            ('flow_entries', 'gauge', {'dpid': dpid}, len(rules))
+            for dpid, rules in sorted(self.tables.items())]
@@ -0,0 +1,131 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Two-level fat-tree routing tables (Al-Fares et al., SIGCOMM'08), computed
+# offline from the dpid, port and address layout in addressing.py. Every out
+# port is one of addressing.next_hops(), so the tables cannot disagree with
+# the closed-form shortest paths.
+# Usage: python3 ft_tables.py [k]   prints every table and the generation time
+
+import collections
+import sys
+import time
+
+from addressing import (check_k, edge_dpid, agg_dpid, core_dpid, decode_dpid,
+                        host_ip, host_ids, next_hops)
+
+ETH_TYPE_IP = 0x0800
+ETH_TYPE_ARP = 0x0806
+
+PRIORITY_PREFIX = 20
+PRIORITY_SUFFIX = 10
+
+MASK_HOST = '255.255.255.255'
+MASK_EDGE = '255.255.255.0'
+MASK_POD = '255.255.0.0'
+MASK_SUFFIX = '0.0.0.255'
+
+# One flow entry: match eth_type plus ipv4_dst (IP) or arp_tpa (ARP) under mask
+FlowRule = collections.namedtuple('FlowRule',
+                                  ['priority', 'eth_type', 'ip', 'mask', 'out_port'])
+
+
+def _both(priority, ip, mask, out_port):
+    return [FlowRule(priority, ETH_TYPE_IP, ip, mask, out_port),
+            FlowRule(priority, ETH_TYPE_ARP, ip, mask, out_port)]
+
+
+def _suffix_rules(k, dpid, pod, index):
+    # Spread destinations over the uplinks by host id, offset by switch index;
+    # the uplinks are the next hops towards any host outside the pod
+    rules = []
+    for host_id in host_ids(k):
+        uplinks = next_hops(k, dpid, host_ip((pod + 1) % k, 0, host_id))
+        uplink = uplinks[(host_id - 2 + index) % len(uplinks)]
+        rules += _both(PRIORITY_SUFFIX, f'0.0.0.{host_id}', MASK_SUFFIX, uplink)
+    return rules
+
+
+def edge_table(k, pod, edge):
+    dpid = edge_dpid(pod, edge)
+    rules = []
+    for host_id in host_ids(k):
+        ip = host_ip(pod, edge, host_id)
+        rules += _both(PRIORITY_PREFIX, ip, MASK_HOST, next_hops(k, dpid, ip)[0])
+    return rules + _suffix_rules(k, dpid, pod, edge)
+
+
+def agg_table(k, pod, agg):
+    dpid = agg_dpid(pod, agg)
+    first = host_ids(k)[0]
+    rules = []
+    for edge in range(k // 2):
+        out_port = next_hops(k, dpid, host_ip(pod, edge, first))[0]
+        rules += _both(PRIORITY_PREFIX, f'10.{pod}.{edge}.0', MASK_EDGE, out_port)
+    return rules + _suffix_rules(k, dpid, pod, agg)
+
+
+def core_table(k, row, col):
+    dpid = core_dpid(row, col)
+    first = host_ids(k)[0]
+    rules = []
+    for pod in range(k):
+        out_port = next_hops(k, dpid, host_ip(pod, 0, first))[0]
+        rules += _both(PRIORITY_PREFIX, f'10.{pod}.0.0', MASK_POD, out_port)
+    return rules
+
+
+def generate_tables(k):
+    """
+        Complete two-level table for every switch of a k-ary fat-tree,
+        as {dpid: [FlowRule, ...]}.
+    """
+    check_k(k)
+    half = k // 2
+    tables = {}
+    for pod in range(k):
+        for i in range(half):
+            tables[edge_dpid(pod, i)] = edge_table(k, pod, i)
+            tables[agg_dpid(pod, i)] = agg_table(k, pod, i)
+    for row in range(half):
+        for col in range(half):
+            tables[core_dpid(row, col)] = core_table(k, row, col)
+    return tables
+
+
+if __name__ == '__main__':
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    start = time.perf_counter()
+    tables = generate_tables(k)
+    elapsed = time.perf_counter() - start
+
+    for dpid in sorted(tables):
+        role, a, b = decode_dpid(dpid)
+        print(f'== {role} {a}_{b} (dpid {dpid:#x}): {len(tables[dpid])} entries')
+        for rule in tables[dpid]:
+            kind = 'ip ' if rule.eth_type == ETH_TYPE_IP else 'arp'
+            print(f'   prio={rule.priority:<3} {kind} {rule.ip}/{rule.mask} -> port {rule.out_port}')
+
+    total = sum(len(rules) for rules in tables.values())
+    print(f'k={k}: {len(tables)} switches, {total} entries in {elapsed * 1e3:.2f} ms')
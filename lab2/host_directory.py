@@ -0,0 +1,96 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Host directory: ip -> (mac, dpid, port) for every host in the fabric.
+# Usage: python3 host_directory.py [k ...]   PacketOuts per ARP resolution,
+#        old core/edge flooding vs. directory answers
+
+import collections
+import sys
+
+import addressing
+
+Host = collections.namedtuple('Host', ['mac', 'dpid', 'port'])
+
+
+class HostDirectory:
+    """
+        Where every host lives and which MAC answers for its IP. Entries come
+        either from the deterministic fat-tree layout (seed_fattree) or are
+        learned from the first packet a host sends.
+    """
+
+    def __init__(self):
+        self.hosts = {}         # ip -> Host
+
+    def __contains__(self, ip):
+        return ip in self.hosts
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def get(self, ip):
+        return self.hosts.get(ip)
+
+    # Returns True if ip is new or has moved
+    def learn(self, ip, mac, dpid, port):
+        host = Host(mac, dpid, port)
+        if self.hosts.get(ip) == host:
+            return False
+        self.hosts[ip] = host
+        return True
+
+    def seed_fattree(self, k):
+        """
+            Pre-fill the hosts fat-tree.py creates, with the addresses, MACs
+            and locations addressing.py derives for them.
+        """
+        for pod in range(k):
+            for edge in range(k // 2):
+                for host_id in addressing.host_ids(k):
+                    ip = addressing.host_ip(pod, edge, host_id)
+                    self.learn(ip, addressing.host_mac(k, pod, edge, host_id),
+                               *addressing.host_location(ip))
+
+
+def legacy_arp_packet_outs(k):
+    """
+        PacketOuts the old route_arp_requests_to_core_then_edge sent for one
+        unknown destination: the request walked from the source edge up to
+        every core and from every core down to every edge switch, with one
+        PacketOut per switch on each path.
+    """
+    half = k // 2
+    up = 3                          # edge -> agg -> core
+    down = 3                        # core -> agg -> edge
+    return half * half * (up + k * half * down)
+
+
+if __name__ == '__main__':
+    for k in [int(arg) for arg in sys.argv[1:]] or [4, 8, 16]:
+        directory = HostDirectory()
+        directory.seed_fattree(k)
+        edges = k * (k // 2)
+        print(f'k={k:<3} hosts={len(directory):<6} PacketOuts per ARP resolution: '
+              f'old flooding {legacy_arp_packet_outs(k):8}  '
+              f'directory hit 1  learned-only miss {edges + 1}')
@@ -0,0 +1,80 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+
+import time
+
+
+class Inflight:
+    """ A flow whose rules are being installed, and the packets held for it """
+
+    def __init__(self, expires):
+        self.expires = expires
+        self.held = []          # (dpid, data) of duplicate packet-ins
+
+
+class InflightTable:
+    """
+        Flows between a host pair whose install is still outstanding, keyed
+        on (src_ip, dst_ip). The first packet-in of a flow claims the key and
+        is routed; packet-ins arriving before the install is confirmed are
+        held instead of routed again, and released onto the installed path
+        once it lands. A claim expires after ttl seconds, so a lost barrier
+        only delays the next attempt.
+    """
+
+    def __init__(self, ttl=2.0, max_held=32, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_held = max_held
+        self.clock = clock
+        self.entries = {}       # (src_ip, dst_ip) -> Inflight
+        self.duplicates = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Inflight for the caller to route, or None if the key is already in flight
+    def claim(self, key, dpid, data):
+        now = self.clock()
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires > now:
+            self.duplicates += 1
+            if len(entry.held) < self.max_held:
+                entry.held.append((dpid, data))
+            return None
+        if entry is not None:
+            self.expired += 1
+        entry = self.entries[key] = Inflight(now + self.ttl)
+        return entry
+
+    # End a claim and return the packets held for it
+    def complete(self, key, entry):
+        if self.entries.get(key) is entry:
+            del self.entries[key]
+        held, entry.held = entry.held, []
+        return held
+
+    def sweep(self):
+        now = self.clock()
+        for key in [key for key, entry in self.entries.items() if entry.expires <= now]:
+            del self.entries[key]
+            self.expired += 1
@@ -0,0 +1,269 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+# Counters and latency histograms for the controllers, kept per thread and
+# merged when read, and their Prometheus text exposition.
+# Usage: python3 metrics.py [N]   cost per inc()/observe() call, N calls
+
+import collections
+import logging
+import sys
+import threading
+import time
+
+
+class Histogram:
+    """
+        HDR-style duration histogram in fixed memory. Values are kept in
+        microseconds, split by magnitude (power of two) into SUB_BUCKETS
+        linear sub-buckets each, so every recorded value is known to within
+        1/SUB_BUCKETS of itself from 1 us up to 2**MAGNITUDES us (~67 s);
+        larger values land in the last bucket.
+    """
+
+    SUB_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BITS
+    MAGNITUDES = 26
+
+    def __init__(self):
+        self.counts = [0] * (self.SUB_BUCKETS * (self.MAGNITUDES + 1))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def index(cls, micros):
+        if micros < cls.SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - cls.SUB_BITS - 1
+        index = (shift + 1) * cls.SUB_BUCKETS + (micros >> shift) - cls.SUB_BUCKETS
+        return min(index, cls.SUB_BUCKETS * (cls.MAGNITUDES + 1) - 1)
+
+    # Largest value, in us, that falls into bucket index
+    @classmethod
+    def upper(cls, index):
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return ((index % cls.SUB_BUCKETS + cls.SUB_BUCKETS + 1) << shift) - 1
+
+    def observe(self, seconds):
+        self.counts[self.index(int(seconds * 1e6))] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, p):
+        rank = self.count * p / 100
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(self.upper(index) / 1e6, self.max)
+        return self.max
+
+    # Cumulative counts at each bound (seconds), for Prometheus buckets
+    def cumulative(self, bounds):
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            limit = self.index(int(bound * 1e6))
+            while index <= limit and index < len(self.counts):
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def snapshot(self):
+        return {'count': self.count,
+                'avg_ms': self.total / self.count * 1e3 if self.count else 0.0,
+                'p50_ms': self.percentile(50) * 1e3,
+                'p90_ms': self.percentile(90) * 1e3,
+                'p99_ms': self.percentile(99) * 1e3,
+                'p999_ms': self.percentile(99.9) * 1e3,
+                'max_ms': self.max * 1e3}
+
+
+class _Shard:
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters = collections.Counter()
+        self.histograms = collections.defaultdict(Histogram)
+
+
+class Metrics:
+    """
+        Named counters and duration histograms, cheap enough for every packet.
+        Each thread writes to its own shard, so recording never takes a lock
+        or races with another worker; readers merge the shards. Green threads
+        sharing an OS thread share its shard, which is safe as they never
+        preempt each other mid-update.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()   # only for registering a new shard
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def inc(self, name, n=1):
+        self._shard().counters[name] += n
+
+    def observe(self, name, seconds):
+        self._shard().histograms[name].observe(seconds)
+
+    @property
+    def counters(self):
+        total = collections.Counter()
+        for shard in list(self._shards):
+            total.update(shard.counters)
+        return total
+
+    @property
+    def histograms(self):
+        merged = {}
+        for shard in list(self._shards):
+            for name, histogram in list(shard.histograms.items()):
+                merged.setdefault(name, Histogram()).merge(histogram)
+        return merged
+
+    def snapshot(self):
+        return {'counters': dict(self.counters),
+                'histograms': {name: h.snapshot() for name, h in self.histograms.items()}}
+
+
+# Prometheus bucket bounds for durations: 10 us to ~10 s, three per decade
+PROMETHEUS_BOUNDS = [b * 10 ** e for e in range(-5, 1) for b in (1, 2.5, 5)] + [10.0]
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in sorted(labels.items())) + '}'
+
+
+def prometheus_text(prefix, metrics, values=()):
+    """
+        Prometheus text exposition (format 0.0.4) of metrics' counters as
+        <prefix>_<name>_total, its histograms as <prefix>_<name> with
+        _bucket/_sum/_count, and values read from the app at scrape time as
+        (name, 'gauge' or 'counter', labels dict or None, value).
+    """
+    lines = []
+    for name, value in sorted(metrics.counters.items()):
+        metric = f'{prefix}_{name}_total'
+        lines += [f'# TYPE {metric} counter', f'{metric} {value}']
+
+    for name, histogram in sorted(metrics.histograms.items()):
+        metric = f'{prefix}_{name}'
+        lines.append(f'# TYPE {metric} histogram')
+        for bound, count in zip(PROMETHEUS_BOUNDS, histogram.cumulative(PROMETHEUS_BOUNDS)):
+            lines.append(f'{metric}_bucket{{le="{bound:g}"}} {count}')
+        lines += [f'{metric}_bucket{{le="+Inf"}} {histogram.count}',
+                  f'{metric}_sum {histogram.total:.9f}', f'{metric}_count {histogram.count}']
+
+    typed = set()
+    for name, kind, labels, value in values:
+        metric = f'{prefix}_{name}'
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f'# TYPE {metric} {kind}')
+        lines.append(f'{metric}{_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class _Fields:
+    """ key=value rendering, done only if a handler actually emits the record """
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return ' '.join(f'{key}={value}' for key, value in self.fields.items())
+
+
+class EventLog:
+    """
+        Structured log lines, 'event key=value ...', on top of a logger.
+        event() logs at the given level if the logger has it enabled; trace()
+        is for per-packet events and logs one in sample_every occurrences of
+        each event name, at DEBUG. Nothing is formatted for records that are
+        not emitted.
+    """
+
+    def __init__(self, logger, sample_every=100):
+        self.logger = logger
+        self.sample_every = sample_every
+        self.seen = collections.Counter()
+
+    def event(self, level, event, **fields):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, '%s %s', event, _Fields(fields))
+
+    def trace(self, event, **fields):
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        n = self.seen[event]
+        self.seen[event] = n + 1
+        if n % self.sample_every == 0:
+            self.logger.debug('%s %s', event, _Fields(dict(fields, sampled=self.sample_every)))
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    metrics = Metrics()
+    counter = collections.Counter()
+    for label, fn in [('plain Counter +=', lambda: counter.__setitem__('x', counter['x'] + 1)),
+                      ('Metrics.inc', lambda: metrics.inc('packet_ins')),
+                      ('Metrics.observe', lambda: metrics.observe('latency', 0.000123))]:
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        print(f'{label:18} {(time.perf_counter() - start) / n * 1e9:6.0f} ns per call')
+
+    histogram = metrics.histograms['latency']
+    for seconds in (1e-6, 5e-5, 1.23e-3, 0.25, 3.0):
+        upper = Histogram.upper(Histogram.index(int(seconds * 1e6))) / 1e6
+        assert seconds <= upper < seconds * (1 + 2 / Histogram.SUB_BUCKETS) + 1e-6
+    print(f'histogram: {len(histogram.counts)} buckets, p50 of {histogram.count} samples '
+          f'{histogram.percentile(50) * 1e6:.0f} us (recorded 123 us)')
@@ -0,0 +1,59 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+# REST view of a routing app's counters, on the WSGI server ryu-manager starts
+# for apps with a 'wsgi' context (port 8080 by default):
+#   curl http://localhost:8080/router/stats
+#   curl http://localhost:8080/router/metrics      Prometheus text format
+
+import json
+
+from metrics import prometheus_text
+
+from ryu.app.wsgi import ControllerBase, Response, route
+
+APP_INSTANCE = 'router_app'
+PREFIX = 'router'
+
+
+class RouterStatsController(ControllerBase):
+
+    def __init__(self, req, link, data, **config):
+        super(RouterStatsController, self).__init__(req, link, data, **config)
+        self.app = data[APP_INSTANCE]
+
+    # The app's stats() as JSON; built on request, nothing is kept for it
+    @route('router', '/router/stats', methods=['GET'])
+    def stats(self, req, **kwargs):
+        body = json.dumps(self.app.stats(), default=str, sort_keys=True)
+        return Response(content_type='application/json', charset='utf-8', text=body)
+
+    # Counters, latency histograms and the app's current values for a Prometheus scrape
+    @route('router', '/router/metrics', methods=['GET'])
+    def metrics(self, req, **kwargs):
+        body = prometheus_text(PREFIX, self.app.metrics, self.app.metric_values())
+        return Response(content_type='text/plain; version=0.0.4', charset='utf-8', text=body)
+
+
+# wsgi is None when the app runs outside ryu-manager, e.g. in testbench.py
+def register(app, wsgi):
+    if wsgi is not None:
+        wsgi.register(RouterStatsController, {APP_INSTANCE: app})
@@ -0,0 +1,341 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Message construction for the routers' hot path: serialized ARP replies per
+# (target, requester), output actions and instructions per (datapath, ports),
+# and FlowMods encoded straight to wire format instead of through OFPMatch
+# and OFPFlowMod objects. Matches with fields not listed in OXM_FIELDS still
+# go through Ryu.
+# Usage: python3 msg_cache.py [N]   cost per message, Ryu objects vs cached, N messages
+
+import socket
+import struct
+import sys
+import time
+
+from ryu.lib.packet import packet, ethernet, ether_types
+from ryu.lib.packet import arp
+from ryu.ofproto import ofproto_v1_3 as ofproto
+from ryu.ofproto import ofproto_v1_3_parser as ofproto_parser
+
+_XID = struct.Struct('!I')
+_FLOW_MOD = struct.Struct(ofproto.OFP_HEADER_PACK_STR + ofproto.OFP_FLOW_MOD_PACK_STR0[1:])
+_MATCH = struct.Struct('!HH')               # type, length
+_INSTRUCTION = struct.Struct(ofproto.OFP_INSTRUCTION_ACTIONS_PACK_STR)
+_OUTPUT = struct.Struct(ofproto.OFP_ACTION_OUTPUT_PACK_STR)
+_GROUP = struct.Struct(ofproto.OFP_ACTION_GROUP_PACK_STR)
+_ARP = struct.Struct('!6s6sHHHBBH6s4s6s4s18x')   # padded to 60 bytes, as Ryu does
+
+
+def _ipv4(value):
+    return socket.inet_aton(value) if isinstance(value, str) else value.to_bytes(4, 'big')
+
+
+def _mac(value):
+    return bytes.fromhex(value.replace(':', ''))
+
+
+# OXM fields FlowMods are encoded for, in the order Ryu serializes them
+# (prerequisites first): name -> (field, value struct, value encoder)
+OXM_FIELDS = {
+    'eth_type': (ofproto.OFPXMT_OFB_ETH_TYPE, struct.Struct('!H'), None),
+    'ip_proto': (ofproto.OFPXMT_OFB_IP_PROTO, struct.Struct('!B'), None),
+    'ipv4_src': (ofproto.OFPXMT_OFB_IPV4_SRC, struct.Struct('!4s'), _ipv4),
+    'ipv4_dst': (ofproto.OFPXMT_OFB_IPV4_DST, struct.Struct('!4s'), _ipv4),
+    'tcp_src': (ofproto.OFPXMT_OFB_TCP_SRC, struct.Struct('!H'), None),
+    'tcp_dst': (ofproto.OFPXMT_OFB_TCP_DST, struct.Struct('!H'), None),
+    'udp_src': (ofproto.OFPXMT_OFB_UDP_SRC, struct.Struct('!H'), None),
+    'udp_dst': (ofproto.OFPXMT_OFB_UDP_DST, struct.Struct('!H'), None),
+}
+_OXM_HEADER = struct.Struct('!I')
+
+
+def encode_match(fields):
+    """
+        ofp_match bytes, padded to 8, for fields as OFPMatch keywords; a value
+        may be (value, mask). None if a field is not in OXM_FIELDS.
+    """
+    if not fields.keys() <= OXM_FIELDS.keys():
+        return None
+
+    tlvs = []
+    for name, (field, value_struct, encode) in OXM_FIELDS.items():
+        value = fields.get(name)
+        if value is None:
+            continue
+        size = value_struct.size
+        if isinstance(value, tuple):
+            value, mask = value
+            if encode is not None:
+                value, mask = encode(value), encode(mask)
+            tlvs += [_OXM_HEADER.pack(ofproto.oxm_tlv_header_w(field, size)),
+                     value_struct.pack(value), value_struct.pack(mask)]
+        else:
+            if encode is not None:
+                value = encode(value)
+            tlvs += [_OXM_HEADER.pack(ofproto.oxm_tlv_header(field, size)),
+                     value_struct.pack(value)]
+
+    body = b''.join(tlvs)
+    length = _MATCH.size + len(body)
+    return _MATCH.pack(ofproto.OFPMT_OXM, length) + body + bytes(-length % 8)
+
+
+class EncodedMsg:
+    """
+        An OpenFlow message already in wire format. It answers the calls that
+        Datapath.set_xid(), Datapath.send_msg() and FlowBatcher.flush() make
+        on a Ryu message, so it can be queued or sent like one.
+    """
+
+    __slots__ = ('buf', 'xid')
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.xid = None
+
+    def set_xid(self, xid):
+        self.xid = xid
+        _XID.pack_into(self.buf, 4, xid)
+
+    def serialize(self):
+        pass
+
+
+class MessageCache:
+    """
+        The parts of PacketOuts and FlowMods that repeat from message to
+        message, built once. Actions and instruction bytes are kept per
+        datapath and dropped by forget(dpid) when the switch goes; cached
+        action lists are shared, so callers must not modify them.
+
+        ARP replies are keyed by both hosts' IP and MAC, so a host that moves
+        or changes its MAC just misses; at most arp_capacity are kept, the
+        oldest are dropped first.
+    """
+
+    def __init__(self, arp_capacity=4096):
+        self.arp_capacity = arp_capacity
+        self.arp_replies = {}       # (target ip, target mac, requester ip, requester mac) -> frame
+        self.actions = {}           # dpid -> {ports: [OFPActionOutput, ...]}
+        self.instructions = {}      # dpid -> {(action type, port or group): bytes}
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0          # FlowMods left to Ryu, their match had other fields
+
+    def forget(self, dpid):
+        self.actions.pop(dpid, None)
+        self.instructions.pop(dpid, None)
+
+    def arp_reply(self, target_ip, target_mac, requester_ip, requester_mac):
+        key = (target_ip, target_mac, requester_ip, requester_mac)
+        frame = self.arp_replies.get(key)
+        if frame is not None:
+            self.hits += 1
+            return frame
+
+        self.misses += 1
+        frame = _ARP.pack(_mac(requester_mac), _mac(target_mac), ether_types.ETH_TYPE_ARP,
+                                1, ether_types.ETH_TYPE_IP, 6, 4, arp.ARP_REPLY,
+                                _mac(target_mac), _ipv4(target_ip),
+                                _mac(requester_mac), _ipv4(requester_ip))
+        if len(self.arp_replies) >= self.arp_capacity:
+            del self.arp_replies[next(iter(self.arp_replies))]
+        self.arp_replies[key] = frame
+        return frame
+
+    # Broadcast request for target_ip on behalf of the sender host; not kept,
+    # callers hold requests down per target anyway
+    def arp_request(self, target_ip, sender_ip, sender_mac):
+        return _ARP.pack(b'\xff' * 6, _mac(sender_mac), ether_types.ETH_TYPE_ARP,
+                         1, ether_types.ETH_TYPE_IP, 6, 4, arp.ARP_REQUEST,
+                         _mac(sender_mac), _ipv4(sender_ip), bytes(6), _ipv4(target_ip))
+
+    # [OFPActionOutput(port), ...] for a PacketOut or bucket on datapath
+    def output_actions(self, datapath, *ports):
+        cache = self.actions.setdefault(datapath.id, {})
+        actions = cache.get(ports)
+        if actions is not None:
+            self.hits += 1
+            return actions
+
+        self.misses += 1
+        parser = datapath.ofproto_parser
+        actions = cache[ports] = [parser.OFPActionOutput(port) for port in ports]
+        return actions
+
+    # Apply-actions instruction bytes with a single output or group action
+    def _instructions(self, dpid, out_port, group_id):
+        cache = self.instructions.setdefault(dpid, {})
+        if group_id is None:
+            key = (ofproto.OFPAT_OUTPUT, out_port)
+        else:
+            key = (ofproto.OFPAT_GROUP, group_id)
+        inst = cache.get(key)
+        if inst is not None:
+            self.hits += 1
+            return inst
+
+        self.misses += 1
+        if group_id is None:
+            action = _OUTPUT.pack(ofproto.OFPAT_OUTPUT, _OUTPUT.size, out_port, ofproto.OFPCML_MAX)
+        else:
+            action = _GROUP.pack(ofproto.OFPAT_GROUP, _GROUP.size, group_id)
+        inst = cache[key] = _INSTRUCTION.pack(ofproto.OFPIT_APPLY_ACTIONS,
+                                              _INSTRUCTION.size + len(action)) + action
+        return inst
+
+    def flow_mod(self, datapath, priority, fields, out_port=None, group_id=None,
+                 idle_timeout=0, flags=0, cookie=0, command=ofproto.OFPFC_ADD):
+        """
+            FlowMod matching fields and outputting to out_port, or to group_id,
+            as an EncodedMsg. Delete commands carry no instructions and match
+            any out_port/out_group, as delete_entry sends them. Falls back to
+            an OFPFlowMod when the match has fields encode_match can't do.
+        """
+        match = encode_match(fields)
+        deleting = command in (ofproto.OFPFC_DELETE, ofproto.OFPFC_DELETE_STRICT)
+        if match is None:
+            self.fallbacks += 1
+            return self._ryu_flow_mod(datapath, priority, fields, out_port, group_id,
+                                      idle_timeout, flags, cookie, command, deleting)
+
+        if deleting:
+            inst = b''
+            out_port, out_group = ofproto.OFPP_ANY, ofproto.OFPG_ANY
+        else:
+            inst = self._instructions(datapath.id, out_port, group_id)
+            out_port, out_group = 0, 0
+        length = _FLOW_MOD.size + len(match) + len(inst)
+        buf = bytearray(_FLOW_MOD.pack(ofproto.OFP_VERSION, ofproto.OFPT_FLOW_MOD, length, 0,
+                                       cookie, 0, 0, command, idle_timeout, 0, priority,
+                                       ofproto.OFP_NO_BUFFER, out_port, out_group, flags))
+        buf += match
+        buf += inst
+        return EncodedMsg(buf)
+
+    @staticmethod
+    def _ryu_flow_mod(datapath, priority, fields, out_port, group_id,
+                      idle_timeout, flags, cookie, command, deleting):
+        parser = datapath.ofproto_parser
+        match = parser.OFPMatch(**fields)
+        if deleting:
+            return parser.OFPFlowMod(datapath=datapath, command=command, priority=priority,
+                                     out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY,
+                                     match=match)
+        if group_id is None:
+            actions = [parser.OFPActionOutput(out_port)]
+        else:
+            actions = [parser.OFPActionGroup(group_id)]
+        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+        return parser.OFPFlowMod(datapath=datapath, cookie=cookie, command=command,
+                                 priority=priority, idle_timeout=idle_timeout, flags=flags,
+                                 match=match, instructions=inst)
+
+
+class _Datapath:
+    id = 1
+    ofproto = ofproto
+    ofproto_parser = ofproto_parser
+
+
+def _ryu_arp_reply(target_ip, target_mac, requester_ip, requester_mac):
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet(dst=requester_mac, src=target_mac,
+                                       ethertype=ether_types.ETH_TYPE_ARP))
+    pkt.add_protocol(arp.arp(hwtype=1, proto=0x0800, hlen=6, plen=4, opcode=arp.ARP_REPLY,
+                             src_mac=target_mac, src_ip=target_ip,
+                             dst_mac=requester_mac, dst_ip=requester_ip))
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def _ryu_arp_request(target_ip, sender_ip, sender_mac):
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet(dst='ff:ff:ff:ff:ff:ff', src=sender_mac,
+                                       ethertype=ether_types.ETH_TYPE_ARP))
+    pkt.add_protocol(arp.arp(opcode=arp.ARP_REQUEST, src_mac=sender_mac, src_ip=sender_ip,
+                             dst_mac='00:00:00:00:00:00', dst_ip=target_ip))
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def _wire(msg, xid=7):
+    msg.set_xid(xid)
+    msg.serialize()
+    return bytes(msg.buf)
+
+
+def _timed(n, fn):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    dp = _Datapath()
+    cache = MessageCache()
+    hosts = ('10.0.0.2', '00:00:00:00:00:02', '10.3.1.3', '00:00:00:00:03:13')
+    flow = {'eth_type': 0x0800, 'ipv4_dst': '10.3.1.3', 'ipv4_src': '10.0.0.2',
+            'ip_proto': 6, 'tcp_src': 40000, 'tcp_dst': 80}
+    prefix = {'eth_type': 0x0800, 'ipv4_dst': ('10.3.0.0', '255.255.0.0')}
+
+    # Same bytes on the wire as Ryu's own objects
+    assert cache.arp_reply(*hosts) == _ryu_arp_reply(*hosts)
+    assert cache.arp_request(hosts[2], *hosts[:2]) == _ryu_arp_request(hosts[2], *hosts[:2])
+    for fields, kwargs in [(flow, dict(out_port=3, idle_timeout=10, flags=1, cookie=0x5a)),
+                           (prefix, dict(out_port=2)), (prefix, dict(group_id=4)),
+                           (flow, dict(command=ofproto.OFPFC_DELETE_STRICT))]:
+        deleting = kwargs.get('command') == ofproto.OFPFC_DELETE_STRICT
+        expected = MessageCache._ryu_flow_mod(
+            dp, 1000, fields, kwargs.get('out_port'), kwargs.get('group_id'),
+            kwargs.get('idle_timeout', 0), kwargs.get('flags', 0), kwargs.get('cookie', 0),
+            kwargs.get('command', ofproto.OFPFC_ADD), deleting)
+        assert _wire(cache.flow_mod(dp, 1000, fields, **kwargs)) == _wire(expected), fields
+
+    def ryu_packet_out(data):
+        return dp.ofproto_parser.OFPPacketOut(
+            datapath=dp, buffer_id=ofproto.OFP_NO_BUFFER, in_port=ofproto.OFPP_CONTROLLER,
+            actions=[dp.ofproto_parser.OFPActionOutput(3)], data=data)
+
+    def cached_packet_out(data):
+        return dp.ofproto_parser.OFPPacketOut(
+            datapath=dp, buffer_id=ofproto.OFP_NO_BUFFER, in_port=ofproto.OFPP_CONTROLLER,
+            actions=cache.output_actions(dp, 3), data=data)
+
+    frame = cache.arp_reply(*hosts)
+    for label, ryu, cached in [
+            ('ARP reply frame', lambda: _ryu_arp_reply(*hosts), lambda: cache.arp_reply(*hosts)),
+            ('PacketOut + serialize', lambda: _wire(ryu_packet_out(frame)),
+             lambda: _wire(cached_packet_out(frame))),
+            ('per-flow FlowMod', lambda: _wire(MessageCache._ryu_flow_mod(
+                dp, 1000, flow, 3, None, 10, 1, 0x5a, ofproto.OFPFC_ADD, False)),
+             lambda: _wire(cache.flow_mod(dp, 1000, flow, 3, idle_timeout=10, flags=1,
+                                          cookie=0x5a))),
+            ('prefix FlowMod', lambda: _wire(MessageCache._ryu_flow_mod(
+                dp, 1000, prefix, 2, None, 0, 0, 0, ofproto.OFPFC_ADD, False)),
+             lambda: _wire(cache.flow_mod(dp, 1000, prefix, 2)))]:
+        print(f'{label:22} Ryu {_timed(n, ryu):6.1f} us   cached {_timed(n, cached):6.1f} us')
+    print(f'cache hits {cache.hits}, misses {cache.misses}')
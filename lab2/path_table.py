@@ -0,0 +1,260 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+import heapq
+import zlib
+
+INFINITY = float('inf')
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+
+def flow_hash(*fields):
+    """
+        Stable hash of a flow's header fields (e.g. the 5-tuple), used to pick
+        among equal-cost paths so every packet of a flow takes the same one.
+    """
+    return zlib.crc32('|'.join(map(str, fields)).encode())
+
+
+def five_tuple(src_ip, dst_ip, proto, src_port=None, dst_port=None):
+    """
+        OFPMatch fields of a flow's 5-tuple. The ports become tcp_* or udp_*
+        by protocol and are left out when unknown (non-first fragments,
+        other protocols).
+    """
+    fields = {'ipv4_src': src_ip, 'ipv4_dst': dst_ip, 'ip_proto': proto}
+    if src_port is not None:
+        if proto == IPPROTO_TCP:
+            fields.update(tcp_src=src_port, tcp_dst=dst_port)
+        elif proto == IPPROTO_UDP:
+            fields.update(udp_src=src_port, udp_dst=dst_port)
+    return fields
+
+
+# The ECMP choice for a flow's OFPMatch fields, whatever their order
+def fields_hash(fields):
+    return flow_hash(*sorted(fields.items()))
+
+
+def shortest_path(graph, start, goal):
+    """
+        Single-pair Dijkstra over graph {node: [(neighbor, weight, port), ...]}.
+        This is the per-packet search the routers used before the path table.
+    """
+    visited = set()
+    min_heap = [(0, start, [])] # (cost, node, path_so_far)
+
+    while min_heap:
+        cost, current_node, path = heapq.heappop(min_heap)
+
+        if current_node in visited:
+            continue
+
+        visited.add(current_node)
+        path = path + [current_node]
+
+        if current_node == goal:
+            return path
+
+        for neighbor, weight, _ in graph.get(current_node, []):
+            if neighbor not in visited:
+                heapq.heappush(min_heap, (cost + weight, neighbor, path))
+
+    return [] # no path found
+
+
+def _edge_key(u, v):
+    return (u, v) if u <= v else (v, u)
+
+
+class PathTable:
+    """
+        All-pairs shortest paths over the switch graph, computed once per
+        topology and served from a dpid-indexed table.
+
+        The graph dict is shared with the owner, who mutates it and then calls
+        link_added/link_removed so that only the affected sources are redone.
+    """
+
+    def __init__(self, graph=None):
+        self.graph = {} if graph is None else graph   # dpid -> list of (neighbor, weight, port)
+        self.dist = {}          # src -> {dst: cost}
+        self.paths = {}         # src -> {dst: (src, ..., dst)}
+        self.tree_edges = {}    # src -> edge keys used by the tree rooted at src
+        self.edge_users = {}    # edge key -> set of sources whose tree uses it
+        self.hop_cache = {}     # (node, dst) -> equal-cost next hops
+        self.path_hits = 0      # path lookups answered from the table
+        self.path_misses = 0    # ... and those with no route
+        self.hop_hits = 0       # next_hops lookups served from hop_cache
+        self.hop_misses = 0
+
+    def rebuild(self, graph):
+        self.graph = graph
+        self.dist.clear()
+        self.paths.clear()
+        self.tree_edges.clear()
+        self.edge_users.clear()
+
+        for src in graph:
+            self._compute_source(src)
+
+    def get_path(self, src, dst):
+        path = self.paths.get(src, {}).get(dst, ())
+        if path:
+            self.path_hits += 1
+        else:
+            self.path_misses += 1
+        return path
+
+    def get_cost(self, src, dst):
+        return self.dist.get(src, {}).get(dst, INFINITY)
+
+    # All neighbors of node that lie on some shortest path to dst
+    def next_hops(self, node, dst):
+        key = (node, dst)
+        hops = self.hop_cache.get(key)
+        if hops is not None:
+            self.hop_hits += 1
+        else:
+            self.hop_misses += 1
+            cost = self.get_cost(node, dst)
+            hops = tuple(sorted(
+                neighbor for neighbor, weight, _ in self.graph.get(node, [])
+                if self.get_cost(neighbor, dst) + weight == cost))
+            self.hop_cache[key] = hops
+        return hops
+
+    def get_ecmp_path(self, src, dst, flow):
+        """
+            One of the equal-cost shortest paths from src to dst, chosen by the
+            flow hash: each hop with several next hops consumes a digit of the
+            hash in mixed radix, so all equal-cost paths are reachable.
+        """
+        if self.get_cost(src, dst) == INFINITY:
+            self.path_misses += 1
+            return ()
+
+        self.path_hits += 1
+        path = [src]
+        node = src
+        while node != dst:
+            hops = self.next_hops(node, dst)
+            flow, choice = divmod(flow, len(hops))
+            node = hops[choice]
+            path.append(node)
+        return tuple(path)
+
+    # Call after an isolated node has been added to the graph
+    def node_added(self, node):
+        self.hop_cache.clear()
+        if node not in self.paths:
+            self._compute_source(node)
+
+    # Call after the edge u <-> v has been added to the graph
+    def link_added(self, u, v, weight=1):
+        self.hop_cache.clear()
+        self.node_added(u)
+        self.node_added(v)
+
+        affected = []
+        for src, dist in self.dist.items():
+            du = dist.get(u, INFINITY)
+            dv = dist.get(v, INFINITY)
+            if du == INFINITY and dv == INFINITY:
+                continue
+            # The new edge shortens some path from src only if it bridges a
+            # gap larger than its own weight
+            if abs(du - dv) > weight:
+                affected.append(src)
+
+        for src in affected:
+            self._compute_source(src)
+        return affected
+
+    # Call after the edge u <-> v has been removed from the graph
+    def link_removed(self, u, v):
+        self.hop_cache.clear()
+        affected = list(self.edge_users.pop(_edge_key(u, v), ()))
+        for src in affected:
+            self._compute_source(src)
+        return affected
+
+    # Call after the node and all of its edges have been removed from the graph
+    def node_removed(self, node):
+        self.hop_cache.clear()
+        affected = set()
+        for key in list(self.edge_users):
+            if node in key:
+                affected.update(self.edge_users.pop(key))
+        self._drop_source(node)
+        affected.discard(node)
+
+        for src in affected:
+            self._compute_source(src)
+        return sorted(affected)
+
+    def _drop_source(self, src):
+        for key in self.tree_edges.pop(src, ()):
+            users = self.edge_users.get(key)
+            if users is not None:
+                users.discard(src)
+                if not users:
+                    del self.edge_users[key]
+        self.dist.pop(src, None)
+        self.paths.pop(src, None)
+
+    def _compute_source(self, src):
+        self._drop_source(src)
+        self.hop_cache.clear()
+
+        dist = {}
+        parent = {}
+        min_heap = [(0, src, None)] # (cost, node, parent)
+
+        while min_heap:
+            cost, node, prev = heapq.heappop(min_heap)
+            if node in dist:
+                continue
+
+            dist[node] = cost
+            parent[node] = prev
+
+            for neighbor, weight, _ in self.graph.get(node, []):
+                if neighbor not in dist:
+                    heapq.heappush(min_heap, (cost + weight, neighbor, node))
+
+        # Nodes pop in cost order, so every parent path exists before its children
+        paths = {}
+        edges = []
+        for node in dist:
+            prev = parent[node]
+            if prev is None:
+                paths[node] = (node,)
+            else:
+                paths[node] = paths[prev] + (node,)
+                key = _edge_key(prev, node)
+                edges.append(key)
+                self.edge_users.setdefault(key, set()).add(src)
+
+        self.dist[src] = dist
+        self.paths[src] = paths
+        self.tree_edges[src] = edges
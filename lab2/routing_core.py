@@ -0,0 +1,340 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+import ipaddress
+import logging
+
+from ryu.base import app_manager
+from ryu.controller import ofp_event
+from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER
+from ryu.controller.handler import set_ev_cls
+from ryu.ofproto import ofproto_v1_3
+
+from ryu.topology import event
+from ryu.app.wsgi import WSGIApplication
+
+import ft_tables
+from addressing import is_host_port
+from path_table import fields_hash
+from topo_store import TopologyStore
+from host_directory import HostDirectory
+from flow_batch import FlowBatcher
+from msg_cache import MessageCache
+from metrics import Metrics, EventLog
+import metrics_api
+
+
+def _ip(value):
+    return int(ipaddress.ip_address(value))
+
+
+class ShortestPaths:
+    """ Path providers: the switch path a packet from src to dst should take """
+
+    per_flow = False                    # path depends on more than the destination
+
+    def __init__(self, topology, k):
+        self.topology = topology
+
+    # fields: OFPMatch fields identifying the flow, empty unless per_flow
+    def path(self, src, dst, dst_ip, fields):
+        return self.topology.get_path(src, dst)
+
+
+class EcmpPaths(ShortestPaths):
+    """ One of the equal-cost shortest paths, picked by a hash of the flow's 5-tuple """
+
+    per_flow = True
+
+    def path(self, src, dst, dst_ip, fields):
+        flow = fields_hash(dict(fields, ipv4_dst=dst_ip))
+        return self.topology.get_ecmp_path(src, dst, flow)
+
+
+class TwoLevelPaths(ShortestPaths):
+    """
+        The path the two-level tables of ft_tables would forward dst_ip on,
+        followed over the discovered links; empty once one of them is gone,
+        as the static tables have no way around it.
+    """
+
+    def __init__(self, topology, k):
+        super(TwoLevelPaths, self).__init__(topology, k)
+        self.tables = {}                # dpid -> [(value, mask, out_port)], most specific first
+        for dpid, rules in ft_tables.generate_tables(k).items():
+            rules = sorted((rule for rule in rules if rule.eth_type == ft_tables.ETH_TYPE_IP),
+                           key=lambda rule: -rule.priority)
+            self.tables[dpid] = [(_ip(rule.ip) & _ip(rule.mask), _ip(rule.mask), rule.out_port)
+                                 for rule in rules]
+
+    def path(self, src, dst, dst_ip, fields):
+        address = _ip(dst_ip)
+        path = [src]
+        while path[-1] != dst:
+            out_port = next((port for value, mask, port in self.tables.get(path[-1], ())
+                             if address & mask == value), None)
+            node = self.topology.get_neighbor(path[-1], out_port)
+            if node is None or node in path:
+                return ()
+            path.append(node)
+        return tuple(path)
+
+
+PATH_PROVIDERS = {'shortest': ShortestPaths, 'ecmp': EcmpPaths, 'two_level': TwoLevelPaths}
+
+# SPRouter settings of each routing strategy, for benchmarks that compare them
+STRATEGIES = {
+    'shortest': {'RULE_MODE': 'host', 'PATHS': 'shortest'},
+    'prefix': {'RULE_MODE': 'prefix', 'PATHS': 'shortest'},
+    'two-level': {'RULE_MODE': 'host', 'PATHS': 'two_level'},
+    'ecmp': {'RULE_MODE': 'ecmp', 'PATHS': 'ecmp', 'TRAFFIC_AWARE': False},
+    'traffic-aware': {'RULE_MODE': 'ecmp', 'PATHS': 'ecmp', 'TRAFFIC_AWARE': True},
+}
+
+
+class RoutingCore(app_manager.RyuApp):
+    """
+        What every fat-tree router here shares: the switch handshake with its
+        table-miss entry, batched FlowMods, PacketOuts, topology discovery
+        into a TopologyStore, the host directory with ARP replies on behalf
+        of hosts, and the metrics behind /router/stats and /router/metrics.
+
+        Routers plug in through configure_switch(), datapath_gone(),
+        link_up() and link_down() rather than their own handlers for these
+        events, and extend stats() and metric_values().
+    """
+
+    OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+    _CONTEXTS = {'wsgi': WSGIApplication}
+
+    NUM_PORTS = 4                       # k of the fat-tree
+
+    # Pre-fill the host directory from fat-tree.py's address and MAC layout,
+    # so ARP requests are answered without ever reaching another host
+    SEED_HOSTS = True
+    TRACE_SAMPLE = 100                  # per-packet events logged at DEBUG, one in N
+
+    def __init__(self, *args, **kwargs):
+        super(RoutingCore, self).__init__(*args, **kwargs)
+
+        # Initialize the topology with #ports=NUM_PORTS
+        self.num_ports = self.NUM_PORTS
+        self.topology = TopologyStore() # switch graph, port index and path table
+        self.switch_datapaths = {}      # dpid -> datapath
+        self.host_directory = HostDirectory()   # ip -> (mac, dpid, port)
+        if self.SEED_HOSTS:
+            self.host_directory.seed_fattree(self.num_ports)
+        self.flow_batcher = FlowBatcher()   # queued FlowMods, flushed with a barrier
+        self.msg_cache = MessageCache()     # ARP replies, actions and FlowMod encoding
+        self.metrics = Metrics()        # counters and latency histograms, see stats()
+        self.events = EventLog(self.logger, self.TRACE_SAMPLE)
+        metrics_api.register(self, kwargs.get('wsgi'))
+
+
+    @set_ev_cls(ofp_event.EventOFPStateChange, [CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER])
+    def _state_change_handler(self, ev):
+        dp = ev.datapath
+        if ev.state == MAIN_DISPATCHER:
+            self.switch_datapaths[dp.id] = dp
+        elif ev.state == DEAD_DISPATCHER and dp.id is not None:
+            self.flow_batcher.datapath_gone(dp.id)
+            self.msg_cache.forget(dp.id)
+            self.datapath_gone(dp.id)
+
+
+    @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
+    def switch_features_handler(self, ev):
+        datapath = ev.msg.datapath
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        # Install entry-miss flow entry
+        match = parser.OFPMatch()
+        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
+                                          ofproto.OFPCML_NO_BUFFER)]
+        self.add_flow(datapath, 0, match, actions)
+
+        self.configure_switch(datapath)
+        self.flow_batcher.flush()
+
+
+    @set_ev_cls(ofp_event.EventOFPBarrierReply, [CONFIG_DISPATCHER, MAIN_DISPATCHER])
+    def barrier_reply_handler(self, ev):
+        msg = ev.msg
+        self.flow_batcher.barrier_reply(msg.datapath.id, msg.xid)
+
+
+    # A rejected FlowMod or GroupMod fails its batch's install future before
+    # the barrier behind it would complete it
+    @set_ev_cls(ofp_event.EventOFPErrorMsg, [CONFIG_DISPATCHER, MAIN_DISPATCHER])
+    def error_msg_handler(self, ev):
+        msg = ev.msg
+        batched = self.flow_batcher.error(msg.datapath.id, msg.xid)
+        self.metrics.inc('of_errors')
+        self.events.event(logging.WARNING, 'of_error', dpid=msg.datapath.id, xid=msg.xid,
+                          type=msg.type, code=msg.code, batched=batched)
+
+
+    # Topology discovery: apply switch and link deltas as Ryu reports them
+    @set_ev_cls(event.EventSwitchEnter)
+    def switch_enter_handler(self, ev):
+        self.topology.add_switch(ev.switch.dp.id)
+
+
+    @set_ev_cls(event.EventSwitchLeave)
+    def switch_leave_handler(self, ev):
+        dpid = ev.switch.dp.id
+        self.topology.remove_switch(dpid)
+        self.switch_datapaths.pop(dpid, None)
+
+
+    @set_ev_cls(event.EventLinkAdd)
+    def link_add_handler(self, ev):
+        src = ev.link.src
+        dst = ev.link.dst
+        if self.topology.add_link(src.dpid, src.port_no, dst.dpid, dst.port_no):
+            self.link_up(src.dpid, dst.dpid)
+
+
+    @set_ev_cls(event.EventLinkDelete)
+    def link_delete_handler(self, ev):
+        self.link_down(ev.link.src.dpid, ev.link.dst.dpid)
+
+
+    # A port going down is usually seen here before LLDP times the link out
+    @set_ev_cls(event.EventPortModify)
+    def port_modify_handler(self, ev):
+        port = ev.port
+        neighbor = self.topology.get_neighbor(port.dpid, port.port_no)
+        if neighbor is not None and port.is_down():
+            self.link_down(port.dpid, neighbor)
+
+
+    # Hooks for the routers; the FlowMods they queue are flushed by the caller
+    def configure_switch(self, datapath):
+        pass
+
+
+    def datapath_gone(self, dpid):
+        pass
+
+
+    def link_up(self, src, dst):
+        pass
+
+
+    # Failures are applied right away, even inside a burst of topology
+    # events, so the router can repair against the new distances. Returns
+    # True if the link was known.
+    def link_down(self, src, dst):
+        if not self.topology.remove_link(src, dst, defer=False):
+            return False
+        self.events.event(logging.INFO, 'link_down', src=src, dst=dst)
+        return True
+
+
+    # Queue a flow entry for the flow-table, sent on the next flow_batcher.flush()
+    def add_flow(self, datapath, priority, match, actions, idle_timeout=0, flags=0, cookie=0):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        # Construct flow_mod message and queue it
+        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+        mod = parser.OFPFlowMod(datapath=datapath, cookie=cookie, priority=priority,
+                                idle_timeout=idle_timeout, flags=flags,
+                                match=match, instructions=inst)
+        self.flow_batcher.add(datapath, mod)
+        self.metrics.inc('flow_mods')
+
+
+    # Send data out of port on a switch, OFPP_TABLE runs it through the flow table
+    def send_packet_out(self, dpid, out_port, data):
+        dp = self.switch_datapaths[dpid]
+        parser = dp.ofproto_parser
+        out = parser.OFPPacketOut(datapath=dp, buffer_id=dp.ofproto.OFP_NO_BUFFER,
+                                  in_port=dp.ofproto.OFPP_CONTROLLER,
+                                  actions=self.msg_cache.output_actions(dp, out_port), data=data)
+        dp.send_msg(out)
+        self.metrics.inc('packet_outs')
+
+
+    # One PacketOut per edge switch, copying data to each of its host ports;
+    # returns the number of PacketOuts sent
+    def flood_to_hosts(self, data, in_dpid, in_port):
+        sent = 0
+        for dpid, dp in self.switch_datapaths.items():
+            ports = [port for port in range(1, self.num_ports // 2 + 1)
+                     if is_host_port(self.num_ports, dpid, port)
+                     and (dpid, port) != (in_dpid, in_port)]
+            if not ports:
+                continue
+            parser = dp.ofproto_parser
+            actions = self.msg_cache.output_actions(dp, *ports)
+            dp.send_msg(parser.OFPPacketOut(datapath=dp, buffer_id=dp.ofproto.OFP_NO_BUFFER,
+                                            in_port=dp.ofproto.OFPP_CONTROLLER,
+                                            actions=actions, data=data))
+            sent += 1
+        self.metrics.inc('packet_outs', sent)
+        return sent
+
+
+    # Only packets entering on host-facing ports say where a host lives
+    def learn_host(self, ip, mac, dpid, port):
+        if not is_host_port(self.num_ports, dpid, port):
+            return
+        if self.host_directory.learn(ip, mac, dpid, port):
+            self.events.event(logging.INFO, 'host_learned', ip=ip, mac=mac, dpid=dpid, port=port)
+
+
+    # Answer requester's ARP request for target_ip from the host directory
+    def send_arp_reply_to_requester(self, target_ip, requester_ip):
+        target = self.host_directory.get(target_ip)
+        requester = self.host_directory.get(requester_ip)
+        if requester is None or requester.dpid not in self.switch_datapaths:
+            return
+
+        data = self.msg_cache.arp_reply(target_ip, target.mac, requester_ip, requester.mac)
+        self.send_packet_out(requester.dpid, requester.port, data)
+
+
+    def get_port(self, src, dst):
+        return self.topology.get_port(src, dst)
+
+
+    # Everything /router/stats serves
+    def stats(self):
+        return dict(self.metrics.snapshot(),
+                    hosts=len(self.host_directory),
+                    switches=len(self.switch_datapaths),
+                    flow_batches={'messages': self.flow_batcher.messages,
+                                  'writes': self.flow_batcher.writes,
+                                  'errors': self.flow_batcher.errors},
+                    msg_cache={'hits': self.msg_cache.hits, 'misses': self.msg_cache.misses,
+                               'fallbacks': self.msg_cache.fallbacks,
+                               'arp_replies': len(self.msg_cache.arp_replies)})
+
+
+    # Current values for /router/metrics: (name, type, labels, value)
+    def metric_values(self):
+        return [('hosts', 'gauge', None, len(self.host_directory)),
+                ('switches', 'gauge', None, len(self.switch_datapaths)),
+                ('msg_cache_lookups_total', 'counter', {'result': 'hit'}, self.msg_cache.hits),
+                ('msg_cache_lookups_total', 'counter', {'result': 'miss'}, self.msg_cache.misses)]
@@ -0,0 +1,159 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Compiles a switch path towards a host into per-switch destination entries.
+# With aggregation on, hops before the last one match the destination's edge
+# subnet (10.pod.edge.0/24) or, where every edge switch of the pod is reached
+# through the same port, the whole pod (10.pod.0.0/16).
+# Usage: python3 rule_compiler.py [k ...]   table occupancy, all host pairs
+
+import collections
+import sys
+
+PRIORITY_BASE = 10      # entry priority is PRIORITY_BASE + prefix length
+
+# One destination entry: ipv4_dst=prefix/length on dpid -> out_port
+DstRule = collections.namedtuple('DstRule', ['dpid', 'prefix', 'length', 'out_port'])
+
+MASKS = {16: '255.255.0.0', 24: '255.255.255.0', 32: '255.255.255.255'}
+
+
+def ipv4_dst(prefix, length):
+    """ OFPMatch value for ipv4_dst: plain address for /32, (addr, mask) otherwise """
+    return prefix if length == 32 else (prefix, MASKS[length])
+
+
+class RuleCompiler:
+    """
+        topology provides get_path(src, dst), get_port(src, dst) and switches();
+        switch_info(dpid) returns (role, pod, index), e.g. addressing.decode_dpid.
+    """
+
+    def __init__(self, topology, switch_info, aggregate=True):
+        self.topology = topology
+        self.switch_info = switch_info
+        self.aggregate = aggregate
+        self.version = None
+        self.uniform = {}       # (dpid, pod) -> next hop shared by all edges of pod, or None
+
+    def compile(self, path, dst_ip, dst_port):
+        rules = []
+        octets = dst_ip.split('.')
+        for node, next_node in zip(path, path[1:]):
+            out_port = self.topology.get_port(node, next_node)
+            if out_port is None:
+                continue
+            if not self.aggregate:
+                rules.append(DstRule(node, dst_ip, 32, out_port))
+            elif self._pod_uniform(node, next_node, int(octets[1])):
+                rules.append(DstRule(node, f'10.{octets[1]}.0.0', 16, out_port))
+            else:
+                rules.append(DstRule(node, f'10.{octets[1]}.{octets[2]}.0', 24, out_port))
+
+        rules.append(DstRule(path[-1], dst_ip, 32, dst_port))
+        return rules
+
+    # Does node reach every edge switch of pod through next_node?
+    def _pod_uniform(self, node, next_node, pod):
+        if self.version != self.topology.version:
+            self.version = self.topology.version
+            self.uniform.clear()
+
+        key = (node, pod)
+        if key not in self.uniform:
+            hops = set()
+            for dpid in self.topology.switches():
+                if self.switch_info(dpid)[:2] == ('edge', pod):
+                    path = self.topology.get_path(node, dpid)
+                    hops.add(path[1] if len(path) > 1 else None)
+            self.uniform[key] = hops.pop() if len(hops) == 1 else None
+        return self.uniform[key] == next_node
+
+
+class TableMirror:
+    """
+        Controller-side copy of what each switch's flow table holds, keyed by
+        match fields. Lets the router skip FlowMods for entries already in
+        place and report per-switch table occupancy.
+    """
+
+    def __init__(self):
+        self.tables = {}        # dpid -> {match key: out_port or other action value}
+
+    @staticmethod
+    def key(fields):
+        return tuple(sorted(fields.items()))
+
+    # Record an entry, False if the switch already has it with that action
+    def record(self, dpid, fields, action):
+        table = self.tables.setdefault(dpid, {})
+        key = self.key(fields)
+        if table.get(key) == action:
+            return False
+        table[key] = action
+        return True
+
+    # Drop an entry; with action, only if it still forwards that way
+    def remove(self, dpid, fields, action=None):
+        table = self.tables.get(dpid, {})
+        key = self.key(fields)
+        if action is not None and table.get(key) != action:
+            return False
+        return table.pop(key, None) is not None
+
+    def clear(self, dpid):
+        self.tables.pop(dpid, None)
+
+    def occupancy(self):
+        return {dpid: len(table) for dpid, table in self.tables.items()}
+
+
+def occupancy_report(k):
+    """ Entries per switch when every host pair has a route, per mode """
+    import addressing
+    from topo_store import fattree_store
+
+    store = fattree_store(k)
+    hosts = [(ip,) + addressing.host_location(ip) for ip in addressing.host_ips(k)]
+
+    for aggregate in (False, True):
+        compiler = RuleCompiler(store, addressing.decode_dpid, aggregate)
+        mirror = TableMirror()
+        for _, src_edge, _ in hosts:
+            for dst_ip, dst_edge, dst_port in hosts:
+                for rule in compiler.compile(store.get_path(src_edge, dst_edge), dst_ip, dst_port):
+                    mirror.record(rule.dpid, {'ipv4_dst': ipv4_dst(rule.prefix, rule.length)},
+                                  rule.out_port)
+
+        by_role = collections.defaultdict(list)
+        for node, entries in mirror.occupancy().items():
+            by_role[addressing.decode_dpid(node)[0]].append(entries)
+        summary = '  '.join(f'{role} max {max(counts):5} avg {sum(counts) / len(counts):8.1f}'
+                            for role, counts in sorted(by_role.items()))
+        print(f'k={k:<3} {"prefix" if aggregate else "host":6}  {summary}  '
+              f'total {sum(mirror.occupancy().values())}')
+
+
+if __name__ == '__main__':
+    for k in [int(arg) for arg in sys.argv[1:]] or [4, 8]:
+        occupancy_report(k)
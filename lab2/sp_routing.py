@@ -21,364 +21,598 @@
 
 #!/usr/bin/env python3
 
-from ryu.base import app_manager
-from ryu.controller import mac_to_port
+import logging
+import time
+
 from ryu.controller import ofp_event
-from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
+from ryu.controller.handler import MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
-from ryu.ofproto import ofproto_v1_3
-from ryu.lib.mac import haddr_to_bin
-from ryu.lib.packet import packet, ethernet, ether_types
-from ryu.lib.packet import ipv4
+from ryu.lib import hub
 from ryu.lib.packet import arp
 
-from ryu.topology import event, switches
-from ryu.topology.api import get_switch, get_link
-from ryu.app.wsgi import ControllerBase
-
-import topo
-import heapq
-
-class SPRouter(app_manager.RyuApp):
-
-    OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+from routing_core import RoutingCore, PATH_PROVIDERS
+from fastpath import Classifier, ArpFrame, Ipv4Frame
+from path_table import flow_hash, five_tuple
+from rule_compiler import RuleCompiler, TableMirror, ipv4_dst, PRIORITY_BASE
+from addressing import decode_dpid, is_host_port
+from failover import (Forward, FailoverGroups, destination_switches, loop_free_alternate,
+                      shortest_hops)
+from packet_pipeline import PacketPipeline
+from inflight import InflightTable
+from traffic_monitor import TrafficMonitor, schedule
+
+class SPRouter(RoutingCore):
+
+    # How IPv4 paths become flow entries:
+    #   'ecmp'   - per-flow entries on an equal-cost path picked by 5-tuple hash,
+    #              expiring once the flow goes idle
+    #   'host'   - per-destination /32 entries on the shortest path
+    #   'prefix' - per-destination entries aggregated to 10.pod.edge.0/24 and
+    #              10.pod.0.0/16 wherever the fabric allows it
+    RULE_MODE = 'ecmp'
+    FLOW_IDLE_TIMEOUT = 30
+    FLOW_PRIORITY = PRIORITY_BASE + 33  # above every destination entry
+
+    # Path provider from routing_core.PATH_PROVIDERS: 'shortest', 'ecmp' or
+    # 'two_level'; None picks 'ecmp' for RULE_MODE 'ecmp', else 'shortest'
+    PATHS = None
+
+    ARP_FLOOD_HOLDDOWN = 1.0            # seconds between floods for one target
+    ARP_PENDING_TIMEOUT = 5.0           # seconds an unanswered target is remembered
+    PACKET_IN_WORKERS = 4               # hub green threads, 0 routes in the handler
+    PACKET_IN_QUEUE = 256               # jobs per worker before packet-ins are dropped
+    INFLIGHT_TTL = 2.0                  # seconds a flow install may stay unconfirmed
+
+    # Back every fabric-facing entry with a loop-free alternate in an OFPGT_FF
+    # group, so the switch moves traffic off a dead port on its own
+    FAST_FAILOVER = True
+
+    # In 'ecmp' mode, poll port and flow statistics and move large flows off
+    # busy links onto the least loaded equal-cost path
+    TRAFFIC_AWARE = True
+    LINK_CAPACITY = 15e6                # bits/s, links shaped by fat-tree.py --shape
+    MAX_MOVES = 16                      # flows re-routed per poll round
+    FLOW_COOKIE = 0x5f                  # marks per-flow entries, so polls fetch only those
 
     def __init__(self, *args, **kwargs):
         super(SPRouter, self).__init__(*args, **kwargs)
-        
-        # Initialize the topology with #ports=4
-        self.num_ports = 4
-        self.topo_net = topo.Fattree(self.num_ports)
-        self.graph = {}                 # dpid -> list of (neighbor, weight, port)
-        self.switch_datapaths = {}      # dpid -> datapath
-        self.arp_table = {}             # ip -> mac
-        self.hosts = {}                 # ip -> (dpid -> port)
+
+        paths = self.PATHS or ('ecmp' if self.RULE_MODE == 'ecmp' else 'shortest')
+        self.path_provider = PATH_PROVIDERS[paths](self.topology, self.num_ports)
+        self.flow_tables = TableMirror()    # entries installed per switch, as Forward
+        self.unconfirmed = []           # (dpid, fields, Forward) recorded since the last flush
+        self.failover_groups = FailoverGroups()
+        self.repair_pending = False     # links came up, re-check entries once settled
+        self.rule_compiler = RuleCompiler(self.topology, decode_dpid,
+                                          aggregate=self.RULE_MODE == 'prefix')
+        self.arp_pending = {}           # target ip -> (first flood time, PacketOuts spent)
         self.agg_switches_by_pod = {}   # pod -> list of dpids
         self.core_dpids = []
         self.edge_labelled_graph = {}
         self.arp_replies = []
+        self.classifier = Classifier()  # packet-in fields at fixed offsets, Ryu parser as fallback
+        self.inflight = InflightTable(self.INFLIGHT_TTL)    # (src, dst) installs pending
+        self.packet_pipeline = PacketPipeline(self.PACKET_IN_WORKERS, self.PACKET_IN_QUEUE,
+                                              spawn=hub.spawn, queue_factory=hub.Queue,
+                                              logger=self.logger)
+        self.topology_thread = hub.spawn(self._topology_loop)
+        self.traffic_monitor = TrafficMonitor(self.LINK_CAPACITY)
+        if self.TRAFFIC_AWARE and self.RULE_MODE == 'ecmp':
+            self.monitor_thread = hub.spawn(self._monitor_loop)
 
 
-    @set_ev_cls(ofp_event.EventOFPStateChange, [CONFIG_DISPATCHER, MAIN_DISPATCHER])
-    def _state_change_handler(self, ev):
-        dp = ev.datapath
-        if ev.state == MAIN_DISPATCHER:
-            self.switch_datapaths[dp.id] = dp
+    def datapath_gone(self, dpid):
+        self.flow_tables.clear(dpid)
+        self.failover_groups.clear(dpid)
 
 
-    # Topology discovery
-    @set_ev_cls(event.EventSwitchEnter)
-    def get_topology_data(self, ev):
+    # Per-flow entries report their expiry so the table mirror stays exact
+    @set_ev_cls(ofp_event.EventOFPFlowRemoved, MAIN_DISPATCHER)
+    def flow_removed_handler(self, ev):
+        msg = ev.msg
+        self.flow_tables.remove(msg.datapath.id, dict(msg.match.items()))
+
 
-        # Switches and links in the network
-        switches = get_switch(self, None)
-        links = get_link(self, None)
-        self.graph.clear()
+    # Number of entries the controller has installed on each switch
+    def table_occupancy(self):
+        return self.flow_tables.occupancy()
 
-        for link in links:
-            src = link.src.dpid
-            dst = link.dst.dpid
-            out_port = link.src.port_no
-            in_port = link.dst.port_no
 
-            self.graph.setdefault(src, []).append((dst, 1, out_port))
-            self.graph.setdefault(dst, []).append((src, 1, in_port))
+    # A new link may give entries a shorter path or a backup; re-check them
+    # once the topology has settled
+    def link_up(self, src, dst):
+        self.repair_pending = bool(self.flow_tables.tables)
 
 
-    @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
-    def switch_features_handler(self, ev):
-        datapath = ev.msg.datapath
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
+    # The switches have already failed over to their backups; repair right
+    # away so entries get a new backup and those without one get a new path
+    def link_down(self, src, dst):
+        dead = {(src, self.get_port(src, dst)), (dst, self.get_port(dst, src))}
+        if super(SPRouter, self).link_down(src, dst):
+            self.repair_entries(self.topology.affected, dead)
 
-        # Install entry-miss flow entry
-        match = parser.OFPMatch()
-        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
-                                          ofproto.OFPCML_NO_BUFFER)]
-        self.add_flow(datapath, 0, match, actions)
 
+    # Rebuild the path table once a burst of topology events has settled,
+    # re-check entries against links that came up, and drop in-flight claims
+    # whose install never got confirmed and ARP targets that never answered
+    def _topology_loop(self):
+        while True:
+            hub.sleep(self.topology.window)
+            self.topology.flush(force=False)
+            if self.repair_pending and not self.topology.stale:
+                self.repair_pending = False
+                self.repair_entries()
+            self.inflight.sweep()
+            self.sweep_arp_pending()
 
-    # Add a flow entry to the flow-table
-    def add_flow(self, datapath, priority, match, actions):
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
 
-        # Construct flow_mod message and send it
-        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
-                                match=match, instructions=inst)
-        datapath.send_msg(mod)
+    # Groups left over from an earlier controller would clash with ours
+    def configure_switch(self, datapath):
+        if self.FAST_FAILOVER:
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
+            self.flow_batcher.add(datapath, parser.OFPGroupMod(
+                datapath, ofproto.OFPGC_DELETE, group_id=ofproto.OFPG_ALL))
+            self.metrics.inc('group_mods')
 
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def _packet_in_handler(self, ev):
-        msg = ev.msg
+        start = time.perf_counter()
+        try:
+            self.handle_packet_in(ev.msg)
+        finally:
+            self.metrics.observe('packet_in_seconds', time.perf_counter() - start)
+
+
+    def handle_packet_in(self, msg):
         datapath = msg.datapath
         dpid = datapath.id
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocol(ethernet.ethernet)
-
-        # # TODO: handle new packets at the controller
-        if eth.ethertype == ether_types.ETH_TYPE_ARP:
-            arp_pkt = pkt.get_protocol(arp.arp)
-            src_ip = arp_pkt.src_ip
-            dst_ip = arp_pkt.dst_ip
-            src_mac = arp_pkt.src_mac
-            opcode = arp_pkt.opcode
-
-            self.hosts[src_ip] = (dpid, in_port)
-            self.arp_table[src_ip] = src_mac
-
-            if opcode == arp.ARP_REQUEST:
-                self.logger.error('ARP_REQUEST: %s ---> %s', src_ip, dst_ip)
-                self.logger.error('%s', self.hosts)
-                self.handle_arp_request(dpid, src_ip, dst_ip, msg.data)
-
-            elif opcode == arp.ARP_REPLY:
-
-                self.logger.error('ARP_REPLY: %s ---> %s', src_ip, dst_ip)
-                self.handle_arp_reply(dpid, src_ip, dst_ip, msg.data)
-            
-            # return                    
-
-            # if dst_ip in self.hosts and dst_ip in self.arp_table: 
-            #     self.logger.error('dst_ip learnt : %s ---> %s', dst_ip, self.hosts)
-            #     # self.route_two_level(dpid, dst_ip, src_ip, msg.data)
-            #     self.send_proxy_arp_reply(datapath, in_port, src_ip, dst_ip)
-            #     self.logger.error('<---------- Proxy arp reply sent: ---> %s', src_ip)
-            # else:
-            #     self.logger.error('<------------- dst_ip not learnt ARP route attempt ---------->',)
-            #     self.route_two_level(dpid, dst_ip, src_ip, msg.data)    
-            # return
-
-        if eth.ethertype == ether_types.ETH_TYPE_IP:
-            ip_pkt = pkt.get_protocol(ipv4.ipv4)
-            src_ip = ip_pkt.src
-            dst_ip = ip_pkt.dst
-            self.hosts[src_ip] = (dpid, in_port)
-
-            self.logger.error('IP packet detected: from %s ---> %s',src_ip, dst_ip)
-
-            if dst_ip in self.hosts:
-                self.logger.error('Host is known forwarding: ---> %s', dst_ip)
-                dst_dpid, dst_port = self.hosts[dst_ip]
-                path = self.dijsktra_shortest_path(dpid, dst_dpid)
-                self.install_packet_flow(path, dst_ip, dst_port)
-                self.forward_request_on_path(msg.data, path, dst_port)
-
-            else:
-                self.logger.error('IP packet dst NOT known: ---> %s', dst_ip)
-                self.route_two_level(dpid, dst_ip, src_ip, msg.data)
-
-
-    def handle_arp_request(self, src_dpid, src_ip, dst_ip, data):
-        if dst_ip in self.arp_table and dst_ip in self.hosts:
-            self.send_arp_reply_to_requester(dst_ip, src_ip)
-        else:
-            # TODO: Fix route for dst_ip not known
-            self.logger.error('Dest ip: %s not learnt yeat: on to two %s ', dst_ip, self.hosts)
-            self.route_two_level(src_dpid, dst_ip, src_ip,data)
-
-
-    def handle_arp_reply(self, src_dpid, src_ip, dst_ip, data):
-        if dst_ip in self.hosts:
-            dst_dpid, dst_port = self.hosts[dst_ip]
-            path = self.dijsktra_shortest_path(src_dpid, dst_dpid)
-            self.logger.error('Sending ARP reply src: %s -> %s on path %s', src_ip, dst_ip, path)
-            if path:
-                self.forward_request_on_path(data, path, dst_port)
-
-
-    def parse_ip_info(self, ip):
-        parts = ip.split('.')
-        pod, edge, host = int(parts[1]), int(parts[2]), int(parts[3])
-        return pod, edge, host
-
-    def get_pod_from_dpid(self, dpid):
-        if 100 <= dpid < 200:
-            return (dpid - 100) // 10
-        elif 200 <= dpid < 300:
-            return (dpid - 200) // 10
-        else: 
-            return None
+        frame = self.classifier.classify(msg.data)
+
+        if isinstance(frame, ArpFrame):
+            self.metrics.inc('packet_ins_arp')
+            src_ip = frame.src_ip
+            dst_ip = frame.dst_ip
+            self.learn_host(src_ip, frame.src_mac, dpid, in_port)
+            self.events.trace('arp_in', dpid=dpid, port=in_port, op=frame.opcode,
+                              src=src_ip, dst=dst_ip)
+
+            if frame.opcode == arp.ARP_REQUEST:
+                self.handle_arp_request(dpid, in_port, src_ip, dst_ip, msg.data)
+            elif frame.opcode == arp.ARP_REPLY:
+                self.handle_arp_reply(src_ip, dst_ip, msg.data)
+
+        elif isinstance(frame, Ipv4Frame):
+            self.metrics.inc('packet_ins_ipv4')
+            src_ip = frame.src
+            dst_ip = frame.dst
+            self.learn_host(src_ip, frame.eth_src, dpid, in_port)
+            self.events.trace('ipv4_in', dpid=dpid, port=in_port, src=src_ip, dst=dst_ip)
+
+            # Unknown destination: ask for it instead of flooding the packet,
+            # which is dropped; a retransmission finds the host learned
+            dst = self.host_directory.get(dst_ip)
+            if dst is None:
+                self.metrics.inc('ipv4_unresolved')
+                self.flood_arp_request(dpid, in_port, dst_ip,
+                                       self.msg_cache.arp_request(dst_ip, src_ip, frame.eth_src))
+                return
 
+            # Later packets of a flow whose install is still in flight wait
+            # for it instead of being routed again
+            key = (src_ip, dst_ip)
+            claim = self.inflight.claim(key, dpid, msg.data)
+            if claim is None:
+                return
 
-    def route_two_level(self, dpid, dst_ip, src_ip, data):
-        try:
-            src_pod, _, _ = self.parse_ip_info(src_ip)
-            dst_pod, _, _ = self.parse_ip_info(dst_ip)
-
-            if src_pod == dst_pod:
-                self.logger.error('-------- SAME POD: %s -> %s ------------>', src_pod, dst_pod)
-
-                # Intra pod routing
-                for dst_ip in self.hosts:
-                    dst_dpid, _ = self.hosts[dst_ip]
-                    self.logger.error('For dst %s compared to src %s:', dst_dpid, dpid)
-                    
-                    computed_dst_pod = self.get_pod_from_dpid(dst_dpid)
-                    self.logger.error('Found a matching dst dpath %s compared to src %s:', dst_dpid, dpid)
-
-                    if computed_dst_pod == dst_pod:
-                        path = self.dijsktra_shortest_path(dpid, dst_dpid)
-                        self.logger.error('-------- navigating same pod: %s  using path: %s------------>',computed_dst_pod, path)
-                        out_port = self.get_out_port(path)
-                        if path and out_port:
-                            self.forward_request_on_path(data, path, out_port)
-                            return
-            else:
-                # inter-pod routing
-                self.logger.error('-------- different pods ------------> src: %s -- dst: %s ',src_pod, dst_pod)
-                self.logger.error('---------2-LEVEL ACCROSS PODS ------------> %s to %s',src_pod, dst_pod)
-                self.route_arp_requests_to_core_then_edge(dpid, dst_ip, data)
+            # Path search and rule compilation run on the worker pool, in
+            # order per destination, after the handler has returned. The
+            # workers are green threads and route_packet does not yield, so
+            # this defers the work rather than overlapping it
+            if not self.packet_pipeline.submit(dst_ip, self.route_packet, dpid, dst_ip, dst,
+                                               frame, msg.data, claim):
+                self.inflight.complete(key, claim)
+                self.metrics.inc('packet_ins_dropped')
+
+        else:
+            self.metrics.inc('packet_ins_other')
+
+
+    def route_packet(self, dpid, dst_ip, dst, frame, data, claim):
+        key = (frame.src, dst_ip)
+        start = time.perf_counter()
+        # Per-flow entries need the flow's fields, and so do per-flow paths
+        per_flow = self.RULE_MODE == 'ecmp' or self.path_provider.per_flow
+        fields = self.flow_fields(frame) if per_flow else {}
+        path = self.path_provider.path(dpid, dst.dpid, dst_ip, fields)
+        if self.RULE_MODE != 'ecmp':
+            fields = {}
+        self.metrics.observe('path_seconds', time.perf_counter() - start)
+        if not path:
+            self.inflight.complete(key, claim)
+            return
+
+        # Once every hop has confirmed its rule, release the packet and the
+        # duplicates held meanwhile where they entered, into the flow table
+        def release(future):
+            self.metrics.observe('install_seconds', time.perf_counter() - start)
+            held = self.inflight.complete(key, claim)
+            if future.failed:
                 return
+            for in_dpid, packet_data in [(dpid, data)] + held:
+                if in_dpid in self.switch_datapaths:
+                    ofproto = self.switch_datapaths[in_dpid].ofproto
+                    self.send_packet_out(in_dpid, ofproto.OFPP_TABLE, packet_data)
+
+        self.install_packet_flow(path, dst_ip, dst.port, fields).add_done_callback(release)
+
+
+    # Queue depth, drops and service time of the packet-in worker pool,
+    # plus the duplicates absorbed by the in-flight table
+    def packet_in_stats(self):
+        return dict(self.packet_pipeline.stats(), in_flight=len(self.inflight),
+                    duplicates=self.inflight.duplicates, expired=self.inflight.expired,
+                    parsed_fast=self.classifier.fast, parsed_full=self.classifier.slow)
+
+
+    # Everything /router/stats serves
+    def stats(self):
+        return dict(super(SPRouter, self).stats(),
+                    packet_in=self.packet_in_stats(),
+                    entries=self.table_occupancy(),
+                    path_table_rebuilds=self.topology.rebuilds,
+                    stats_polls={'rounds': self.traffic_monitor.rounds,
+                                 'requests': self.traffic_monitor.requests,
+                                 'replies': self.traffic_monitor.replies,
+                                 'interval': self.traffic_monitor.interval},
+                    path_cache={'hits': self.topology.path_table.path_hits,
+                                'misses': self.topology.path_table.path_misses,
+                                'hop_hits': self.topology.path_table.hop_hits,
+                                'hop_misses': self.topology.path_table.hop_misses})
+
+
+    # Current values for /router/metrics: (name, type, labels, value)
+    def metric_values(self):
+        table = self.topology.path_table
+        values = super(SPRouter, self).metric_values()
+        values += [('flow_entries', 'gauge', {'dpid': dpid}, n)
+                   for dpid, n in sorted(self.table_occupancy().items())]
+        values += [('packet_in_queue_depth', 'gauge', None, self.packet_pipeline.depth()),
+                   ('packet_in_queue_max_depth', 'gauge', None, self.packet_pipeline.max_depth),
+                   ('installs_in_flight', 'gauge', None, len(self.inflight)),
+                   ('path_lookups_total', 'counter', {'result': 'hit'}, table.path_hits),
+                   ('path_lookups_total', 'counter', {'result': 'miss'}, table.path_misses),
+                   ('next_hop_lookups_total', 'counter', {'result': 'hit'}, table.hop_hits),
+                   ('next_hop_lookups_total', 'counter', {'result': 'miss'}, table.hop_misses),
+                   ('path_table_rebuilds_total', 'counter', None, self.topology.rebuilds),
+                   ('packet_in_parses_total', 'counter', {'path': 'fast'}, self.classifier.fast),
+                   ('packet_in_parses_total', 'counter', {'path': 'full'}, self.classifier.slow)]
+        return values
+
+
+    def handle_arp_request(self, dpid, in_port, src_ip, dst_ip, data):
+        if dst_ip in self.host_directory:
+            self.send_arp_reply_to_requester(dst_ip, src_ip)
+            self.count_arp_resolution(dst_ip, 1)
+            return
+
+        self.flood_arp_request(dpid, in_port, dst_ip, data)
+
+
+    # Flood a request for target_ip to the host ports, at most once per
+    # ARP_FLOOD_HOLDDOWN, and let the reply, which comes back through
+    # handle_arp_reply, complete the resolution
+    def flood_arp_request(self, dpid, in_port, target_ip, data):
+        now = time.monotonic()
+        first, packet_outs = self.arp_pending.get(target_ip, (None, 0))
+        if first is None or now - first > self.ARP_FLOOD_HOLDDOWN:
+            first = now
+            packet_outs += self.flood_to_hosts(data, dpid, in_port)
+        self.arp_pending[target_ip] = (first, packet_outs)
+
+
+    # Forget targets last flooded more than ARP_PENDING_TIMEOUT ago; a dead
+    # host, a scan or a typo would otherwise stay in arp_pending for good
+    def sweep_arp_pending(self):
+        now = time.monotonic()
+        for target_ip in [ip for ip, (first, _) in self.arp_pending.items()
+                          if now - first > self.ARP_PENDING_TIMEOUT]:
+            del self.arp_pending[target_ip]
+            self.metrics.inc('arp_unanswered')
+
+
+    def handle_arp_reply(self, src_ip, dst_ip, data):
+        requester = self.host_directory.get(dst_ip)
+        if requester is None or requester.dpid not in self.switch_datapaths:
+            return
+        self.send_packet_out(requester.dpid, requester.port, data)
+        _, packet_outs = self.arp_pending.pop(src_ip, (None, 0))
+        self.count_arp_resolution(src_ip, packet_outs + 1)
+
+
+    def count_arp_resolution(self, target_ip, packet_outs):
+        self.metrics.inc('arp_resolutions')
+        self.metrics.inc('arp_resolution_packet_outs', packet_outs)
+        self.events.trace('arp_resolved', target=target_ip, packet_outs=packet_outs)
 
-        except Exception as e:
-            self.logger.error('two-level routing failed: %s', str(e))
 
-    def get_switch_role(self, dpid):
-        if 100 <= dpid < 200:
-            return 'edge'
-        elif 200 <= dpid < 300:
-            return 'agg'
-        elif 300 <= dpid < 400:
-            return 'core'
-        return 'unknown'
+    # OFPMatch fields of the packet's 5-tuple, what per-flow paths are hashed on
+    def flow_fields(self, frame):
+        return five_tuple(frame.src, frame.dst, frame.proto, frame.src_port, frame.dst_port)
 
 
-    def get_out_port(self, path):
-        if not path or len(path) < 2:
+    def install_packet_flow(self, path, dst_ip, dst_port, flow_fields=None):
+        self.events.trace('install', dst=dst_ip, path=path)
+        if flow_fields:
+            # One entry per hop for this flow only, aged out by the switch
+            fields = dict(flow_fields, eth_type=0x0800, ipv4_dst=dst_ip)
+            self.install_flow_hops(self.flow_hops(path, dst_port), fields, path[-1])
+        else:
+            for rule in self.rule_compiler.compile(path, dst_ip, dst_port):
+                fields = {'eth_type': 0x0800, 'ipv4_dst': ipv4_dst(rule.prefix, rule.length)}
+                self.install_entry(rule.dpid, PRIORITY_BASE + rule.length, fields,
+                                   rule.out_port,
+                                   backup=self.backup_port(rule.dpid, rule.out_port,
+                                                           self.entry_destinations(fields)))
+
+        return self.flush_entries()
+
+
+    # Send the queued entries. A switch that rejects one of them fails the
+    # whole batch, so its entries leave the mirror and the next packet-in
+    # queues them again; failover groups stay recorded, as re-adding an
+    # existing group would be rejected in turn
+    def flush_entries(self):
+        entries, self.unconfirmed = self.unconfirmed, []
+        future = self.flow_batcher.flush()
+
+        def forget_failed(future):
+            for dpid, fields, forward in entries:
+                if dpid in future.failed:
+                    self.flow_tables.remove(dpid, fields, forward)
+
+        if entries:
+            future.add_done_callback(forget_failed)
+        return future
+
+
+    # (dpid, out_port) for every hop of path, ending at the host's port
+    def flow_hops(self, path, dst_port):
+        hops = [(node, self.get_port(node, next_node))
+                for node, next_node in zip(path, path[1:])]
+        hops.append((path[-1], dst_port))
+        return hops
+
+
+    def install_flow_hops(self, hops, fields, dst_dpid):
+        for dpid, out_port in hops:
+            self.install_entry(dpid, self.FLOW_PRIORITY, fields, out_port,
+                               idle_timeout=self.FLOW_IDLE_TIMEOUT,
+                               backup=self.backup_port(dpid, out_port, [dst_dpid]))
+
+
+    # Queue an entry forwarding fields to out_port unless the switch already
+    # has it; with a backup port the entry points at a fast-failover group.
+    # Per-flow entries (the ones with an idle timeout) carry FLOW_COOKIE.
+    def install_entry(self, dpid, priority, fields, out_port, idle_timeout=0, backup=None):
+        forward = Forward(out_port, backup, priority, idle_timeout)
+        if out_port is None or not self.flow_tables.record(dpid, fields, forward):
+            return
+        self.unconfirmed.append((dpid, fields, forward))
+        dp = self.switch_datapaths[dpid]
+        flags = dp.ofproto.OFPFF_SEND_FLOW_REM if idle_timeout else 0
+        if backup is None:
+            mod = self.msg_cache.flow_mod(dp, priority, fields, out_port=out_port,
+                                          idle_timeout=idle_timeout, flags=flags,
+                                          cookie=self.FLOW_COOKIE if idle_timeout else 0)
+        else:
+            group_id = self.add_failover_group(dp, out_port, backup)
+            mod = self.msg_cache.flow_mod(dp, priority, fields, group_id=group_id,
+                                          idle_timeout=idle_timeout, flags=flags,
+                                          cookie=self.FLOW_COOKIE if idle_timeout else 0)
+        self.flow_batcher.add(dp, mod)
+        self.metrics.inc('flow_mods')
+
+
+    # Queue the OFPGT_FF group for (out_port, backup) unless the switch has it
+    def add_failover_group(self, datapath, out_port, backup):
+        group_id, new = self.failover_groups.add(datapath.id, out_port, backup)
+        if new:
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
+            buckets = [parser.OFPBucket(watch_port=port,
+                                        actions=self.msg_cache.output_actions(datapath, port))
+                       for port in (out_port, backup)]
+            self.flow_batcher.add(datapath, parser.OFPGroupMod(
+                datapath, ofproto.OFPGC_ADD, ofproto.OFPGT_FF, group_id, buckets))
+            self.metrics.inc('group_mods')
+        return group_id
+
+
+    def delete_entry(self, dpid, priority, fields):
+        self.flow_tables.remove(dpid, fields)
+        dp = self.switch_datapaths[dpid]
+        self.flow_batcher.add(dp, self.msg_cache.flow_mod(
+            dp, priority, fields, command=dp.ofproto.OFPFC_DELETE_STRICT))
+        self.metrics.inc('flow_mods')
+
+
+    # Edge switches an entry's ipv4_dst leads to, as far as the topology knows them
+    def entry_destinations(self, fields):
+        value = fields['ipv4_dst']
+        if isinstance(value, tuple):
+            dsts = destination_switches(self.num_ports, value)
+        else:
+            host = self.host_directory.get(value)
+            dsts = [host.dpid] if host else []
+        return [dpid for dpid in dsts if dpid in self.topology.graph]
+
+
+    # Port of a loop-free alternate to the neighbor behind out_port, None if
+    # there is none (host ports, downward hops of the fat-tree)
+    def backup_port(self, dpid, out_port, dsts):
+        primary = self.topology.get_neighbor(dpid, out_port)
+        if not self.FAST_FAILOVER or primary is None or not dsts:
             return None
-        src, dst = path[0], path[1]
-        for neighbor, _, port in self.graph.get(src, []):
-            if neighbor == dst:
-                return port
-        return None
-
-    def route_arp_requests_to_core_then_edge(self, src_dpid, dst_ip, data):
-        # go up to core
-        core_switches = [dpid for dpid in self.switch_datapaths if self.get_switch_role(dpid) == 'core']
-        edge_switches = [dpid for dpid in self.switch_datapaths if self.get_switch_role(dpid) == 'edge']
-
-        for core in core_switches:
-            path_up = self.dijsktra_shortest_path(src_dpid, core)
-            out_port = self.get_out_port(path_up)
-            if path_up and out_port:
-                self.forward_request_on_path(data, path_up, out_port)
-
-            for edge in edge_switches:
-                path_down = self.dijsktra_shortest_path(core, edge)
-                out_port = self.get_out_port(path_down)
-                if path_down and out_port:
-                    self.forward_request_on_path(data, path_down, out_port)
-
-
-    def install_packet_flow(self, path, dst_ip, dst_port):
-        self.logger.error('-------- installing packet flow for ------------> src: %s ',path)
-
-        for i in range(len(path) - 1):
-            curr_sw = path[i]
-            next_sw = path[i + 1]
-            out_port = self.get_out_port([curr_sw, next_sw])
-
-            if out_port is None:
+        backup = loop_free_alternate(self.topology, dpid, primary, dsts)
+        return None if backup is None else self.get_port(dpid, backup)
+
+
+    def repair_entries(self, changed=None, dead=()):
+        """
+            Re-check installed fabric-facing entries against the current
+            topology. An entry whose next hop is no longer on a shortest path
+            moves to one that is, preferring its backup, which the switch is
+            already using; an entry whose backup changed gets a new group; an
+            entry with no path left is deleted, so its next packet comes back
+            here. With `changed`, the switches whose distances moved, only
+            entries towards those or using a (dpid, port) in `dead` are looked
+            at; the rest cannot have changed.
+        """
+        moved = removed = 0
+        shortest = {}           # (dpid, dsts) -> next hops, many entries share them
+        backups = {}            # (dpid, out_port, dsts) -> backup port
+        for dpid, table in list(self.flow_tables.tables.items()):
+            if dpid not in self.switch_datapaths:
                 continue
-            
-            dp = self.switch_datapaths[curr_sw]
-            parser = dp.ofproto_parser
-            match = parser.OFPMatch(eth_type=0x0800, ipv4_dst=dst_ip)
-            actions = [parser.OFPActionOutput(out_port)]
-            self.add_flow(dp, 10, match, actions)
-        
-
-        # IP packet reached final destination
-        last_dp = self.switch_datapaths[path[-1]]
-        parser = last_dp.ofproto_parser
-        match = parser.OFPMatch(eth_type=0x0800, ipv4_dst=dst_ip)
-        actions = [parser.OFPActionOutput(dst_port)]
-        self.add_flow(last_dp, 10, match, actions)
-
-
-    def send_arp_reply_to_requester(self, target_ip,  requester_ip):
-        req_dpid, req_port  = self.hosts[requester_ip]
-        target_mac = self.arp_table[target_ip]
-        requester_mac = self.arp_table[requester_ip]
-
-        dp = self.switch_datapaths[req_dpid]
-        e = ethernet.ethernet(dst=requester_mac, src=target_mac, ethertype=ether_types.ETH_TYPE_ARP)
-        a = arp.arp(hwtype=1, proto=0x0800, hlen=6, plen=4, opcode=arp.ARP_REPLY,
-                    src_mac=target_mac, src_ip=target_ip,
-                    dst_mac=requester_mac, dst_ip=requester_ip)
-        pkt = packet.Packet()
-        pkt.add_protocol(e)
-        pkt.add_protocol(a)
-        pkt.serialize()
-        actions = [dp.ofproto_parser.OFPActionOutput(req_port)]
-        out = dp.ofproto_parser.OFPPacketOut(
-            datapath=dp, buffer_id=dp.ofproto.OFP_NO_BUFFER,
-            in_port=dp.ofproto.OFPP_CONTROLLER, actions=actions, data=pkt.data)
-        dp.send_msg(out)
-        self.logger.error('-------- ARP reply reached ------------> src: %s ',requester_ip)
-
-
-
-    def forward_request_on_path(self, data, path, final_out_port):
-        # Add Forwared rules
-        for i in range(len(path) - 1):
-            curr_sw = path[i]
-            next_sw = path[i + 1]
-            out_port = self.get_out_port([curr_sw, next_sw])
-            dp = self.switch_datapaths[curr_sw]
-
-            if out_port:
-                parser = dp.ofproto_parser
-                actions = [parser.OFPActionOutput(out_port)]
-                out = parser.OFPPacketOut(
-                    datapath=dp,
-                    buffer_id=dp.ofproto.OFP_NO_BUFFER,
-                    in_port=dp.ofproto.OFPP_CONTROLLER,
-                    actions=actions,
-                    data=data
-                )
-                dp.send_msg(out)
-
-
-        last_dp = self.switch_datapaths[path[-1]]
-        actions = [last_dp.ofproto_parser.OFPActionOutput(final_out_port)]
-        out = last_dp.ofproto_parser.OFPPacketOut(
-                datapath=last_dp,
-                buffer_id=last_dp.ofproto.OFP_NO_BUFFER,
-                in_port=last_dp.ofproto.OFPP_CONTROLLER,
-                actions=actions,
-                data=data
-        )
-        last_dp.send_msg(out)
-        self.logger.info('<------ packet reached Destination ---> on path %s', path)
-
-
-    def dijsktra_shortest_path(self, start, goal):
-        # graph: {node: [neighbor, weight, outport], ...]}
-        visited = set()
-        min_heap = [(0, start, [])] # (cost, node, path_so_far)
-
-        while min_heap:
-            cost, current_node, path = heapq.heappop(min_heap)
-
-            if current_node in visited:
-                continue
-
-            visited.add(current_node)
-            path = path + [current_node]
+            for key, forward in list(table.items()):
+                if is_host_port(self.num_ports, dpid, forward.out_port):
+                    continue
+                fields = dict(key)
+                dsts = tuple(self.entry_destinations(fields))
+                if (changed is not None and changed.isdisjoint(dsts)
+                        and (dpid, forward.out_port) not in dead
+                        and (dpid, forward.backup) not in dead):
+                    continue
+                if (dpid, dsts) not in shortest:
+                    shortest[dpid, dsts] = shortest_hops(self.topology, dpid, dsts) if dsts else []
+                hops = shortest[dpid, dsts]
+                if not hops:
+                    self.delete_entry(dpid, forward.priority, fields)
+                    removed += 1
+                    continue
+
+                primary = self.topology.get_neighbor(dpid, forward.out_port)
+                if primary not in hops:
+                    backup = self.topology.get_neighbor(dpid, forward.backup)
+                    primary = backup if backup in hops else \
+                        hops[flow_hash(*key) % len(hops)]
+                out_port = self.get_port(dpid, primary)
+                if (dpid, out_port, dsts) not in backups:
+                    backups[dpid, out_port, dsts] = self.backup_port(dpid, out_port, dsts)
+                backup = backups[dpid, out_port, dsts]
+                if (out_port, backup) != (forward.out_port, forward.backup):
+                    self.install_entry(dpid, forward.priority, fields, out_port,
+                                       forward.idle_timeout, backup)
+                    moved += 1
+
+        if moved or removed:
+            self.events.event(logging.INFO, 'entries_repaired', moved=moved, removed=removed)
+        return self.flush_entries()
+
+
+    # Poll statistics at the monitor's current, adaptive interval
+    def _monitor_loop(self):
+        while True:
+            hub.sleep(self.traffic_monitor.interval)
+            self.poll_stats()
+
+
+    def poll_stats(self):
+        """
+            One round: port stats from every switch, stats of the per-flow
+            entries (by FLOW_COOKIE) from edge switches only, where each flow
+            is counted once as it enters the fabric. Nothing is sent while the
+            previous round is still waiting for replies.
+        """
+        edges = [dpid for dpid in self.switch_datapaths if decode_dpid(dpid)[0] == 'edge']
+        port_dpids, flow_dpids = self.traffic_monitor.start_round(self.switch_datapaths, edges)
+        for dpid in port_dpids:
+            dp = self.switch_datapaths[dpid]
+            dp.send_msg(dp.ofproto_parser.OFPPortStatsRequest(dp, 0, dp.ofproto.OFPP_ANY))
+        for dpid in flow_dpids:
+            dp = self.switch_datapaths[dpid]
+            dp.send_msg(dp.ofproto_parser.OFPFlowStatsRequest(
+                dp, cookie=self.FLOW_COOKIE, cookie_mask=0xffffffffffffffff,
+                match=dp.ofproto_parser.OFPMatch(eth_type=0x0800)))
+
+
+    @set_ev_cls(ofp_event.EventOFPPortStatsReply, MAIN_DISPATCHER)
+    def port_stats_reply_handler(self, ev):
+        msg = ev.msg
+        stats = [(stat.port_no, stat.tx_bytes) for stat in msg.body
+                 if stat.port_no <= self.num_ports]
+        more = bool(msg.flags & msg.datapath.ofproto.OFPMPF_REPLY_MORE)
+        if self.traffic_monitor.port_stats(msg.datapath.id, stats, more):
+            self.reschedule_elephants()
 
-            if current_node == goal:
-                return path
-            
-            for neighbor, weight, _ in self.graph.get(current_node, []):
-                if neighbor not in visited:
-                    heapq.heappush(min_heap, (cost + weight, neighbor, path))
 
-        return [] # no path found
+    @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)
+    def flow_stats_reply_handler(self, ev):
+        msg = ev.msg
+        stats = [(dict(stat.match.items()), stat.byte_count,
+                  stat.duration_sec + stat.duration_nsec / 1e9) for stat in msg.body]
+        more = bool(msg.flags & msg.datapath.ofproto.OFPMPF_REPLY_MORE)
+        if self.traffic_monitor.flow_stats(msg.datapath.id, stats, more):
+            self.reschedule_elephants()
+
+
+    # Link loads in bits/s keyed by directed switch link, from the last round
+    def link_loads(self):
+        monitor = self.traffic_monitor
+        return {(dpid, neighbor): monitor.utilization(dpid, port) * monitor.capacity
+                for dpid, ports in self.topology.port_neighbors.items()
+                for port, neighbor in ports.items()}
+
+
+    # Hedera-style: after each poll round, move the largest flows off busy links
+    def reschedule_elephants(self):
+        flows = []
+        for flow in self.traffic_monitor.elephants():
+            src = self.host_directory.get(flow.fields.get('ipv4_src'))
+            dst = self.host_directory.get(flow.fields.get('ipv4_dst'))
+            if src is not None and dst is not None and src.dpid == flow.dpid:
+                flows.append((flow.fields, flow.bps, src.dpid, dst.dpid))
+        if not flows:
+            return []
+
+        moves = schedule(self.topology, self.link_loads(), flows, self.installed_path,
+                         self.MAX_MOVES)
+        for fields, path in moves:
+            self.move_flow(fields, path)
+        if moves:
+            self.events.event(logging.INFO, 'flows_moved', moved=len(moves), large=len(flows))
+        return moves
+
+
+    # Switch path the per-flow entries for fields take now, from the ingress edge
+    def installed_path(self, fields):
+        src = self.host_directory.get(fields.get('ipv4_src'))
+        key = TableMirror.key(fields)
+        path = []
+        node = src.dpid if src else None
+        while node is not None and node not in path:
+            forward = self.flow_tables.tables.get(node, {}).get(key)
+            if forward is None:
+                return ()
+            path.append(node)
+            node = self.topology.get_neighbor(node, forward.out_port)
+        return tuple(path)
+
+
+    # Re-route a flow onto path. Hops past the switch where it turns go first,
+    # so that switch only turns once the rest of the new path is in place.
+    def move_flow(self, fields, path):
+        dst = self.host_directory.get(fields['ipv4_dst'])
+        old = self.installed_path(fields)
+        turn = next((i for i, (a, b) in enumerate(zip(old, path)) if a != b), len(path)) - 1
+        hops = self.flow_hops(path, dst.port)
+
+        def install(selected):
+            self.install_flow_hops(selected, fields, path[-1])
+            return self.flush_entries()
+
+        install(hops[turn + 1:]).add_done_callback(lambda future: install(hops[:turn + 1]))
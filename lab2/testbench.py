@@ -0,0 +1,549 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+#!/usr/bin/env python3
+
+# Offline test bench for the Ryu apps: connects fake datapaths for every
+# switch of topo.Fattree(k), feeds the app's handlers synthetic switch, link,
+# barrier and packet-in events, captures what the app sends, and checks the
+# resulting flow tables by walking packets through them hop by hop.
+# Usage: python3 testbench.py [--router sp|ft|STRATEGY ...] [-k K] [--flows N]
+#                             [--rule-mode ecmp|host|prefix] [--verify] [--fail LINKS]
+#                             [--reject]
+# Needs Ryu installed; no Mininet, OVS or root.
+
+import argparse
+import collections
+import inspect
+import ipaddress
+import random
+import struct
+import time
+import types
+
+from ryu.controller import ofp_event
+from ryu.controller.handler import MAIN_DISPATCHER
+from ryu.lib.packet import packet, ethernet, ipv4, tcp, arp
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser, ofproto_parser
+from ryu.topology import event, switches
+
+import addressing
+import flow_verifier
+import topo
+
+OFP_HEADER = '!BBHI'
+MAX_HOPS = 16
+
+
+class FakeDatapath:
+    """
+        Stands in for ryu.controller.controller.Datapath. Parses FlowMods and
+        GroupMods out of the byte stream the app writes into a flow and group
+        table, remembers barrier requests so the bench can answer them, and
+        keeps PacketOuts as sent. Ports in `down` are dead: fast-failover
+        groups skip buckets watching them and packets sent there are lost.
+        The next `reject` FlowMods are not applied but answered with an
+        OFPErrorMsg, ahead of the barrier behind them.
+    """
+
+    def __init__(self, dpid, num_ports):
+        self.id = dpid
+        self.ofproto = ofproto_v1_3
+        self.ofproto_parser = ofproto_v1_3_parser
+        self.ports = {port: None for port in range(1, num_ports + 1)}
+        self.xid = 0
+        self.table = {}             # (priority, match key) -> (match, out_ports)
+        self.groups = {}            # group id -> [(watch port, out_ports), ...] (fast failover)
+        self.down = set()
+        self.barriers = []          # xids of unanswered barrier requests
+        self.reject = 0             # FlowMods still to reject
+        self.errors = []            # xids of rejected messages, error not yet sent
+        self.packet_outs = []
+        self.other = []             # (msg type, buf) of anything else
+        self.flow_mods = 0
+        self.group_mods = 0
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+        return self.xid
+
+    def send_msg(self, msg):
+        if msg.xid is None:
+            self.set_xid(msg)
+        if isinstance(msg, ofproto_v1_3_parser.OFPPacketOut):
+            self.packet_outs.append(msg)
+            return
+        msg.serialize()
+        self.send(msg.buf)
+
+    def send(self, buf):
+        buf = bytes(buf)
+        while buf:
+            version, msg_type, length, xid = struct.unpack_from(OFP_HEADER, buf)
+            data, buf = buf[:length], buf[length:]
+            if msg_type == ofproto_v1_3.OFPT_FLOW_MOD and self.reject:
+                self.reject -= 1
+                self.errors.append(xid)
+            elif msg_type == ofproto_v1_3.OFPT_FLOW_MOD:
+                self.apply_flow_mod(ofproto_parser.msg(self, version, msg_type, length, xid, data))
+            elif msg_type == ofproto_v1_3.OFPT_BARRIER_REQUEST:
+                self.barriers.append(xid)
+            elif msg_type == ofproto_v1_3.OFPT_GROUP_MOD:
+                self.apply_group_mod(data)
+            else:
+                self.other.append((msg_type, data))
+
+    def apply_flow_mod(self, mod):
+        self.flow_mods += 1
+        match = dict(mod.match.items())
+        key = (mod.priority, tuple(sorted(match.items())))
+        if mod.command in (self.ofproto.OFPFC_ADD, self.ofproto.OFPFC_MODIFY,
+                           self.ofproto.OFPFC_MODIFY_STRICT):
+            self.table[key] = (match, output_ports(mod.instructions))
+        elif mod.command == self.ofproto.OFPFC_DELETE_STRICT:
+            self.table.pop(key, None)
+        elif mod.command == self.ofproto.OFPFC_DELETE:
+            for other in [other for other, (entry, _) in self.table.items()
+                          if all(entry.get(f) == v for f, v in match.items())]:
+                del self.table[other]
+
+    # Ryu only serializes OFPGroupMod, so the bench decodes it itself
+    def apply_group_mod(self, data):
+        self.group_mods += 1
+        command, _, group_id = struct.unpack_from(ofproto_v1_3.OFP_GROUP_MOD_PACK_STR, data,
+                                                  ofproto_v1_3.OFP_HEADER_SIZE)
+        if command == self.ofproto.OFPGC_DELETE:
+            if group_id == self.ofproto.OFPG_ALL:
+                self.groups.clear()
+            else:
+                self.groups.pop(group_id, None)
+            return
+
+        buckets = []
+        offset = ofproto_v1_3.OFP_GROUP_MOD_SIZE
+        while offset < len(data):
+            bucket = ofproto_v1_3_parser.OFPBucket.parser(data, offset)
+            buckets.append((bucket.watch_port, output_ports([bucket])))
+            offset += bucket.len
+        self.groups[group_id] = buckets
+
+    # Out ports of the highest-priority entry matching fields, None on a miss
+    def lookup(self, fields):
+        best = None
+        for (priority, _), (match, out_ports) in self.table.items():
+            if (best is None or priority > best[0]) and matches(match, fields):
+                best = (priority, out_ports)
+        return None if best is None else self.live_ports(best[1])
+
+    # Out ports with groups resolved to their first bucket on a live port
+    def live_ports(self, out_ports):
+        ports = []
+        for port in out_ports:
+            if isinstance(port, Group):
+                ports.extend(next((out for watch, out in self.groups.get(port.group_id, ())
+                                   if watch not in self.down), []))
+            else:
+                ports.append(port)
+        return ports
+
+
+Group = collections.namedtuple('Group', ['group_id'])
+
+
+# Output ports of instructions or a bucket, a group action as Group(id)
+def output_ports(instructions):
+    ports = []
+    for inst in instructions:
+        for action in getattr(inst, 'actions', []):
+            if isinstance(action, ofproto_v1_3_parser.OFPActionOutput):
+                ports.append(action.port)
+            elif isinstance(action, ofproto_v1_3_parser.OFPActionGroup):
+                ports.append(Group(action.group_id))
+    return ports
+
+
+def _as_int(value):
+    return int(ipaddress.ip_address(value)) if isinstance(value, str) else value
+
+
+def matches(match, fields):
+    for field, value in match.items():
+        if field not in fields:
+            return False
+        if isinstance(value, tuple):
+            value, mask = _as_int(value[0]), _as_int(value[1])
+            if _as_int(fields[field]) & mask != value & mask:
+                return False
+        elif _as_int(fields[field]) != _as_int(value):
+            return False
+    return True
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+class Bench:
+    """ One app instance wired to fake datapaths for a k-ary fat-tree """
+
+    def __init__(self, app_cls, k, **attrs):
+        self.k = k
+        self.app = type(app_cls.__name__, (app_cls,), dict(attrs, NUM_PORTS=k))()
+        self.handlers = collections.defaultdict(list)
+        for _, method in inspect.getmembers(self.app, inspect.ismethod):
+            for ev_cls in getattr(method, 'callers', {}):
+                self.handlers[ev_cls].append(method)
+
+        self.ft = topo.Fattree(k)
+        self.datapaths = {}
+        self.latencies = []         # seconds per packet-in handler call
+        self.packet_ins = 0
+
+    def dispatch(self, ev):
+        for handler in self.handlers.get(type(ev), ()):
+            handler(ev)
+
+    # Answer every outstanding barrier, including ones sent while answering;
+    # a switch reports rejected messages before the barriers behind them
+    def settle(self):
+        pending = True
+        while pending:
+            pending = False
+            for dp in self.datapaths.values():
+                while dp.errors:
+                    pending = True
+                    error = ofproto_v1_3_parser.OFPErrorMsg(
+                        dp, type_=ofproto_v1_3.OFPET_FLOW_MOD_FAILED,
+                        code=ofproto_v1_3.OFPFMFC_TABLE_FULL, data=b'')
+                    error.xid = dp.errors.pop(0)
+                    self.dispatch(ofp_event.EventOFPErrorMsg(error))
+                while dp.barriers:
+                    pending = True
+                    reply = ofproto_v1_3_parser.OFPBarrierReply(dp)
+                    reply.xid = dp.barriers.pop(0)
+                    self.dispatch(ofp_event.EventOFPBarrierReply(reply))
+
+    def connect(self):
+        """ Switch handshake, topology discovery and link events for the whole fabric """
+        for node in self.ft.nodes:
+            if node.type != 'switch':
+                continue
+            dp = self.datapaths[addressing.node_dpid(node.id)] = FakeDatapath(
+                addressing.node_dpid(node.id), self.k)
+            self.dispatch(ofp_event.EventOFPSwitchFeatures(
+                ofproto_v1_3_parser.OFPSwitchFeatures(dp, datapath_id=dp.id)))
+            state = ofp_event.EventOFPStateChange(dp)
+            state.state = MAIN_DISPATCHER
+            self.dispatch(state)
+            self.dispatch(event.EventSwitchEnter(switches.Switch(dp)))
+
+        for src, dst in self.ft.links():
+            if src[0] == 'h' or dst[0] == 'h':
+                continue
+            for a, b in ((src, dst), (dst, src)):
+                link = types.SimpleNamespace(
+                    src=types.SimpleNamespace(dpid=addressing.node_dpid(a),
+                                              port_no=addressing.port_towards(self.k, a, b)),
+                    dst=types.SimpleNamespace(dpid=addressing.node_dpid(b),
+                                              port_no=addressing.port_towards(self.k, b, a)))
+                self.dispatch(event.EventLinkAdd(link))
+        self.settle()
+
+    def packet_in(self, dpid, in_port, data):
+        dp = self.datapaths[dpid]
+        msg = ofproto_v1_3_parser.OFPPacketIn(
+            dp, buffer_id=ofproto_v1_3.OFP_NO_BUFFER, total_len=len(data),
+            reason=ofproto_v1_3.OFPR_NO_MATCH, table_id=0,
+            match=ofproto_v1_3_parser.OFPMatch(in_port=in_port), data=data)
+        start = time.perf_counter()
+        self.dispatch(ofp_event.EventOFPPacketIn(msg))
+        self.latencies.append(time.perf_counter() - start)
+        self.packet_ins += 1
+        self.settle()
+
+    def fail_link(self, dpid, port):
+        """ Take the link behind port down at both ends, without telling the app """
+        peer = addressing.neighbor(self.k, dpid, port)
+        peer_port = next(p for p in range(1, self.k + 1)
+                         if addressing.neighbor(self.k, peer, p) == dpid)
+        ends = [(dpid, port), (peer, peer_port)]
+        for end, end_port in ends:
+            self.datapaths[end].down.add(end_port)
+        return ends
+
+    # Port status for each failed end, as ryu.topology.switches reports it
+    def port_down(self, ends):
+        for dpid, port in ends:
+            dp = self.datapaths[dpid]
+            desc = ofproto_v1_3_parser.OFPPort(port, '00:00:00:00:00:00', f'p{port}', 0,
+                                               ofproto_v1_3.OFPPS_LINK_DOWN, 0, 0, 0, 0, 0, 0)
+            self.dispatch(event.EventPortModify(switches.Port(dpid, dp.ofproto, desc)))
+        self.settle()
+
+    def walk(self, dpid, in_port, fields):
+        """
+            Follow fields through the flow tables from (dpid, in_port).
+            Returns ('delivered', dpid, port, hops), ('miss', dpid, in_port, hops),
+            ('drop', ...) or ('loop', ...).
+        """
+        seen = set()
+        for hops in range(MAX_HOPS):
+            if (dpid, in_port) in seen:
+                return 'loop', dpid, in_port, hops
+            seen.add((dpid, in_port))
+            out_ports = self.datapaths[dpid].lookup(dict(fields, in_port=in_port))
+            if out_ports is None or not out_ports:
+                return 'drop', dpid, in_port, hops
+            if out_ports[0] == ofproto_v1_3.OFPP_CONTROLLER:
+                return 'miss', dpid, in_port, hops
+            out_port = out_ports[0]
+            if out_port in self.datapaths[dpid].down:
+                return 'drop', dpid, in_port, hops
+            peer = addressing.neighbor(self.k, dpid, out_port)
+            if peer is None:
+                return 'delivered', dpid, out_port, hops
+            in_port = next(port for port in range(1, self.k + 1)
+                           if addressing.neighbor(self.k, peer, port) == dpid)
+            dpid = peer
+        return 'loop', dpid, in_port, MAX_HOPS
+
+    def send_flow(self, src_ip, dst_ip, ports, max_packet_ins=8):
+        """
+            Send the first packet of a TCP flow from src_ip, raising packet-ins
+            wherever it misses, until it reaches dst_ip's port or gives up.
+            Returns (walk result with hops summed over all segments,
+            packet-ins it took).
+        """
+        src_dpid, src_port = addressing.host_location(src_ip)
+        k = self.k
+        fields = {'eth_type': 0x0800, 'ipv4_src': src_ip, 'ipv4_dst': dst_ip, 'ip_proto': 6,
+                  'tcp_src': ports[0], 'tcp_dst': ports[1]}
+        data = tcp_packet(k, src_ip, dst_ip, ports)
+
+        dpid, in_port = src_dpid, src_port
+        hops = 0
+        for attempt in range(max_packet_ins + 1):
+            result = self.walk(dpid, in_port, fields)
+            hops += result[3]
+            if result[0] != 'miss' or attempt == max_packet_ins:
+                return result[:3] + (hops,), attempt
+            self.packet_in(result[1], result[2], data)
+            # The app releases the packet into the table where it entered
+            dpid, in_port = result[1], result[2]
+
+    def resolve_arp(self, src_ip, dst_ip):
+        """ ARP request from src_ip; True if the reply reaches src_ip's port """
+        src_dpid, src_port = addressing.host_location(src_ip)
+        src_mac = addressing.host_mac(self.k, *addressing.parse_ip(src_ip))
+        fields = {'eth_type': 0x0806, 'arp_tpa': dst_ip, 'arp_spa': src_ip}
+        result = self.walk(src_dpid, src_port, fields)
+        if result[0] == 'delivered':
+            return result[1:3] == addressing.host_location(dst_ip)
+
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet('ff:ff:ff:ff:ff:ff', src_mac, 0x0806))
+        pkt.add_protocol(arp.arp(opcode=arp.ARP_REQUEST, src_mac=src_mac, src_ip=src_ip,
+                                 dst_mac='00:00:00:00:00:00', dst_ip=dst_ip))
+        pkt.serialize()
+        dp = self.datapaths[src_dpid]
+        before = len(dp.packet_outs)
+        self.packet_in(src_dpid, src_port, pkt.data)
+        return any(action.port == src_port for out in dp.packet_outs[before:]
+                   for action in out.actions)
+
+
+# First packet of a TCP flow from src_ip to dst_ip, as the source host sends it
+def tcp_packet(k, src_ip, dst_ip, ports):
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet(addressing.host_mac(k, *addressing.parse_ip(dst_ip)),
+                                       addressing.host_mac(k, *addressing.parse_ip(src_ip)),
+                                       0x0800))
+    pkt.add_protocol(ipv4.ipv4(src=src_ip, dst=dst_ip, proto=6))
+    pkt.add_protocol(tcp.tcp(src_port=ports[0], dst_port=ports[1]))
+    pkt.serialize()
+    return pkt.data
+
+
+# Switch-to-switch hops on a shortest path between two hosts
+def fabric_hops(src_ip, dst_ip):
+    src, dst = addressing.parse_ip(src_ip), addressing.parse_ip(dst_ip)
+    if src[0] != dst[0]:
+        return 4
+    return 2 if src[1] != dst[1] else 0
+
+
+def replay(bench, sent, max_packet_ins):
+    outcomes = collections.Counter()
+    for src, dst, ports in sent:
+        result, _ = bench.send_flow(src, dst, ports, max_packet_ins)
+        delivered = result[0] == 'delivered' and result[1:3] == addressing.host_location(dst)
+        outcomes['delivered' if delivered else result[0]] += 1
+    return outcomes
+
+
+def fail_links(bench, sent, links, rng):
+    """
+        Take random switch-to-switch links down, then replay the flows that
+        were delivered: first on the tables as they are, so only fast-failover
+        groups can save them, then after the app has handled the port status.
+    """
+    fabric = [(dpid, port) for dpid in sorted(bench.datapaths) for port in range(1, bench.k + 1)
+              if addressing.neighbor(bench.k, dpid, port) is not None
+              and dpid < addressing.neighbor(bench.k, dpid, port)]
+    ends = [end for link in rng.sample(fabric, links) for end in bench.fail_link(*link)]
+    data_plane = replay(bench, sent, max_packet_ins=0)
+
+    mods_before = sum(dp.flow_mods + dp.group_mods for dp in bench.datapaths.values())
+    start = time.perf_counter()
+    bench.port_down(ends)
+    repair = time.perf_counter() - start
+    mods = sum(dp.flow_mods + dp.group_mods for dp in bench.datapaths.values()) - mods_before
+    repaired = replay(bench, sent, max_packet_ins=8)
+
+    def summary(outcomes):
+        rest = {r: n for r, n in outcomes.items() if r != 'delivered'}
+        return f'{outcomes["delivered"]}/{len(sent)} {rest}'
+
+    print(f'    {links} links down: groups only delivered {summary(data_plane)}; '
+          f'repair {repair * 1e3:.1f} ms, {mods} Flow/GroupMods, then delivered {summary(repaired)}')
+
+
+def reject_flow_mod(bench, hosts, rng):
+    """
+        Send a new flow whose first FlowMod the ingress switch rejects. The
+        app must not take the entry as installed: the next packet-in has to
+        queue it again, and the flow then gets through.
+    """
+    while True:
+        src, dst = rng.sample(hosts, 2)
+        ports = (rng.randrange(1024, 65536), rng.randrange(1, 1024))
+        src_dpid, src_port = addressing.host_location(src)
+        fields = {'eth_type': 0x0800, 'ipv4_src': src, 'ipv4_dst': dst, 'ip_proto': 6,
+                  'tcp_src': ports[0], 'tcp_dst': ports[1]}
+        if bench.walk(src_dpid, src_port, fields)[:2] == ('miss', src_dpid):
+            break
+
+    dp = bench.datapaths[src_dpid]
+    dp.reject = 1
+    mods_before = dp.flow_mods
+    result, packet_ins = bench.send_flow(src, dst, ports)
+    delivered = result[0] == 'delivered' and result[1:3] == addressing.host_location(dst)
+    print(f'    FlowMod rejected at {src_dpid:#x}: {"delivered" if delivered else result[0]} '
+          f'after {packet_ins} packet-ins, {dp.flow_mods - mods_before} FlowMods applied there')
+    return delivered and dp.flow_mods > mods_before
+
+
+def run(name, app_cls, k, flows, seed, verify=False, fail=0, reject=False, **attrs):
+    start = time.perf_counter()
+    bench = Bench(app_cls, k, **attrs)
+    bench.connect()
+    startup = time.perf_counter() - start
+    startup_mods = sum(dp.flow_mods for dp in bench.datapaths.values())
+
+    rng = random.Random(seed)
+    hosts = [addressing.host_ip(pod, edge, h) for pod in range(k)
+             for edge in range(k // 2) for h in addressing.host_ids(k)]
+    outcomes = collections.Counter()
+    stretch = collections.Counter()
+    arp_ok = 0
+    sent = []
+    for _ in range(flows):
+        src, dst = rng.sample(hosts, 2)
+        ports = (rng.randrange(1024, 65536), rng.randrange(1, 1024))
+        arp_ok += bench.resolve_arp(src, dst)
+        result, _ = bench.send_flow(src, dst, ports)
+        delivered = result[0] == 'delivered' and result[1:3] == addressing.host_location(dst)
+        outcomes['delivered' if delivered else result[0]] += 1
+        if delivered:
+            stretch[result[3] - fabric_hops(src, dst)] += 1
+            sent.append((src, dst, ports))
+
+    flow_mods = sum(dp.flow_mods for dp in bench.datapaths.values()) - startup_mods
+    handler_time = sum(bench.latencies)
+    # FTRouter routes from its proactive tables and normally sees no packet-ins
+    rate = f'{bench.packet_ins / handler_time:.0f}/s' if handler_time else 'n/a'
+    entries = [len(dp.table) for dp in bench.datapaths.values()]
+    print(f'{name} k={k} flows={flows}: startup {startup * 1e3:.0f} ms, {startup_mods} FlowMods; '
+          f'delivered {outcomes["delivered"]}/{flows} '
+          f'{ {r: n for r, n in outcomes.items() if r != "delivered"} }, '
+          f'ARP ok {arp_ok}/{flows}, extra hops {dict(stretch)}')
+    print(f'    packet-ins {bench.packet_ins} ({rate} handler time), '
+          f'FlowMods/flow {flow_mods / flows:.2f}, '
+          f'latency p50 {percentile(bench.latencies, 50) * 1e3:.3f} ms '
+          f'p99 {percentile(bench.latencies, 99) * 1e3:.3f} ms, '
+          f'entries max {max(entries)} total {sum(entries)}')
+
+    if verify:
+        # Destination entries only; per-flow (ecmp) entries are reported as skipped
+        start = time.perf_counter()
+        report = flow_verifier.Verifier(k, flow_verifier.from_datapaths(bench.datapaths)).run()
+        flow_verifier.print_report('    verifier', report, time.perf_counter() - start)
+
+    if reject:
+        reject_flow_mod(bench, hosts, rng)
+    if fail:
+        fail_links(bench, sent, fail, rng)
+    return outcomes
+
+
+def main():
+    from routing_core import STRATEGIES
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--router', nargs='*', choices=['sp', 'ft'] + list(STRATEGIES),
+                        default=['sp', 'ft'],
+                        help='sp: SPRouter as configured, ft: FTRouter, or an SPRouter '
+                             'routing strategy from routing_core.STRATEGIES')
+    parser.add_argument('-k', type=int, default=4)
+    parser.add_argument('--flows', type=int, default=200)
+    parser.add_argument('--rule-mode', choices=['ecmp', 'host', 'prefix'], default=None,
+                        help='SPRouter.RULE_MODE')
+    parser.add_argument('--verify', action='store_true',
+                        help='check every host pair against the final tables with flow_verifier')
+    parser.add_argument('--fail', type=int, default=0, metavar='LINKS',
+                        help='afterwards take LINKS random fabric links down and replay the flows')
+    parser.add_argument('--reject', action='store_true',
+                        help='afterwards reject the first FlowMod of a new SPRouter flow')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for name in args.router:
+        if name == 'ft':
+            from ft_routing import FTRouter
+            run('FTRouter', FTRouter, args.k, args.flows, args.seed, args.verify, args.fail)
+            continue
+
+        from sp_routing import SPRouter
+        attrs = {'PACKET_IN_WORKERS': 0}
+        if name != 'sp':
+            attrs.update(STRATEGIES[name])
+        if args.rule_mode:
+            attrs['RULE_MODE'] = args.rule_mode
+        label = 'SPRouter' if name == 'sp' else f'SPRouter[{name}]'
+        run(label, SPRouter, args.k, args.flows, args.seed, args.verify, args.fail,
+            args.reject, **attrs)
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,12 @@
  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
  """
 
+from array import array
+from collections import Counter, namedtuple
+from collections.abc import Sequence
+
+import addressing
+
 # Class for an edge in the graph
 class Edge:
 	def __init__(self):
@@ -61,13 +67,14 @@ class Node:
 
 class Fattree:
 
-	def __init__(self, num_ports):
+	def __init__(self, num_ports, verify=False):
 		self.servers = []
 		self.nodes = []
 		self.core = []
 		self.num_ports = num_ports
 		self.generate(num_ports)
-		self.check_nodes_degree()
+		if verify:
+			assert_fattree(self)
 
 	def generate(self, num_ports):
 		pods = num_ports
@@ -119,14 +126,358 @@ class Fattree:
 					a.add_edge(self.core[index])
 
 
-	def check_nodes_degree(self):
-		"""
-			stores edges globally and count uniqe
-		"""
-		print('\n====Node Degree Check ===')
+	# Every link once, as (lnode id, rnode id)
+	def links(self):
 		for node in self.nodes:
-			connected = set()
 			for edge in node.edges:
+				if edge.lnode is node:
+					yield edge.lnode.id, edge.rnode.id
+
+	# Switch-to-switch adjacency in the shape the controllers use:
+	# node id -> list of (neighbor id, weight, port), ports numbered per node from 1
+	def switch_graph(self):
+		graph = {}
+		for node in self.nodes:
+			if node.type != 'switch':
+				continue
+			adjacent = graph.setdefault(node.id, [])
+			for port, edge in enumerate(node.edges, start=1):
 				other = edge.rnode if edge.lnode == node else edge.lnode
-				connected.add(other.id)
-			print(f'Node ID: {node.id:10} | Type: {node.type:6} | Degree: {len(connected)}')
\ No newline at end of file
+				if other.type == 'switch':
+					adjacent.append((other.id, 1, port))
+		return graph
+
+
+	# Degree histogram per role, bisection and connectivity, see verify_fattree
+	def verify(self):
+		return verify_fattree(self)
+
+
+class NodeView:
+	""" Node-like view of one CompactFattree node, created on first access """
+	__slots__ = ('tree', 'index', 'id', 'type')
+
+	def __init__(self, tree, index):
+		self.tree = tree
+		self.index = index
+		self.id = tree.name(index)
+		self.type = 'host' if tree.locate(index)[0] == 'host' else 'switch'
+
+	@property
+	def edges(self):
+		return [EdgeView(self.tree.node(self.index), self.tree.node(other))
+				for other in self.tree.neighbors(self.index)]
+
+	def is_neighbor(self, node):
+		return self.tree.is_neighbor(self.index, node.index)
+
+
+class EdgeView:
+	""" lnode is the lower-tier end (edge below agg below core, edge before host), as in Fattree """
+	__slots__ = ('lnode', 'rnode')
+
+	def __init__(self, a, b):
+		if CompactFattree.RANK[a.tree.locate(a.index)[0]] > CompactFattree.RANK[b.tree.locate(b.index)[0]]:
+			a, b = b, a
+		self.lnode = a
+		self.rnode = b
+
+
+class _NodeList(Sequence):
+	# Sequence of NodeViews for ids index_to_id(0 .. length-1)
+	def __init__(self, tree, length, index_to_id):
+		self.tree = tree
+		self.length = length
+		self.index_to_id = index_to_id
+
+	def __len__(self):
+		return self.length
+
+	def __getitem__(self, i):
+		if isinstance(i, slice):
+			return [self[j] for j in range(*i.indices(self.length))]
+		if i < 0:
+			i += self.length
+		if not 0 <= i < self.length:
+			raise IndexError(i)
+		return self.tree.node(self.index_to_id(i))
+
+
+class CompactFattree:
+	"""
+		The same fat-tree as Fattree, with integer node ids and CSR adjacency
+		(two arrays) instead of one object per node and edge. Ids follow
+		Fattree.nodes order - core switches, then per pod its edge switches,
+		aggregation switches and hosts - so role, pod and neighbor tests are
+		arithmetic. Neighbors are stored in Fattree's edge order, which keeps
+		port numbering identical. nodes, servers and core are lazy views.
+	"""
+
+	RANK = {'edge': 0, 'agg': 1, 'core': 2, 'host': 3}
+
+	def __init__(self, num_ports, verify=False):
+		self.num_ports = num_ports
+		self.half = num_ports // 2
+		self.num_core = self.half ** 2
+		self.pod_size = 2 * self.half + self.half ** 2
+		self.num_nodes = self.num_core + num_ports * self.pod_size
+		self.offsets = array('l')
+		self.adjacency = array('l')
+		self._views = {}
+		self.generate()
+		if verify:
+			assert_fattree(self)
+
+	def generate(self):
+		offsets = [0]
+		adjacency = []
+		for u in range(self.num_nodes):
+			adjacency.extend(self._adjacent(u))
+			offsets.append(len(adjacency))
+		self.offsets = array('l', offsets)
+		self.adjacency = array('l', adjacency)
+
+	# Node ids
+	def core_id(self, row, col):
+		return row * self.half + col
+
+	def edge_id(self, pod, i):
+		return self.num_core + pod * self.pod_size + i
+
+	def agg_id(self, pod, i):
+		return self.num_core + pod * self.pod_size + self.half + i
+
+	def host_id(self, pod, edge, h):
+		return self.num_core + pod * self.pod_size + 2 * self.half + edge * self.half + h
+
+	# id -> ('core', row, col) | ('edge', pod, i) | ('agg', pod, i) | ('host', pod, edge, h)
+	def locate(self, u):
+		half = self.half
+		if u < self.num_core:
+			return ('core',) + divmod(u, half)
+		pod, r = divmod(u - self.num_core, self.pod_size)
+		if r < half:
+			return 'edge', pod, r
+		if r < 2 * half:
+			return 'agg', pod, r - half
+		return ('host', pod) + divmod(r - 2 * half, half)
+
+	# Fattree's string id for u
+	def name(self, u):
+		where = self.locate(u)
+		if where[0] == 'core':
+			return f'c{where[2]}_{where[1]}'
+		if where[0] == 'host':
+			return f'h{where[1]}_{where[2]}_{where[3] + 2}'
+		return f'{where[0][0]}{where[1]}_{where[2]}'
+
+	# Switch dpid and host address of u, as fat-tree.py assigns them
+	def dpid(self, u):
+		role, a, b = self.locate(u)
+		return addressing.dpid(role, a, b)
+
+	def host_ip(self, u):
+		_, pod, edge, h = self.locate(u)
+		return addressing.host_ip(pod, edge, h + 2)
+
+	def neighbors(self, u):
+		return self.adjacency[self.offsets[u]:self.offsets[u + 1]]
+
+	def degree(self, u):
+		return self.offsets[u + 1] - self.offsets[u]
+
+	def is_neighbor(self, u, v):
+		num_core, half = self.num_core, self.half
+		if u > v:
+			u, v = v, u
+		if v < num_core:
+			return False
+		pod_v, rv = divmod(v - num_core, self.pod_size)
+		if u < num_core:
+			# core row r links aggregation switch r of every pod
+			return half <= rv < 2 * half and rv - half == u // half
+		pod_u, ru = divmod(u - num_core, self.pod_size)
+		if pod_u != pod_v or ru >= half:
+			return False
+		# u is an edge switch: all aggs of its pod and its own hosts
+		if rv < 2 * half:
+			return rv >= half
+		return (rv - 2 * half) // half == ru
+
+	def _adjacent(self, u):
+		half = self.half
+		where = self.locate(u)
+		if where[0] == 'core':
+			return [self.agg_id(pod, where[1]) for pod in range(self.num_ports)]
+		if where[0] == 'edge':
+			_, pod, i = where
+			return ([self.host_id(pod, i, h) for h in range(half)]
+					+ [self.agg_id(pod, a) for a in range(half)])
+		if where[0] == 'agg':
+			_, pod, i = where
+			return ([self.edge_id(pod, e) for e in range(half)]
+					+ [self.core_id(i, col) for col in range(half)])
+		return [self.edge_id(where[1], where[2])]
+
+	# Cached NodeView for u, so views compare by identity like Fattree nodes
+	def node(self, u):
+		view = self._views.get(u)
+		if view is None:
+			view = self._views[u] = NodeView(self, u)
+		return view
+
+	@property
+	def nodes(self):
+		return _NodeList(self, self.num_nodes, int)
+
+	@property
+	def core(self):
+		return _NodeList(self, self.num_core, int)
+
+	@property
+	def servers(self):
+		per_pod = self.half ** 2
+		return _NodeList(self, self.num_ports * per_pod,
+						 lambda i: self.host_id(i // per_pod, 0, i % per_pod))
+
+	# Every link once, lower tier first like Fattree.links
+	def links(self):
+		rank = [self.RANK[self.locate(u)[0]] for u in range(self.num_nodes)]
+		for u in range(self.num_nodes):
+			for v in self.neighbors(u):
+				if rank[u] < rank[v]:
+					yield self.name(u), self.name(v)
+
+	# Same shape and port numbering as Fattree.switch_graph
+	def switch_graph(self):
+		graph = {}
+		for u in range(self.num_nodes):
+			if self.locate(u)[0] == 'host':
+				continue
+			graph[self.name(u)] = [(self.name(v), 1, port)
+								   for port, v in enumerate(self.neighbors(u), start=1)
+								   if self.locate(v)[0] != 'host']
+		return graph
+
+	def verify(self):
+		return verify_fattree(self)
+
+
+TopologyReport = namedtuple('TopologyReport', [
+	'nodes', 'links',
+	'degrees',			# role -> Counter(degree -> number of nodes)
+	'components',		# connected components
+	'bisection_links',	# links the pod halves can use between them, see verify_fattree
+	'full_bisection',	# bisection_links == hosts / 2
+	'errors'])			# what differs from a k-ary fat-tree, empty if nothing
+
+
+def _link_arrays(tree):
+	# Role and pod (None for core) per node index, and both ends of every
+	# link as flat arrays
+	if isinstance(tree, CompactFattree):
+		where = [tree.locate(u) for u in range(tree.num_nodes)]
+		roles = [w[0] for w in where]
+		pods = [None if w[0] == 'core' else w[1] for w in where]
+		src, dst = array('l'), array('l')
+		for u in range(tree.num_nodes):
+			ends = [v for v in tree.neighbors(u) if v > u]
+			src.extend([u] * len(ends))
+			dst.extend(ends)
+		return roles, pods, src, dst
+
+	index = {node.id: i for i, node in enumerate(tree.nodes)}
+	kinds = {'h': 'host', 'e': 'edge', 'a': 'agg', 'c': 'core'}
+	roles = [kinds[node.id[0]] for node in tree.nodes]
+	pods = [None if role == 'core' else int(node.id[1:].split('_')[0])
+			for role, node in zip(roles, tree.nodes)]
+	src = array('l', (index[edge.lnode.id] for node in tree.nodes for edge in node.edges
+					  if edge.lnode is node))
+	dst = array('l', (index[edge.rnode.id] for node in tree.nodes for edge in node.edges
+					  if edge.lnode is node))
+	return roles, pods, src, dst
+
+
+def _components(num_nodes, src, dst):
+	parent = list(range(num_nodes))
+
+	def find(u):
+		while parent[u] != u:
+			parent[u] = parent[parent[u]]
+			u = parent[u]
+		return u
+
+	for u, v in zip(src, dst):
+		ru, rv = find(u), find(v)
+		if ru != rv:
+			parent[ru] = rv
+	return sum(1 for u in range(num_nodes) if find(u) == u)
+
+
+def verify_fattree(tree):
+	"""
+		Check a Fattree or CompactFattree in one pass over its links, without
+		printing: degree histogram per role, connected components and the
+		bisection between pods [0, k/2) and [k/2, k). Traffic crosses that cut
+		over links joining the halves directly and, per core, over as many of
+		its links into one half as it has into the other; the bisection is
+		that count, capped by the fewest links any tier (hosts, edge-agg,
+		agg-core) gives the lower half. Every core must also reach every pod.
+	"""
+	k = tree.num_ports
+	half = k // 2
+	roles, pod, src, dst = _link_arrays(tree)
+
+	degree = Counter(src)
+	degree.update(dst)
+	degrees = {}
+	for u, role in enumerate(roles):
+		degrees.setdefault(role, Counter())[degree[u]] += 1
+
+	lower = {'host': 0, 'edge-agg': 0, 'agg-core': 0}
+	core_pods = {u: Counter() for u, role in enumerate(roles) if role == 'core'}
+	crossing = 0
+	for u, v in zip(src, dst):
+		tier = '-'.join(sorted((roles[u], roles[v]), key=CompactFattree.RANK.get))
+		low = u if roles[u] != 'core' else v
+		if pod[low] < half:
+			lower['host' if tier == 'edge-host' else tier] += 1
+		if roles[u] == 'core' or roles[v] == 'core':
+			core = u if roles[u] == 'core' else v
+			if roles[low] != 'core':
+				core_pods[core][pod[low]] += 1
+		elif (pod[u] < half) != (pod[v] < half):
+			crossing += 1
+	for pods in core_pods.values():
+		crossing += min(sum(n for p, n in pods.items() if p < half),
+						sum(n for p, n in pods.items() if p >= half))
+	bisection = min(crossing, *lower.values())
+	num_hosts = sum(degrees.get('host', Counter()).values())
+
+	errors = []
+	expected = {'host': 1, 'edge': k, 'agg': k, 'core': k}
+	counts = {'host': k * half * half, 'edge': k * half, 'agg': k * half, 'core': half * half}
+	for role, wanted in expected.items():
+		histogram = degrees.get(role, Counter())
+		if set(histogram) != {wanted} or histogram[wanted] != counts[role]:
+			errors.append(f'{role}: expected {counts[role]} nodes of degree {wanted}, '
+						  f'got {dict(histogram)}')
+	components = _components(len(roles), src, dst)
+	if components != 1:
+		errors.append(f'{components} connected components')
+	partial = sum(1 for pods in core_pods.values() if len(pods) != k)
+	if partial:
+		errors.append(f'{partial} cores do not reach every pod')
+	if bisection * 2 != num_hosts:
+		errors.append(f'bisection {bisection} links for {num_hosts} hosts')
+
+	return TopologyReport(len(roles), len(src), degrees, components, bisection,
+						  bisection * 2 == num_hosts, errors)
+
+
+def assert_fattree(tree):
+	""" Raise AssertionError listing every deviation from a k-ary fat-tree """
+	report = verify_fattree(tree)
+	if report.errors:
+		raise AssertionError('; '.join(report.errors))
+	return report
@@ -0,0 +1,201 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+import time
+
+import addressing
+from path_table import PathTable
+
+
+class TopologyStore:
+    """
+        Switch graph kept up to date from link and switch deltas.
+
+        Isolated changes update the path table incrementally. When changes
+        arrive closer together than `window` seconds (a fabric coming up), or
+        more than `max_deltas` of them pile up with no path lookup in between,
+        the path table is marked stale instead and rebuilt once, either by
+        flush() after the burst or on the next path lookup. Past a few dozen
+        changes one rebuild is cheaper than applying them one by one.
+    """
+
+    def __init__(self, window=0.5, clock=time.monotonic, max_deltas=16):
+        self.graph = {}             # dpid -> list of (neighbor, weight, port)
+        self.neighbor_ports = {}    # dpid -> {neighbor dpid: port}
+        self.port_neighbors = {}    # dpid -> {port: neighbor dpid}
+        self.path_table = PathTable(self.graph)
+        self.window = window
+        self.clock = clock
+        self.last_change = None
+        self.stale = False
+        self.max_deltas = max_deltas    # None applies every change incrementally
+        self.deltas = 0             # changes applied incrementally since the last lookup
+        self.rebuilds = 0
+        self.version = 0            # bumped on every change, for derived caches
+        self.affected = None        # sources whose paths the last change touched, None if unknown
+
+    def add_switch(self, dpid):
+        if dpid in self.graph:
+            return False
+        self.graph[dpid] = []
+        self.neighbor_ports[dpid] = {}
+        self.port_neighbors[dpid] = {}
+        if not self._defer():
+            self.path_table.node_added(dpid)
+        return True
+
+    # Add both directions of the link src:src_port <-> dst:dst_port
+    def add_link(self, src, src_port, dst, dst_port):
+        added = self._add_edge(src, dst, src_port)
+        added |= self._add_edge(dst, src, dst_port)
+        if added and not self._defer():
+            self.path_table.link_added(src, dst)
+        return added
+
+    # A failure is applied right away (defer=False) even inside a burst window,
+    # its repair needs the new distances now
+    def remove_link(self, src, dst, defer=True):
+        removed = self._remove_edge(src, dst)
+        removed |= self._remove_edge(dst, src)
+        if removed and not self._defer(defer):
+            self.affected = set(self.path_table.link_removed(src, dst))
+        return removed
+
+    def remove_switch(self, dpid):
+        if dpid not in self.graph:
+            return False
+        for neighbor in list(self.neighbor_ports[dpid]):
+            self._remove_edge(neighbor, dpid)
+        del self.graph[dpid]
+        del self.neighbor_ports[dpid]
+        del self.port_neighbors[dpid]
+        if not self._defer():
+            self.path_table.node_removed(dpid)
+        return True
+
+    # Replace the whole graph, e.g. from ryu.topology.api.get_link()
+    def load(self, links):
+        self.graph.clear()
+        self.neighbor_ports.clear()
+        self.port_neighbors.clear()
+        for src, src_port, dst, dst_port in links:
+            self._add_edge(src, dst, src_port)
+            self._add_edge(dst, src, dst_port)
+        self.version += 1
+        self.stale = True
+        self.flush()
+
+    # Rebuild the path table if a burst left it stale and has since gone quiet
+    def flush(self, force=True):
+        if not self.stale:
+            return False
+        if not force and self.clock() - self.last_change < self.window:
+            return False
+        self.path_table.rebuild(self.graph)
+        self.stale = False
+        self.deltas = 0
+        self.rebuilds += 1
+        return True
+
+    def get_path(self, src, dst):
+        self.deltas = 0
+        if self.stale:
+            self.flush()
+        return self.path_table.get_path(src, dst)
+
+    # Equal-cost shortest path picked by a flow hash, see PathTable.get_ecmp_path
+    def get_ecmp_path(self, src, dst, flow):
+        self.deltas = 0
+        if self.stale:
+            self.flush()
+        return self.path_table.get_ecmp_path(src, dst, flow)
+
+    def get_cost(self, src, dst):
+        self.deltas = 0
+        if self.stale:
+            self.flush()
+        return self.path_table.get_cost(src, dst)
+
+    # Neighbors of node on some shortest path to dst
+    def next_hops(self, node, dst):
+        self.deltas = 0
+        if self.stale:
+            self.flush()
+        return self.path_table.next_hops(node, dst)
+
+    # Port on src that leads to the adjacent switch dst
+    def get_port(self, src, dst):
+        return self.neighbor_ports.get(src, {}).get(dst)
+
+    # Switch reached through port on dpid, None for host-facing ports
+    def get_neighbor(self, dpid, port):
+        return self.port_neighbors.get(dpid, {}).get(port)
+
+    def switches(self):
+        return self.graph.keys()
+
+    def _defer(self, allowed=True):
+        self.version += 1
+        self.affected = None
+        now = self.clock()
+        if allowed and self.last_change is not None and now - self.last_change < self.window:
+            self.stale = True
+        if allowed and self.max_deltas is not None and self.deltas >= self.max_deltas:
+            self.stale = True
+        self.last_change = now
+        if not self.stale:
+            self.deltas += 1
+        return self.stale
+
+    def _add_edge(self, src, dst, out_port):
+        ports = self.neighbor_ports.setdefault(src, {})
+        if dst in ports:
+            return False
+        ports[dst] = out_port
+        self.port_neighbors.setdefault(src, {})[out_port] = dst
+        self.graph.setdefault(src, []).append((dst, 1, out_port))
+        return True
+
+    def _remove_edge(self, src, dst):
+        out_port = self.neighbor_ports.get(src, {}).pop(dst, None)
+        if out_port is None:
+            return False
+        self.port_neighbors[src].pop(out_port, None)
+        self.graph[src] = [entry for entry in self.graph[src] if entry[0] != dst]
+        return True
+
+
+def fattree_store(k):
+    """
+        TopologyStore of the k-ary fat-tree keyed by the controllers' dpids,
+        ports as fat-tree.py wires them; for benchmarks and self-tests
+    """
+    links = []
+    for dpid in addressing.switch_dpids(k):
+        for port in range(1, k + 1):
+            peer = addressing.neighbor(k, dpid, port)
+            if peer is not None and dpid < peer:
+                peer_port = next(p for p in range(1, k + 1)
+                                 if addressing.neighbor(k, peer, p) == dpid)
+                links.append((dpid, port, peer, peer_port))
+    store = TopologyStore()
+    store.load(links)
+    return store
@@ -0,0 +1,207 @@
+"""
+ Copyright (c) 2025 Computer Networks Group @ UPB
+
+ Permission is hereby granted, free of charge, to any person obtaining a copy of
+ this software and associated documentation files (the "Software"), to deal in
+ the Software without restriction, including without limitation the rights to
+ use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+ the Software, and to permit persons to whom the Software is furnished to do so,
+ subject to the following conditions:
+
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+ FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ """
+
+import collections
+import time
+
+# One flow's measured rate at the switch where it enters the fabric
+FlowRate = collections.namedtuple('FlowRate', ['dpid', 'fields', 'bps'])
+
+
+class TrafficMonitor:
+    """
+        Link utilization and per-flow rates from periodic statistics polls.
+
+        A poll round asks every switch for port stats and some switches (the
+        ingress edges) for flow stats, and is processed once when the last
+        multipart reply of the last switch is in. Port tx counters become
+        utilization samples in a ring buffer per directed link (dpid, port);
+        flow byte counters become rates. Only one round is outstanding at a
+        time, and the interval halves while some link is busy and doubles
+        back towards max_interval while none is.
+
+        Counters arrive as plain values, so fake stats drive it as well as
+        OFPPortStatsReply and OFPFlowStatsReply bodies do.
+    """
+
+    def __init__(self, capacity=10e6, history=4, elephant=0.1, busy=0.5,
+                 min_interval=1.0, max_interval=8.0, clock=time.monotonic):
+        self.capacity = capacity            # link speed, bits/s
+        self.history = history
+        self.elephant = elephant            # share of capacity that makes a flow large
+        self.busy = busy                    # utilization that keeps polling fast
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.clock = clock
+
+        self.samples = {}       # (dpid, port) -> deque of utilization, newest last
+        self.port_bytes = {}    # (dpid, port) -> (time, tx bytes)
+        self.flow_bytes = {}    # (dpid, match key) -> (time, bytes)
+        self.flows = []         # FlowRate of the last round, largest first
+
+        self.pending = None     # dpids a round still waits for, or None
+        self.started = None
+        self.parts = ([], [])   # port and flow stats of the running round
+        self.rounds = 0
+        self.requests = 0
+        self.replies = 0
+
+    def start_round(self, port_dpids, flow_dpids):
+        """
+            Begin a poll round, unless one is outstanding and younger than
+            two max intervals (a switch that never answers). Returns the
+            (port dpids, flow dpids) to send requests to, empty if none.
+        """
+        now = self.clock()
+        if self.pending and now - self.started < 2 * self.max_interval:
+            return [], []
+        port_dpids, flow_dpids = list(port_dpids), list(flow_dpids)
+        self.pending = {('port', dpid) for dpid in port_dpids}
+        self.pending |= {('flow', dpid) for dpid in flow_dpids}
+        self.started = now
+        self.parts = ([], [])
+        self.requests += len(self.pending)
+        return port_dpids, flow_dpids
+
+    # stats: (port_no, tx_bytes) pairs of one reply part; more is OFPMPF_REPLY_MORE
+    def port_stats(self, dpid, stats, more=False):
+        self.parts[0].extend((dpid, port, tx_bytes) for port, tx_bytes in stats)
+        return self._part_done(('port', dpid), more)
+
+    # stats: (match fields, byte_count, duration seconds) of one reply part
+    def flow_stats(self, dpid, stats, more=False):
+        self.parts[1].extend((dpid, fields, count, duration) for fields, count, duration in stats)
+        return self._part_done(('flow', dpid), more)
+
+    # True once the reply completes the round, which is then processed
+    def _part_done(self, key, more):
+        self.replies += 1
+        if more or not self.pending or key not in self.pending:
+            return False
+        self.pending.discard(key)
+        if self.pending:
+            return False
+        self.pending = None
+        self._finish_round(self.clock())
+        return True
+
+    def _finish_round(self, now):
+        ports, flows = self.parts
+        self.parts = ([], [])
+        self.rounds += 1
+
+        for dpid, port, tx_bytes in ports:
+            key = (dpid, port)
+            last = self.port_bytes.get(key)
+            self.port_bytes[key] = (now, tx_bytes)
+            if last is None or now <= last[0] or tx_bytes < last[1]:
+                continue
+            bps = (tx_bytes - last[1]) * 8 / (now - last[0])
+            ring = self.samples.get(key)
+            if ring is None:
+                ring = self.samples[key] = collections.deque(maxlen=self.history)
+            ring.append(bps / self.capacity)
+
+        # Flows missing from this round have expired and are forgotten
+        flow_bytes = {}
+        rates = []
+        for dpid, fields, count, duration in flows:
+            key = (dpid, tuple(sorted(fields.items())))
+            last = self.flow_bytes.get(key)
+            flow_bytes[key] = (now, count)
+            if last is not None and now > last[0] and count >= last[1]:
+                rates.append(FlowRate(dpid, fields, (count - last[1]) * 8 / (now - last[0])))
+            elif duration > 0:
+                rates.append(FlowRate(dpid, fields, count * 8 / duration))
+        self.flow_bytes = flow_bytes
+        self.flows = sorted(rates, key=lambda flow: -flow.bps)
+
+        peak = max((ring[-1] for ring in self.samples.values()), default=0.0)
+        if peak >= self.busy:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+
+    # Mean utilization of the directed link out of port over the last samples
+    def utilization(self, dpid, port, samples=1):
+        ring = self.samples.get((dpid, port))
+        if not ring:
+            return 0.0
+        recent = list(ring)[-samples:]
+        return sum(recent) / len(recent)
+
+    def elephants(self):
+        return [flow for flow in self.flows if flow.bps >= self.elephant * self.capacity]
+
+
+def equal_cost_paths(topology, src, dst, limit=256):
+    """ Every shortest path from src to dst, at most limit of them """
+    paths = []
+
+    def extend(path):
+        if len(paths) >= limit:
+            return
+        node = path[-1]
+        if node == dst:
+            paths.append(tuple(path))
+            return
+        for hop in topology.next_hops(node, dst):
+            extend(path + [hop])
+
+    if src == dst or topology.next_hops(src, dst):
+        extend([src])
+    return paths
+
+
+def schedule(topology, load, flows, current_path, max_moves=16, margin=0.1):
+    """
+        Global first fit over equal-cost paths, as in Hedera. load maps a
+        directed link (u, v) to its measured rate in bits/s and is updated in
+        place. flows are (flow, bps, src switch, dst switch), largest first;
+        current_path(flow) is the switch path it takes now. A flow moves to
+        the equal-cost path whose busiest link would be least loaded, if that
+        beats its current bottleneck by more than margin of the current one.
+        Returns [(flow, new path), ...].
+    """
+    moves = []
+    for flow, bps, src, dst in flows:
+        if len(moves) >= max_moves:
+            break
+        path = current_path(flow)
+        if not path:
+            continue
+        links = list(zip(path, path[1:]))
+        for link in links:
+            load[link] = max(0.0, load.get(link, 0.0) - bps)
+
+        def bottleneck(candidate):
+            return max((load.get(link, 0.0) + bps for link in zip(candidate, candidate[1:])),
+                       default=0.0)
+
+        current = bottleneck(path)
+        best = min(equal_cost_paths(topology, src, dst), key=bottleneck, default=path)
+        if bottleneck(best) < current * (1 - margin):
+            path = best
+            moves.append((flow, best))
+        for link in zip(path, path[1:]):
+            load[link] = load.get(link, 0.0) + bps
+    return moves